@@ -0,0 +1,125 @@
+"""Vectorized hand evaluation over whole batches of boards and players.
+
+This uses the same tables as hand_evaluator, turned into NumPy arrays, so the
+strengths it returns are identical to hand_evaluator.evaluate_cards.  NumPy is
+optional: callers should check AVAILABLE before using anything here.
+"""
+import card
+import hand_evaluator
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+AVAILABLE = numpy is not None
+
+
+class Error(Exception):
+    pass
+
+
+class NumpyUnavailableError(Error):
+    """Raised when batch evaluation is requested without NumPy installed."""
+
+
+_tables = {}
+# All 13 rank bits.
+_RANK_MASK = (1 << len(card.RANKS)) - 1
+
+
+def _get_tables():
+    """Builds the NumPy lookup arrays on first use."""
+    if not AVAILABLE:
+        raise NumpyUnavailableError('Batch evaluation requires numpy')
+    if not _tables:
+        products = hand_evaluator.non_flush_product_table()
+        keys = numpy.array(sorted(products), dtype=numpy.int64)
+        _tables['product_keys'] = keys
+        _tables['product_strengths'] = numpy.array(
+            [products[k] for k in keys], dtype=numpy.int64)
+        _tables['flush_strengths'] = numpy.array(
+            hand_evaluator.flush_strength_table(), dtype=numpy.int64)
+        _tables['card_primes'] = numpy.array(
+            hand_evaluator.CARD_PRIMES, dtype=numpy.int64)
+        _tables['card_rank_bits'] = numpy.array(
+            hand_evaluator.CARD_RANK_BITS, dtype=numpy.int64)
+    return _tables
+
+
+def evaluate_batch(hole_cards, boards):
+    """Scores every player's hand on every board.
+
+    Args:
+        hole_cards: int array of card ids, either shape (M, 2) when the same M
+            hands play every board, or (N, M, 2) for per-board hands.
+        boards: int array of card ids of shape (N, 5).  Boards with three or
+            four cards are also accepted.
+
+    Returns:
+        tuple of (strengths, categories), each an int64 array of shape (N, M).
+            Hands that share a card with their board get meaningless
+            strengths rather than an error, so callers may evaluate every
+            combo on every board and mask out the conflicting ones.
+    """
+    tables = _get_tables()
+    boards = numpy.asarray(boards, dtype=numpy.int64)
+    hole_cards = numpy.asarray(hole_cards, dtype=numpy.int64)
+    num_boards = boards.shape[0]
+    if hole_cards.ndim == 2:
+        hole_cards = numpy.broadcast_to(
+            hole_cards, (num_boards,) + hole_cards.shape)
+    num_players = hole_cards.shape[1]
+
+    cards = numpy.concatenate(
+        [hole_cards,
+         numpy.broadcast_to(boards[:, numpy.newaxis, :],
+                            (num_boards, num_players, boards.shape[1]))],
+        axis=2)
+
+    products = tables['card_primes'][cards].prod(axis=2)
+    product_keys = tables['product_keys']
+    strengths = tables['product_strengths'][numpy.minimum(
+        numpy.searchsorted(product_keys, products), len(product_keys) - 1)]
+
+    suits = cards & 3
+    rank_bits = tables['card_rank_bits'][cards]
+    flush_strengths = numpy.zeros_like(strengths)
+    for suit in xrange(len(card.SUITS)):
+        # Cards are distinct, so summing the bits of a suit is the same as
+        # or-ing them together.
+        suit_masks = numpy.where(suits == suit, rank_bits, 0).sum(axis=2)
+        suit_masks &= _RANK_MASK
+        numpy.maximum(flush_strengths, tables['flush_strengths'][suit_masks],
+                      out=flush_strengths)
+    strengths = numpy.where(flush_strengths > 0, flush_strengths, strengths)
+    return strengths, strengths >> hand_evaluator.CATEGORY_SHIFT
+
+
+def deal_boards(rng, num_boards, num_cards, excluded_ids, hole_cards=None):
+    """Deals num_cards random cards for each of num_boards boards.
+
+    Args:
+        rng: numpy.random.RandomState.
+        num_boards: int, number of boards to deal.
+        num_cards: int, number of cards to deal to each board.
+        excluded_ids: iterable of int, card ids unavailable on every board.
+        hole_cards: int array of shape (N, M, 2) or None, per-board hole cards
+            that are also unavailable on their board.
+
+    Returns:
+        int64 array of shape (N, num_cards).
+    """
+    # Ranking uniform keys is an independent random permutation per row;
+    # unavailable cards get keys above 1 so they are never picked.
+    keys = rng.random_sample((num_boards, card.NUM_CARDS))
+    excluded_ids = list(excluded_ids)
+    if excluded_ids:
+        keys[:, excluded_ids] = 2.0
+    if hole_cards is not None:
+        rows = numpy.arange(num_boards)[:, numpy.newaxis]
+        keys[rows, hole_cards.reshape(num_boards, -1)] = 2.0
+    if num_cards == 0:
+        return numpy.zeros((num_boards, 0), dtype=numpy.int64)
+    return numpy.argpartition(
+        keys, num_cards - 1, axis=1)[:, :num_cards].astype(numpy.int64)
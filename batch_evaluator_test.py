@@ -0,0 +1,62 @@
+"""Tests for batch_evaluator.py"""
+# pylint: disable=missing-docstring
+import random
+import unittest
+
+import batch_evaluator
+import hand_evaluator
+
+if batch_evaluator.AVAILABLE:
+    import numpy
+
+
+@unittest.skipUnless(batch_evaluator.AVAILABLE, 'numpy is not installed')
+class EvaluateBatchTest(unittest.TestCase):
+
+    def test_matches_scalar_evaluator(self):
+        rng = random.Random(7)
+        num_boards = 500
+        num_players = 3
+        dealt = [rng.sample(xrange(52), 5 + 2 * num_players)
+                 for _ in xrange(num_boards)]
+        boards = numpy.array([d[:5] for d in dealt])
+        hole_cards = numpy.array(
+            [[d[5 + 2 * p:7 + 2 * p] for p in xrange(num_players)]
+             for d in dealt])
+
+        strengths, categories = batch_evaluator.evaluate_batch(
+            hole_cards, boards)
+
+        self.assertEqual((num_boards, num_players), strengths.shape)
+        for n in xrange(num_boards):
+            for p in xrange(num_players):
+                expected = hand_evaluator.evaluate_cards(
+                    list(hole_cards[n, p]) + list(boards[n]))
+                self.assertEqual(expected, strengths[n, p])
+                self.assertEqual(hand_evaluator.category_of(expected),
+                                 categories[n, p])
+
+    def test_shared_hole_cards(self):
+        # Royal flush in spades on the board for everybody.
+        boards = numpy.array([[48, 44, 40, 36, 32]])
+        hole_cards = numpy.array([[0, 1], [4, 5]])
+        strengths, categories = batch_evaluator.evaluate_batch(
+            hole_cards, boards)
+        self.assertEqual(strengths[0, 0], strengths[0, 1])
+        self.assertEqual(hand_evaluator.STRAIGHT_FLUSH, categories[0, 0])
+
+    def test_deal_boards_avoids_excluded_cards(self):
+        rng = numpy.random.RandomState(3)
+        hole_cards = numpy.array([[[0, 1], [2, 3]]] * 200)
+        excluded = range(4, 40)
+        boards = batch_evaluator.deal_boards(
+            rng, 200, 5, excluded, hole_cards=hole_cards)
+        self.assertEqual((200, 5), boards.shape)
+        for board in boards:
+            self.assertEqual(5, len(set(board)))
+            for card_id in board:
+                self.assertGreaterEqual(card_id, 40)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,333 @@
+"""Runs many scenarios in one process and streams a result for each.
+
+Scenarios are read from JSON lines or CSV, on stdin or from a file, with the
+fields:
+    id: optional, copied to the result.
+    hands: the players' hands, as for main_holdem_odds.py --hands.
+    board: optional board cards, e.g. "Kd7d2c".
+    dead: optional dead cards.
+    iterations: optional number of iterations to sample.
+    target_stderr: optional standard error to sample until.
+    strategy: optional, one of auto, sample or exhaustive.
+
+One JSON result line is written to stdout as soon as each scenario finishes.
+The evaluator tables, the result cache, the preflop table and the worker pool
+are set up once and shared by every scenario.
+
+Sample invocation:
+    $ python batch_runner.py --input spots.jsonl --workers 8 > results.jsonl
+"""
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+import hand_evaluator
+import hand_ranges
+import monte_carlo_runner
+import persistent_cache
+import poker_hand
+import preflop_table
+import result_cache
+
+AUTO_FORMAT = 'auto'
+JSONL_FORMAT = 'jsonl'
+CSV_FORMAT = 'csv'
+INPUT_FORMATS = (AUTO_FORMAT, JSONL_FORMAT, CSV_FORMAT)
+
+
+class Error(Exception):
+    pass
+
+
+class InvalidScenarioError(Error):
+    """Raised if a scenario's fields cannot be understood."""
+
+
+def _optional(fields, name, convert):
+    value = fields.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        return convert(value)
+    except (TypeError, ValueError):
+        raise InvalidScenarioError('Invalid %s: %r' % (name, value))
+
+
+def _string_field(fields, name):
+    value = fields.get(name)
+    if value is None:
+        return ''
+    if not isinstance(value, basestring):
+        raise InvalidScenarioError('Invalid %s: %r' % (name, value))
+    return value
+
+
+class Scenario(object):
+    """One spot to analyze, parsed from a record of fields."""
+    def __init__(self, fields):
+        """Initializer.
+
+        Args:
+            fields: dict, the record's fields, as described in the module
+                docstring.
+
+        Raises:
+            InvalidScenarioError if a field is missing or invalid.
+        """
+        self.scenario_id = fields.get('id')
+        self.hands = _string_field(fields, 'hands')
+        if not self.hands:
+            raise InvalidScenarioError('Missing hands')
+        self.board = _string_field(fields, 'board')
+        self.dead = _string_field(fields, 'dead')
+        self.iterations = _optional(fields, 'iterations', int)
+        if self.iterations is not None and self.iterations <= 0:
+            raise InvalidScenarioError(
+                'Invalid iterations: %s' % self.iterations)
+        self.target_stderr = _optional(fields, 'target_stderr', float)
+        self.strategy = _string_field(fields, 'strategy') or None
+        if (self.strategy is not None and
+                self.strategy not in monte_carlo_runner.STRATEGIES):
+            raise InvalidScenarioError('Invalid strategy: %s' % self.strategy)
+
+
+def iter_records(input_file, input_format=AUTO_FORMAT):
+    """Reads the records of a JSON lines or CSV input.
+
+    Args:
+        input_file: file, the input.  CSV input starts with a header line.
+        input_format: str, one of INPUT_FORMATS.  AUTO_FORMAT treats input
+            whose first line starts with "{" as JSON lines and anything else
+            as CSV.
+
+    Yields:
+        tuple of (int line number, dict of fields or None, error message or
+            None).
+    """
+    lines = (line for line in input_file if line.strip())
+    try:
+        first_line = next(lines)
+    except StopIteration:
+        return
+    lines = itertools.chain([first_line], lines)
+    if input_format == AUTO_FORMAT:
+        if first_line.lstrip().startswith('{'):
+            input_format = JSONL_FORMAT
+        else:
+            input_format = CSV_FORMAT
+
+    if input_format == CSV_FORMAT:
+        for line_number, fields in enumerate(csv.DictReader(lines), 2):
+            yield line_number, fields, None
+        return
+    for line_number, line in enumerate(lines, 1):
+        try:
+            fields = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, 'Invalid JSON: %s' % e
+            continue
+        if not isinstance(fields, dict):
+            yield line_number, None, 'Expected a JSON object'
+            continue
+        yield line_number, fields, None
+
+
+class BatchRunner(object):
+    """Runs scenarios one after another with shared, warm state."""
+    def __init__(self, iterations=monte_carlo_runner.DEFAULT_ITERATIONS,
+                 strategy=monte_carlo_runner.AUTO_STRATEGY, batch_size=None,
+                 workers=1, seed=None,
+                 cache_size=result_cache.DEFAULT_MAX_ENTRIES,
+                 preflop_table_path=None, cache_path=None):
+        """Initializer.
+
+        Args:
+            iterations: int, iterations for scenarios that do not say.
+            strategy: str, strategy for scenarios that do not say.
+            batch_size: int or None, passed on to every MonteCarloRunner.
+            workers: int, the number of processes in the shared pool.
+            seed: hashable or None, seeds every scenario's generator in turn.
+            cache_size: int, the number of results kept in the shared cache.
+            preflop_table_path: str or None, a table built by preflop_table.py
+                to answer heads-up preflop scenarios from.
+            cache_path: str or None, a SQLite file to keep the cache in, so
+                that it outlives the batch.
+        """
+        self.iterations = iterations
+        self.strategy = strategy
+        self.batch_size = batch_size
+        self.workers = workers
+        self.rng = random.Random(seed)
+        if cache_path:
+            self.cache = persistent_cache.PersistentCache(
+                cache_path, max_entries=cache_size)
+        else:
+            self.cache = result_cache.LRUCache(max_entries=cache_size)
+        self.preflop_table = None
+        if preflop_table_path and os.path.exists(preflop_table_path):
+            self.preflop_table = preflop_table.PreflopTable(preflop_table_path)
+        # Build the lookup tables before forking so every worker shares them.
+        hand_evaluator.non_flush_product_table()
+        self.pool = None
+        if workers > 1:
+            self.pool = multiprocessing.Pool(workers)
+
+    def close(self):
+        """Shuts down the worker pool and closes the tables and cache."""
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+        if self.preflop_table is not None:
+            self.preflop_table.close()
+            self.preflop_table = None
+        if isinstance(self.cache, persistent_cache.PersistentCache):
+            self.cache.close()
+
+    def _lookup_preflop(self, holdem_ranges, used_cards):
+        if (self.preflop_table is None or used_cards or
+                len(holdem_ranges) != 2):
+            return None
+        return self.preflop_table.lookup_ranges(*holdem_ranges)
+
+    def run_scenario(self, scenario):
+        """Computes the result record of one scenario.
+
+        Args:
+            scenario: Scenario.
+
+        Returns:
+            dict, the JSON result record.
+        """
+        start_time = time.time()
+        board_cards = poker_hand.parse_string_into_cards(scenario.board)
+        dead_cards = poker_hand.parse_string_into_cards(scenario.dead)
+        holdem_ranges = poker_hand.parse_hands_into_holdem_hands(
+            scenario.hands, used_cards=board_cards + dead_cards)
+        record = {'hands': ['%r' % her for her in holdem_ranges]}
+
+        equities = self._lookup_preflop(
+            holdem_ranges, board_cards + dead_cards)
+        if equities is not None:
+            record.update(equities=list(equities),
+                          stderrs=[0.0] * len(equities), iterations=None,
+                          strategy=preflop_table.LOOKUP_STRATEGY, cached=True)
+        else:
+            runner = monte_carlo_runner.MonteCarloRunner(
+                holdem_ranges, board_cards=board_cards, dead_cards=dead_cards,
+                iterations=scenario.iterations or self.iterations,
+                batch_size=self.batch_size,
+                strategy=scenario.strategy or self.strategy,
+                cache=self.cache, workers=self.workers,
+                seed=self.rng.getrandbits(64),
+                target_stderr=scenario.target_stderr, pool=self.pool)
+            result = runner.run()
+            record.update(
+                equities=result.equities,
+                stderrs=[player.stderr for player in result.players],
+                iterations=result.iterations, strategy=result.strategy,
+                cached=result.cached)
+        record['seconds'] = time.time() - start_time
+        return record
+
+    def run(self, input_file, output, input_format=AUTO_FORMAT):
+        """Streams a result line to output for every scenario in input_file.
+
+        Scenarios that fail produce a record with an "error" field instead,
+        and the batch carries on.
+
+        Returns:
+            int, the number of scenarios that failed.
+        """
+        num_errors = 0
+        for line_number, fields, error in iter_records(
+                input_file, input_format=input_format):
+            record = {'line': line_number}
+            if fields is not None and fields.get('id') is not None:
+                record['id'] = fields['id']
+            if error is None:
+                try:
+                    record.update(self.run_scenario(Scenario(fields)))
+                except (Error, poker_hand.Error, hand_ranges.Error,
+                        monte_carlo_runner.Error, ValueError) as e:
+                    error = str(e)
+            if error is not None:
+                record['error'] = error
+                num_errors += 1
+            output.write(json.dumps(record, sort_keys=True) + '\n')
+            output.flush()
+        return num_errors
+
+
+def main(parsed_args):
+    """Run the batch and exit with an error status if any scenario failed."""
+    batch_runner = BatchRunner(
+        iterations=parsed_args.num_iterations, strategy=parsed_args.strategy,
+        batch_size=parsed_args.batch_size, workers=parsed_args.workers,
+        seed=parsed_args.seed, cache_size=parsed_args.cache_size,
+        preflop_table_path=parsed_args.preflop_table,
+        cache_path=parsed_args.cache_file)
+    try:
+        if parsed_args.input == '-':
+            num_errors = batch_runner.run(
+                sys.stdin, sys.stdout, input_format=parsed_args.input_format)
+        else:
+            with open(parsed_args.input) as input_file:
+                num_errors = batch_runner.run(
+                    input_file, sys.stdout,
+                    input_format=parsed_args.input_format)
+    finally:
+        batch_runner.close()
+    return 1 if num_errors else 0
+
+
+def _build_argparse():
+    parser = argparse.ArgumentParser(
+        description='Analyze many scenarios, streaming one JSON line each.')
+    parser.add_argument(
+        '--input', help='JSON lines or CSV file of scenarios, or - for stdin.',
+        type=str, default='-')
+    parser.add_argument(
+        '--input_format', help='Format of the input.',
+        choices=INPUT_FORMATS, default=AUTO_FORMAT)
+    parser.add_argument(
+        '--num_iterations',
+        help='Number of iterations for scenarios that do not say.',
+        type=int, default=monte_carlo_runner.DEFAULT_ITERATIONS)
+    parser.add_argument(
+        '--strategy', help='Strategy for scenarios that do not say.',
+        choices=monte_carlo_runner.STRATEGIES,
+        default=monte_carlo_runner.AUTO_STRATEGY)
+    parser.add_argument(
+        '--batch_size',
+        help='Sample iterations in blocks of this size using NumPy.',
+        type=int, default=None)
+    parser.add_argument(
+        '--workers', help='Number of processes shared by all scenarios.',
+        type=int, default=1)
+    parser.add_argument(
+        '--seed', help='Seed for repeatable batches.',
+        type=int, default=None)
+    parser.add_argument(
+        '--cache_size', help='Number of results kept in the shared cache.',
+        type=int, default=result_cache.DEFAULT_MAX_ENTRIES)
+    parser.add_argument(
+        '--cache_file',
+        help='SQLite file that keeps results between batches.',
+        type=str, default='')
+    parser.add_argument(
+        '--preflop_table',
+        help=('Precomputed heads-up preflop equity table.  Empty to always '
+              'simulate.'),
+        type=str, default=preflop_table.DEFAULT_TABLE_PATH)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    sys.exit(main(_build_argparse()))
@@ -0,0 +1,147 @@
+"""Tests for batch_runner.py"""
+# pylint: disable=missing-docstring
+import json
+import StringIO
+import unittest
+
+import batch_runner
+
+
+def _run(lines, **kwargs):
+    runner = batch_runner.BatchRunner(**kwargs)
+    output = StringIO.StringIO()
+    try:
+        num_errors = runner.run(StringIO.StringIO('\n'.join(lines)), output)
+    finally:
+        runner.close()
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    return num_errors, records
+
+
+class IterRecordsTest(unittest.TestCase):
+
+    def test_jsonl(self):
+        records = list(batch_runner.iter_records(StringIO.StringIO(
+            '{"hands": "asks,qdqh"}\n\n{"hands": "2c2d,3c3d"}\n')))
+        self.assertEqual(
+            [(1, {'hands': 'asks,qdqh'}, None),
+             (2, {'hands': '2c2d,3c3d'}, None)],
+            records)
+
+    def test_csv(self):
+        records = list(batch_runner.iter_records(StringIO.StringIO(
+            'id,hands,board\nx,asks;qdqh,kd7d2c\n')))
+        self.assertEqual(1, len(records))
+        line_number, fields, error = records[0]
+        self.assertEqual(2, line_number)
+        self.assertEqual('asks;qdqh', fields['hands'])
+        self.assertEqual('kd7d2c', fields['board'])
+        self.assertIsNone(error)
+
+    def test_invalid_json(self):
+        records = list(batch_runner.iter_records(StringIO.StringIO(
+            '{"hands": "asks,qdqh"}\nnot json\n[1]\n')))
+        self.assertIsNone(records[1][1])
+        self.assertIn('Invalid JSON', records[1][2])
+        self.assertIn('Expected a JSON object', records[2][2])
+
+    def test_empty(self):
+        self.assertEqual(
+            [], list(batch_runner.iter_records(StringIO.StringIO(''))))
+
+
+class ScenarioTest(unittest.TestCase):
+
+    def test_defaults(self):
+        scenario = batch_runner.Scenario({'hands': 'asks,qdqh'})
+        self.assertEqual('', scenario.board)
+        self.assertIsNone(scenario.iterations)
+        self.assertIsNone(scenario.strategy)
+
+    def test_csv_numbers(self):
+        scenario = batch_runner.Scenario(
+            {'hands': 'asks,qdqh', 'iterations': '500', 'target_stderr': ''})
+        self.assertEqual(500, scenario.iterations)
+        self.assertIsNone(scenario.target_stderr)
+
+    def test_invalid(self):
+        with self.assertRaises(batch_runner.InvalidScenarioError):
+            batch_runner.Scenario({'board': 'kd7d2c'})
+        with self.assertRaises(batch_runner.InvalidScenarioError):
+            batch_runner.Scenario({'hands': 'asks,qdqh', 'iterations': 'x'})
+        with self.assertRaises(batch_runner.InvalidScenarioError):
+            batch_runner.Scenario({'hands': 'asks,qdqh', 'strategy': 'x'})
+        with self.assertRaises(batch_runner.InvalidScenarioError):
+            batch_runner.Scenario({'hands': 5})
+        with self.assertRaises(batch_runner.InvalidScenarioError):
+            batch_runner.Scenario({'hands': 'asks,qdqh', 'iterations': [5]})
+        with self.assertRaises(batch_runner.InvalidScenarioError):
+            batch_runner.Scenario({'hands': 'asks,qdqh', 'iterations': -100})
+        with self.assertRaises(batch_runner.InvalidScenarioError):
+            batch_runner.Scenario({'hands': 'asks,qdqh', 'strategy': {}})
+        with self.assertRaises(batch_runner.InvalidScenarioError):
+            batch_runner.Scenario({'hands': 'asks,qdqh', 'board': ['kd']})
+
+
+class BatchRunnerTest(unittest.TestCase):
+
+    def test_streams_a_record_per_scenario(self):
+        num_errors, records = _run([
+            '{"id": "a", "hands": "asks,qdqh", "board": "kd7d2c",'
+            ' "strategy": "exhaustive"}',
+            '{"id": "b", "hands": "asks,qdqh", "iterations": 200}',
+        ], seed=1)
+        self.assertEqual(0, num_errors)
+        self.assertEqual(['a', 'b'], [record['id'] for record in records])
+        self.assertEqual('exhaustive', records[0]['strategy'])
+        self.assertEqual([0.0, 0.0], records[0]['stderrs'])
+        self.assertAlmostEqual(1.0, sum(records[0]['equities']))
+        self.assertEqual(200, records[1]['iterations'])
+        self.assertEqual(2, len(records[1]['equities']))
+
+    def test_errors_do_not_stop_the_batch(self):
+        num_errors, records = _run([
+            '{"id": "bad", "hands": "asks,asqh"}',
+            'oops',
+            '{"id": "good", "hands": "asks,qdqh", "board": "kd7d2c",'
+            ' "strategy": "exhaustive"}',
+        ])
+        self.assertEqual(2, num_errors)
+        self.assertIn('error', records[0])
+        self.assertEqual('bad', records[0]['id'])
+        self.assertIn('error', records[1])
+        self.assertNotIn('error', records[2])
+
+    def test_every_failure_is_an_error_record(self):
+        num_errors, records = _run([
+            '{"id": 1, "hands": "zz+;kk"}',
+            '{"id": 2, "hands": 5}',
+            '{"id": 3, "hands": "asas,kk"}',
+            '{"id": 4, "hands": "asks,qq", "board": "zz"}',
+            '{"id": 5, "hands": "aa;aa;aa"}',
+            '{"id": 6, "hands": "asad,kskd", "iterations": [5]}',
+            '{"id": 7, "hands": "asad,kskd", "iterations": 0}',
+            '{"id": 8, "hands": "asad,kskd", "strategy": {}}',
+        ])
+        self.assertEqual(8, num_errors)
+        self.assertEqual(range(1, 9), [record['id'] for record in records])
+        for record in records:
+            self.assertIn('error', record)
+
+    def test_repeated_scenarios_hit_the_shared_cache(self):
+        line = ('{"hands": "asks,qdqh", "board": "kd7d2c",'
+                ' "strategy": "exhaustive"}')
+        _, records = _run([line, line])
+        self.assertFalse(records[0]['cached'])
+        self.assertTrue(records[1]['cached'])
+        self.assertEqual(records[0]['equities'], records[1]['equities'])
+
+    def test_seed_is_repeatable(self):
+        line = '{"hands": "asks,qdqh", "iterations": 300}'
+        _, first = _run([line], seed=7)
+        _, second = _run([line], seed=7)
+        self.assertEqual(first[0]['equities'], second[0]['equities'])
+
+
+if __name__ == '__main__':
+    unittest.main()
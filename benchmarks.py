@@ -0,0 +1,287 @@
+"""Benchmarks of the evaluator, the dealer, range parsing and simulations.
+
+Each benchmark reports how many operations per second it managed, and runs
+can be saved as a baseline and later compared against it, failing when any
+benchmark got slower by more than a tolerance.
+
+Sample invocations:
+    $ python benchmarks.py
+    $ python benchmarks.py --save_baseline baseline.json
+    $ python benchmarks.py --baseline baseline.json --tolerance 0.2
+"""
+import argparse
+import json
+import random
+import sys
+import time
+
+import batch_evaluator
+import card
+import deck
+import monte_carlo_runner
+import poker_hand
+
+# Seconds each timing round of a benchmark runs for.
+DEFAULT_MIN_TIME = 0.5
+# Timing rounds per benchmark; the fastest round is reported, since slower
+# ones only measure interference from the rest of the machine.
+DEFAULT_ROUNDS = 3
+# Fractional slowdown from the baseline that counts as a regression.
+DEFAULT_TOLERANCE = 0.15
+# Fixed hands that the evaluator and comparison benchmarks cycle through.
+NUM_FIXTURES = 1000
+FIXTURE_SEED = 20160101
+SIMULATION_HANDS = {
+    2: 'AsKs,QdQh',
+    6: 'AsKs,QdQh,JcTc,8d8s,Ah5d,7h6h',
+    9: 'AsKs,QdQh,JcTc,8d8s,Ah5d,7h6h,KcQc,2c2d,9s9h',
+}
+SIMULATION_ITERATIONS = 500
+
+
+class Error(Exception):
+    pass
+
+
+class Benchmark(object):
+    """A named, repeatable unit of work.
+
+    Attributes:
+        name: str, identifies the benchmark in reports and baselines.
+        unit: str, what one operation is, e.g. "evaluations".
+        setup: callable returning (callable, int), the work to time and how
+            many operations each call of it performs.  Setup is not timed.
+    """
+    def __init__(self, name, unit, setup):
+        self.name = name
+        self.unit = unit
+        self.setup = setup
+
+
+def _fixture_cards(num_cards):
+    """NUM_FIXTURES fixed, distinct sets of num_cards cards."""
+    rng = random.Random(FIXTURE_SEED + num_cards)
+    return [rng.sample(card.CARDS_BY_ID, num_cards)
+            for _ in xrange(NUM_FIXTURES)]
+
+
+def _setup_best_hand():
+    fixtures = _fixture_cards(7)
+
+    def work():
+        for cards in fixtures:
+            poker_hand.get_best_hand_from_cards(cards)
+    return work, len(fixtures)
+
+
+def _setup_compare():
+    hands = [poker_hand.PokerHand(cards=cards)
+             for cards in _fixture_cards(5)]
+    pairs = zip(hands, hands[1:] + hands[:1])
+
+    def work():
+        for lhs, rhs in pairs:
+            lhs > rhs  # pylint: disable=pointless-statement
+    return work, len(pairs)
+
+
+def _setup_deal():
+    mcr = monte_carlo_runner.MonteCarloRunner(
+        poker_hand.parse_hands_into_holdem_hands('AK;QQ'), seed=0)
+    hands = [mcr.select_hands_for_players() for _ in xrange(NUM_FIXTURES)]
+
+    def work():
+        for player_hands in hands:
+            mcr._reset_deck(player_hands)
+            mcr.current_deck.deal(5)
+    return work, len(hands)
+
+
+def _setup_deck_pop():
+    rng = random.Random(0)
+    num_decks = NUM_FIXTURES // 10
+
+    def work():
+        for _ in xrange(num_decks):
+            d = deck.Deck(rng=rng)
+            d.reset_and_shuffle()
+            for _ in xrange(5):
+                d.pop()
+    return work, num_decks
+
+
+def _setup_parse():
+    def work():
+        poker_hand.parse_hands_into_holdem_hands(
+            'TT+,A2s-A5s,AQs+,KQo:0.5;random')
+    return work, 1
+
+
+def _simulation_setup(num_players, batch_size=None):
+    def setup():
+        he_hands = poker_hand.parse_hands_into_holdem_hands(
+            SIMULATION_HANDS[num_players])
+        seeds = iter(xrange(sys.maxint))
+
+        def work():
+            monte_carlo_runner.MonteCarloRunner(
+                he_hands, iterations=SIMULATION_ITERATIONS,
+                batch_size=batch_size,
+                strategy=monte_carlo_runner.SAMPLE_STRATEGY,
+                seed=next(seeds)).run()
+        return work, SIMULATION_ITERATIONS
+    return setup
+
+
+def all_benchmarks():
+    """The benchmarks that can run here, in reporting order."""
+    benchmarks = [
+        Benchmark('best_hand_from_cards', 'evaluations', _setup_best_hand),
+        Benchmark('poker_hand_compare', 'comparisons', _setup_compare),
+        Benchmark('reset_deck_and_deal', 'deals', _setup_deal),
+        Benchmark('deck_shuffle_and_pop', 'decks', _setup_deck_pop),
+        Benchmark('parse_ranges', 'parses', _setup_parse),
+    ]
+    for num_players in sorted(SIMULATION_HANDS):
+        benchmarks.append(Benchmark(
+            'simulate_%dp' % num_players, 'iterations',
+            _simulation_setup(num_players)))
+    if batch_evaluator.AVAILABLE:
+        for num_players in sorted(SIMULATION_HANDS):
+            benchmarks.append(Benchmark(
+                'simulate_%dp_batched' % num_players, 'iterations',
+                _simulation_setup(num_players, batch_size=100)))
+    return benchmarks
+
+
+def measure(benchmark, min_time=DEFAULT_MIN_TIME, rounds=DEFAULT_ROUNDS):
+    """Times a benchmark.
+
+    Args:
+        benchmark: Benchmark.
+        min_time: float, seconds each round runs for at least.
+        rounds: int, the number of rounds; the fastest counts.
+
+    Returns:
+        float, operations per second.
+    """
+    work, operations_per_call = benchmark.setup()
+    work()  # Warm up lazily built tables and caches.
+    best_rate = 0.0
+    for _ in xrange(rounds):
+        calls = 0
+        start_time = time.time()
+        elapsed = 0.0
+        while elapsed < min_time:
+            work()
+            calls += 1
+            elapsed = time.time() - start_time
+        best_rate = max(best_rate, calls * operations_per_call / elapsed)
+    return best_rate
+
+
+def compare_to_baseline(rates, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Finds the benchmarks that got slower than the baseline allows.
+
+    Args:
+        rates: dict, mapping benchmark names to operations per second.
+        baseline: dict, the same for an earlier run.  Benchmarks missing
+            from either are not compared.
+        tolerance: float, the fractional slowdown allowed.
+
+    Returns:
+        dict, mapping the names of regressed benchmarks to their rate as a
+            fraction of the baseline's.
+    """
+    regressions = {}
+    for name, rate in rates.iteritems():
+        baseline_rate = baseline.get(name)
+        if not baseline_rate:
+            continue
+        ratio = rate / baseline_rate
+        if ratio < 1.0 - tolerance:
+            regressions[name] = ratio
+    return regressions
+
+
+def load_baseline(path):
+    """Reads rates saved by save_baseline.
+
+    Raises:
+        Error if the file is not a baseline.
+    """
+    try:
+        with open(path) as baseline_file:
+            baseline = json.load(baseline_file)
+    except (IOError, ValueError) as e:
+        raise Error('Cannot read baseline %s: %s' % (path, e))
+    if not isinstance(baseline, dict):
+        raise Error('Baseline %s is not a mapping of rates' % path)
+    return baseline
+
+
+def save_baseline(path, rates):
+    with open(path, 'w') as baseline_file:
+        json.dump(rates, baseline_file, indent=2, sort_keys=True)
+        baseline_file.write('\n')
+
+
+def main(parsed_args):
+    """Runs the benchmarks and returns the exit status."""
+    baseline = {}
+    if parsed_args.baseline:
+        baseline = load_baseline(parsed_args.baseline)
+
+    rates = {}
+    print '%-24s%16s  %-12s%10s' % (
+        'Benchmark', 'Per second', 'Unit', 'Change')
+    for benchmark in all_benchmarks():
+        if parsed_args.only and parsed_args.only not in benchmark.name:
+            continue
+        rate = measure(benchmark, min_time=parsed_args.min_time,
+                       rounds=parsed_args.rounds)
+        rates[benchmark.name] = rate
+        line = '%-24s%16.1f  %-12s' % (benchmark.name, rate, benchmark.unit)
+        if baseline.get(benchmark.name):
+            line += '%+9.1f%%' % (
+                100.0 * (rate / baseline[benchmark.name] - 1))
+        print line
+        sys.stdout.flush()
+
+    if parsed_args.save_baseline:
+        save_baseline(parsed_args.save_baseline, rates)
+    regressions = compare_to_baseline(
+        rates, baseline, tolerance=parsed_args.tolerance)
+    for name in sorted(regressions):
+        print 'REGRESSION: %s runs at %0.1f%% of the baseline' % (
+            name, 100.0 * regressions[name])
+    return 1 if regressions else 0
+
+
+def _build_argparse():
+    parser = argparse.ArgumentParser(
+        description='Measure evaluator, dealer and simulation speed.')
+    parser.add_argument(
+        '--only', help='Only run benchmarks whose name contains this.',
+        type=str, default='')
+    parser.add_argument(
+        '--min_time', help='Seconds each timing round runs for.',
+        type=float, default=DEFAULT_MIN_TIME)
+    parser.add_argument(
+        '--rounds', help='Timing rounds per benchmark; the fastest counts.',
+        type=int, default=DEFAULT_ROUNDS)
+    parser.add_argument(
+        '--baseline', help='Compare against rates saved in this file.',
+        type=str, default='')
+    parser.add_argument(
+        '--tolerance',
+        help='Fractional slowdown from the baseline reported as a regression.',
+        type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument(
+        '--save_baseline', help='Save the measured rates to this file.',
+        type=str, default='')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    sys.exit(main(_build_argparse()))
@@ -0,0 +1,56 @@
+"""Tests for benchmarks.py"""
+# pylint: disable=missing-docstring
+import os
+import shutil
+import tempfile
+import unittest
+
+import benchmarks
+
+
+class BenchmarksTest(unittest.TestCase):
+
+    def test_every_benchmark_runs(self):
+        for benchmark in benchmarks.all_benchmarks():
+            work, operations_per_call = benchmark.setup()
+            work()
+            self.assertGreater(operations_per_call, 0)
+
+    def test_measure(self):
+        benchmark = benchmarks.Benchmark(
+            'noop', 'calls', lambda: (lambda: None, 10))
+        self.assertGreater(
+            benchmarks.measure(benchmark, min_time=0.01, rounds=2), 0)
+
+    def test_compare_to_baseline(self):
+        regressions = benchmarks.compare_to_baseline(
+            {'fast': 95.0, 'slow': 50.0, 'new': 1.0},
+            {'fast': 100.0, 'slow': 100.0, 'gone': 1.0}, tolerance=0.1)
+        self.assertEqual({'slow': 0.5}, regressions)
+
+
+class BaselineTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'baseline.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_round_trip(self):
+        benchmarks.save_baseline(self.path, {'simulate_2p': 1234.5})
+        self.assertEqual({'simulate_2p': 1234.5},
+                         benchmarks.load_baseline(self.path))
+
+    def test_invalid_baseline(self):
+        with open(self.path, 'w') as f:
+            f.write('[1, 2]')
+        with self.assertRaises(benchmarks.Error):
+            benchmarks.load_baseline(self.path)
+        with self.assertRaises(benchmarks.Error):
+            benchmarks.load_baseline(os.path.join(self.tmpdir, 'missing'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -44,6 +44,30 @@ SHORT_SUITS_TO_FULL_SUITS = {
 }
 
 
+NUM_CARDS = 52
+
+
+def card_id_for(suit_index, rank_index):
+    """Computes the compact integer id of a card.
+
+    Ids are in [0, 52), ordered by rank and then by suit, so that
+    card_id >> 2 is the rank offset from Two and card_id & 3 is the suit.
+
+    Args:
+        suit_index: int, value of SUITS.
+        rank_index: int, value of RANKS.
+
+    Returns:
+        int, the card id.
+    """
+    return ((rank_index - 2) << 2) | suit_index
+
+
+def get_card_by_id(card_id):
+    """Returns the interned Card with the given integer id."""
+    return CARDS_BY_ID[card_id]
+
+
 def create_card_from_short_name(short_name):
     """Creates a card object from the short name of a card.
 
@@ -53,54 +77,83 @@ def create_card_from_short_name(short_name):
         short_name: str, describes the card in a short form.
 
     Returns:
-        Card, new object with the specified suit and rank.
+        Card, the interned object with the specified suit and rank.
     """
     if len(short_name) != 2:
         raise ValueError('Invalid short name for card: %s' % short_name)
 
     short_name = short_name.lower()
+    result = _SHORT_NAME_TO_CARD.get(short_name)
+    if result is not None:
+        return result
+
     rank_char = short_name[0]
     suit_char = short_name[1]
-
     if rank_char not in SHORT_RANKS_TO_FULL_RANKS:
         raise ValueError('Invalid rank character: %s' % rank_char)
-    if suit_char not in SHORT_SUITS_TO_FULL_SUITS:
-        raise ValueError('Invalid suit character: %s' % suit_char)
-
-    return Card(SHORT_SUITS_TO_FULL_SUITS[suit_char],
-                SHORT_RANKS_TO_FULL_RANKS[rank_char])
+    raise ValueError('Invalid suit character: %s' % suit_char)
 
 
 class Card(object):
-    """Suit and rank representation for a card."""
-    def __init__(self, suit, rank):
+    """Suit and rank representation for a card.
+
+    There are only ever 52 Card instances: constructing a Card returns the
+    shared instance from the registry, so cards can be compared and hashed
+    through their integer id and dealing never allocates.
+    """
+    __slots__ = ('suit', 'rank', 'suit_index', 'rank_index', 'card_id',
+                 'mask', '_short_form')
+
+    def __new__(cls, suit, rank):
         if suit not in SUITS:
             raise ValueError('Invalid suit: %s' % suit)
         if rank not in RANKS:
             raise ValueError('Invalid rank: %s' % rank)
+        existing = _REGISTRY.get((suit, rank))
+        if existing is not None:
+            return existing
 
+        self = object.__new__(cls)
         self.suit = suit
         self.rank = rank
+        self.suit_index = SUITS[suit]
         self.rank_index = RANKS[rank]
+        self.card_id = card_id_for(self.suit_index, self.rank_index)
+        self.mask = 1 << self.card_id
+        self._short_form = (_FULL_RANKS_TO_SHORT_RANKS[rank].upper() +
+                            _FULL_SUITS_TO_SHORT_SUITS[suit])
+        _REGISTRY[(suit, rank)] = self
+        return self
 
-    # TODO: Needs testing and needs to be more efficient.
     def short_form(self):
         """Get the short form string for the card."""
-        result = ''
-        for short_name, full_name in SHORT_RANKS_TO_FULL_RANKS.iteritems():
-            if full_name == self.rank:
-                result += short_name.upper()
-        for short_name, full_name in SHORT_SUITS_TO_FULL_SUITS.iteritems():
-            if full_name == self.suit:
-                result += short_name
-        return result
+        return self._short_form
 
     def __repr__(self):
         return '%s of %s' % (self.rank, self.suit)
 
     def __eq__(self, other):
-        return self.suit == other.suit and self.rank == other.rank
+        return self.card_id == other.card_id
+
+    def __ne__(self, other):
+        return self.card_id != other.card_id
 
     def __hash__(self):
-        return self.__repr__().__hash__()
+        return self.card_id
+
+    def __reduce__(self):
+        return get_card_by_id, (self.card_id,)
+
+
+_FULL_RANKS_TO_SHORT_RANKS = dict(
+    (v, k) for k, v in SHORT_RANKS_TO_FULL_RANKS.iteritems())
+_FULL_SUITS_TO_SHORT_SUITS = dict(
+    (v, k) for k, v in SHORT_SUITS_TO_FULL_SUITS.iteritems())
+_REGISTRY = {}
+
+# All 52 interned cards, indexed by card id.
+CARDS_BY_ID = tuple(sorted(
+    (Card(s, r) for s in SUITS for r in RANKS), key=lambda c: c.card_id))
 
+_SHORT_NAME_TO_CARD = dict(
+    (c.short_form().lower(), c) for c in CARDS_BY_ID)
@@ -47,6 +47,26 @@ class CardTest(unittest.TestCase):
         c = card.create_card_from_short_name('9s')
         self.assertEqual('9s', c.short_form())
 
+    def test_cards_are_interned(self):
+        c = card.create_card_from_short_name('Kd')
+        self.assertIs(c, card.Card('Diamonds', 'King'))
+        self.assertIs(c, card.get_card_by_id(c.card_id))
+
+    def test_card_ids_unique_and_compact(self):
+        ids = [c.card_id for c in card.CARDS_BY_ID]
+        self.assertEqual(range(card.NUM_CARDS), ids)
+
+    def test_card_id_layout(self):
+        c = card.create_card_from_short_name('Th')
+        self.assertEqual(10 - 2, c.card_id >> 2)
+        self.assertEqual(card.SUITS['Hearts'], c.card_id & 3)
+        self.assertEqual(1 << c.card_id, c.mask)
+
+    def test_hash_and_equality_use_card_id(self):
+        c = card.create_card_from_short_name('2c')
+        self.assertEqual(c.card_id, hash(c))
+        self.assertNotEqual(c, card.create_card_from_short_name('2d'))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,109 @@
+"""Index of all 1326 two-card starting hand combos.
+
+Each combo has an integer id in [0, NUM_COMBOS) and a 52-bit mask of its two
+cards, so ranges can be stored as tuples of combo ids or as integer bitsets
+over combo ids, and all card conflict checks are mask operations.
+"""
+import card
+
+NUM_COMBOS = card.NUM_CARDS * (card.NUM_CARDS - 1) // 2
+
+
+class Error(Exception):
+    pass
+
+
+def combo_id_for(card_id1, card_id2):
+    """The combo id of two distinct cards, in either order.
+
+    Args:
+        card_id1: int, a card id.
+        card_id2: int, another card id.
+
+    Returns:
+        int, the combo id.
+
+    Raises:
+        Error if the two cards are the same.
+    """
+    if card_id1 == card_id2:
+        raise Error('Card id %d cannot be paired with itself' % card_id1)
+    if card_id1 < card_id2:
+        card_id1, card_id2 = card_id2, card_id1
+    return card_id1 * (card_id1 - 1) // 2 + card_id2
+
+
+def _build_index():
+    card_ids = [None] * NUM_COMBOS
+    for high in xrange(card.NUM_CARDS):
+        for low in xrange(high):
+            card_ids[combo_id_for(high, low)] = (high, low)
+    return tuple(card_ids)
+
+
+# Combo id to the (higher, lower) card ids of the combo.
+COMBO_CARD_IDS = _build_index()
+# Combo id to the mask of its two cards.
+COMBO_MASKS = tuple((1 << high) | (1 << low) for high, low in COMBO_CARD_IDS)
+
+
+def _rank_card_ids(rank_index):
+    return [card.card_id_for(suit_index, rank_index)
+            for suit_index in sorted(card.SUITS.itervalues())]
+
+
+def pair_combo_ids(rank_index):
+    """The 6 combos of a pocket pair, by rank index (2-14)."""
+    card_ids = _rank_card_ids(rank_index)
+    return tuple(combo_id_for(card_ids[i], card_ids[j])
+                 for i in xrange(4) for j in xrange(i + 1, 4))
+
+
+def suited_combo_ids(rank_index1, rank_index2):
+    """The 4 suited combos of two distinct ranks."""
+    return tuple(combo_id_for(id1, id2) for id1, id2 in zip(
+        _rank_card_ids(rank_index1), _rank_card_ids(rank_index2)))
+
+
+def offsuit_combo_ids(rank_index1, rank_index2):
+    """The 12 offsuit combos of two distinct ranks."""
+    return tuple(combo_id_for(id1, id2)
+                 for id1 in _rank_card_ids(rank_index1)
+                 for id2 in _rank_card_ids(rank_index2)
+                 if id1 & 3 != id2 & 3)
+
+
+def filter_combo_ids(combo_ids, excluded_mask):
+    """The combo ids that use none of the cards in excluded_mask."""
+    if not excluded_mask:
+        return tuple(combo_ids)
+    return tuple(combo_id for combo_id in combo_ids
+                 if not COMBO_MASKS[combo_id] & excluded_mask)
+
+
+def to_bitset(combo_ids):
+    """Packs combo ids into an integer bitset."""
+    bitset = 0
+    for combo_id in combo_ids:
+        bitset |= 1 << combo_id
+    return bitset
+
+
+def from_bitset(bitset):
+    """Unpacks an integer bitset into a sorted tuple of combo ids."""
+    combo_ids = []
+    combo_id = 0
+    while bitset:
+        if bitset & 1:
+            combo_ids.append(combo_id)
+        bitset >>= 1
+        combo_id += 1
+    return tuple(combo_ids)
+
+
+def cards_mask(combo_ids):
+    """Mask of every card used by any of the combos."""
+    mask = 0
+    for combo_id in combo_ids:
+        mask |= COMBO_MASKS[combo_id]
+    return mask
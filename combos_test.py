@@ -0,0 +1,56 @@
+"""Tests for combos.py"""
+import unittest
+
+import card
+import combos
+
+
+class CombosTest(unittest.TestCase):
+    def test_index_covers_every_combo(self):
+        self.assertEqual(1326, combos.NUM_COMBOS)
+        self.assertEqual(1326, len(set(combos.COMBO_MASKS)))
+        for combo_id, (high, low) in enumerate(combos.COMBO_CARD_IDS):
+            self.assertGreater(high, low)
+            self.assertEqual(combo_id, combos.combo_id_for(high, low))
+            self.assertEqual(combo_id, combos.combo_id_for(low, high))
+            self.assertEqual((1 << high) | (1 << low),
+                             combos.COMBO_MASKS[combo_id])
+
+    def test_range_class_sizes(self):
+        ace = card.RANKS['Ace']
+        king = card.RANKS['King']
+        self.assertEqual(6, len(set(combos.pair_combo_ids(ace))))
+        self.assertEqual(4, len(set(combos.suited_combo_ids(ace, king))))
+        self.assertEqual(12, len(set(combos.offsuit_combo_ids(ace, king))))
+
+    def test_suited_combos_share_a_suit(self):
+        for combo_id in combos.suited_combo_ids(7, 2):
+            high, low = combos.COMBO_CARD_IDS[combo_id]
+            self.assertEqual(high & 3, low & 3)
+
+    def test_filter_combo_ids(self):
+        ace_of_spades = card.create_card_from_short_name('as')
+        aces = combos.pair_combo_ids(card.RANKS['Ace'])
+
+        remaining = combos.filter_combo_ids(aces, ace_of_spades.mask)
+
+        self.assertEqual(3, len(remaining))
+        for combo_id in remaining:
+            self.assertFalse(combos.COMBO_MASKS[combo_id] & ace_of_spades.mask)
+
+    def test_bitset_round_trip(self):
+        combo_ids = (0, 5, 700, 1325)
+        bitset = combos.to_bitset(combo_ids)
+        self.assertEqual(combo_ids, combos.from_bitset(bitset))
+
+    def test_cards_mask(self):
+        kings = combos.pair_combo_ids(card.RANKS['King'])
+        mask = combos.cards_mask(kings)
+        self.assertEqual(4, bin(mask).count('1'))
+
+    def test_same_card_twice(self):
+        self.assertRaises(combos.Error, combos.combo_id_for, 51, 51)
+
+
+if __name__ == '__main__':
+    unittest.main()
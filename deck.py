@@ -2,29 +2,34 @@
 import card
 import random
 
-def reverse_enumerator(input_list):
-    """Enumerate a sequence in reverse."""
-    for index in reversed(xrange(len(input_list))):
-        yield index, input_list[index]
-
 
 def generate_deck():
     """Generates a standard 52 card deck.
 
+    The cards are the interned instances from the card registry, so this only
+    allocates the list itself.
+
     Returns:
         List of cards, one of each suit/rank.
     """
-    return [card.Card(s, r) for s in card.SUITS for r in card.RANKS]
+    return list(card.CARDS_BY_ID)
 
 
 class Deck(object):
-    def __init__(self):
+    def __init__(self, rng=None):
+        """Initializer.
+
+        Args:
+            rng: random.Random or None, source of randomness for shuffling.
+                Defaults to the module level generator.
+        """
         self.cards = generate_deck()
+        self.rng = rng or random
 
     def reset_and_shuffle(self):
         """Generates a new deck of cards and randomly shuffles it."""
         self.cards = generate_deck()
-        random.shuffle(self.cards)
+        self.rng.shuffle(self.cards)
 
     def remove_cards_from_deck(self, cards):
         """Removes the specified cards from the deck.
@@ -32,11 +37,81 @@ class Deck(object):
         Args:
             iterable of Card.
         """
-        for idx, item in reverse_enumerator(self.cards):
-            if item in cards:
-                self.cards.pop(idx)
+        removed_ids = set(c.card_id for c in cards)
+        self.cards = [c for c in self.cards if c.card_id not in removed_ids]
 
     def pop(self):
         """Remove a card from the deck and return it."""
-        return self.cards.pop(0)
+        return self.cards.pop()
+
+
+class Dealer(object):
+    """Deals random cards from a fixed set of live cards without rebuilding it.
+
+    The live cards are kept in one array for the whole scenario.  Cards taken
+    out for a single hand, such as hole cards drawn from a range, are swapped
+    to just past the end of the live region, so putting them back only resets
+    a count.  Dealing is a partial Fisher-Yates shuffle that moves each drawn
+    card to the end of the live region, so only the cards needed are touched.
+    """
+    def __init__(self, excluded_cards=(), rng=None):
+        """Initializer.
+
+        Args:
+            excluded_cards: iterable of Card, cards that are never dealt, such
+                as the board and dead cards.
+            rng: random.Random or None, source of randomness.  Defaults to the
+                module level generator.
+        """
+        excluded_ids = set(c.card_id for c in excluded_cards)
+        self._cards = [c for c in generate_deck()
+                       if c.card_id not in excluded_ids]
+        self._positions = {}
+        for index, c in enumerate(self._cards):
+            self._positions[c.card_id] = index
+        self._num_live = len(self._cards)
+        self.rng = rng or random
 
+    @property
+    def cards(self):
+        """list of Card, the cards that can currently be dealt."""
+        return self._cards[:self._num_live]
+
+    def _swap(self, lhs, rhs):
+        cards = self._cards
+        cards[lhs], cards[rhs] = cards[rhs], cards[lhs]
+        self._positions[cards[lhs].card_id] = lhs
+        self._positions[cards[rhs].card_id] = rhs
+
+    def remove(self, cards):
+        """Takes cards out of play until the next restore.
+
+        Args:
+            cards: iterable of Card, cards to take out.  Cards that are
+                already out, or were excluded from the start, are ignored.
+        """
+        for c in cards:
+            position = self._positions.get(c.card_id)
+            if position is not None and position < self._num_live:
+                self._num_live -= 1
+                self._swap(position, self._num_live)
+
+    def restore(self):
+        """Puts every card taken out by remove back into play."""
+        self._num_live = len(self._cards)
+
+    def deal(self, num_cards):
+        """Deals random cards without taking them out of play.
+
+        Args:
+            num_cards: int, how many distinct cards to deal.
+
+        Returns:
+            list of Card, uniformly random among the live cards.
+        """
+        random_float = self.rng.random
+        end = self._num_live
+        for _ in xrange(num_cards):
+            self._swap(int(random_float() * end), end - 1)
+            end -= 1
+        return self._cards[end:self._num_live]
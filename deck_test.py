@@ -51,6 +51,57 @@ class DeckTest(unittest.TestCase):
                     1.0/52, float(count)/shuffle_iterations, 1)
 
 
+class DealerTest(unittest.TestCase):
+    def test_excluded_cards(self):
+        excluded = [card.create_card_from_short_name('ah'),
+                    card.create_card_from_short_name('5d')]
+        dealer = deck.Dealer(excluded_cards=excluded)
+
+        self.assertEqual(50, len(dealer.cards))
+        for c in excluded:
+            self.assertNotIn(c, dealer.cards)
+
+    def test_remove_and_restore(self):
+        dealer = deck.Dealer()
+        removed = [card.create_card_from_short_name('ks'),
+                   card.create_card_from_short_name('2c')]
+        dealer.remove(removed)
+        dealer.remove(removed[:1])
+
+        self.assertEqual(50, len(dealer.cards))
+        for _ in xrange(20):
+            dealt = dealer.deal(5)
+            self.assertEqual(5, len(set(dealt)))
+            for c in removed:
+                self.assertNotIn(c, dealt)
+
+        dealer.restore()
+        self.assertItemsEqual(deck.generate_deck(), dealer.cards)
+
+    def test_remove_excluded_cards(self):
+        excluded = card.create_card_from_short_name('as')
+        dealer = deck.Dealer(excluded_cards=[excluded])
+        dealer.remove([excluded, card.create_card_from_short_name('ad')])
+
+        self.assertEqual(50, len(dealer.cards))
+        dealer.restore()
+        self.assertEqual(51, len(dealer.cards))
+
+    def test_deal_randomness(self):
+        deal_iterations = 5200
+        counts = collections.defaultdict(int)
+
+        dealer = deck.Dealer()
+        for _ in xrange(deal_iterations):
+            for c in dealer.deal(2):
+                counts[c] += 1
+
+        self.assertEqual(52, len(counts))
+        for count in counts.itervalues():
+            self.assertAlmostEqual(
+                2.0/52, float(count)/deal_iterations, 1)
+
+
 if __name__ == '__main__':
     unittest.main()
 
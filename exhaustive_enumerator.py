@@ -0,0 +1,158 @@
+"""Exact enumeration of every range combination and board runout.
+
+Instead of sampling, every card-disjoint assignment of range hands to players
+is paired with every possible completion of the board.  Suit symmetry is used
+to skip work: assignments and runouts that are the same up to a suit
+permutation are only visited once, carrying a weight equal to the number of
+outcomes they stand for.
+"""
+import collections
+import itertools
+
+import card
+import suit_isomorphism
+
+DEFAULT_CHUNK_SIZE = 20000
+
+
+def _nchoosek(n, k):
+    if k < 0 or k > n:
+        return 0
+    result = 1
+    for i in xrange(k):
+        result = result * (n - i) // (i + 1)
+    return result
+
+
+def count_runouts(num_live_cards, num_board_cards):
+    """Number of ways to complete a board with num_board_cards cards on it."""
+    return _nchoosek(num_live_cards, 5 - num_board_cards)
+
+
+def iter_assignments(holdem_ranges, excluded_mask=0):
+    """Yields each card-disjoint choice of one hand per range.
+
+    Args:
+        holdem_ranges: list of HoldemHandRange.
+        excluded_mask: int, mask of cards no hand may use.
+
+    Yields:
+        tuple of HoldemHand, one per range.
+    """
+    candidates = [[h for h in her.possible_hands if not h.mask & excluded_mask]
+                  for her in holdem_ranges]
+    for hands in itertools.product(*candidates):
+        used_mask = 0
+        for h in hands:
+            if used_mask & h.mask:
+                break
+            used_mask |= h.mask
+        else:
+            yield hands
+
+
+def iter_weighted_assignments(holdem_ranges, board_ids, dead_ids):
+    """Yields assignments of hands to players, merged by suit symmetry.
+
+    Args:
+        holdem_ranges: list of HoldemHandRange.
+        board_ids: list of int, card ids already on the board.
+        dead_ids: list of int, card ids that are out of play.
+
+    Yields:
+        (tuple of HoldemHand, int) pairs: a representative assignment and the
+            number of assignments it stands for.
+    """
+    excluded_mask = 0
+    for card_id in list(board_ids) + list(dead_ids):
+        excluded_mask |= 1 << card_id
+    symmetries = [
+        suit_isomorphism.permuted_card_ids(perm)
+        for perm in suit_isomorphism.stabilizer([board_ids, dead_ids])]
+
+    representatives = collections.OrderedDict()
+    for hands in iter_assignments(holdem_ranges, excluded_mask=excluded_mask):
+        key = min(tuple(tuple(sorted(images[c] for c in h.card_ids))
+                        for h in hands)
+                  for images in symmetries)
+        if key in representatives:
+            representatives[key][1] += 1
+        else:
+            representatives[key] = [hands, 1]
+    for hands, weight in representatives.itervalues():
+        yield hands, weight
+
+
+def _orbit_size_if_representative(runout, symmetries):
+    """Returns the orbit size of the runout, or 0 if it is not the smallest.
+
+    Args:
+        runout: tuple of int card ids.
+        symmetries: list of lists mapping each card id to the bit of its image
+            under one non-identity symmetry.
+
+    Returns:
+        int, the number of distinct images of the runout if its mask is the
+            smallest of them, otherwise 0.
+    """
+    mask = 0
+    for c in runout:
+        mask |= 1 << c
+    images = set([mask])
+    for image_bits in symmetries:
+        image = 0
+        for c in runout:
+            image |= image_bits[c]
+        if image < mask:
+            return 0
+        images.add(image)
+    return len(images)
+
+
+def iter_weighted_runouts(hole_ids, board_ids, dead_ids,
+                          chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yields every distinct completion of the board, chunk_size at a time.
+
+    Runouts that are suit permutations of each other, under permutations that
+    leave every player's hand, the board and the dead cards unchanged, produce
+    identical results, so only the runout with the smallest card mask in each
+    orbit is yielded, weighted by the orbit size.
+
+    Args:
+        hole_ids: list of tuples of int, each player's hole card ids.
+        board_ids: list of int, card ids already on the board.
+        dead_ids: list of int, card ids that are out of play.
+        chunk_size: int, maximum number of runouts per chunk.
+
+    Yields:
+        (list of tuple of int, list of int) pairs: runouts of card ids to add
+            to the board, and the weight of each.
+    """
+    known = set(board_ids) | set(dead_ids)
+    for ids in hole_ids:
+        known.update(ids)
+    live_ids = [i for i in xrange(card.NUM_CARDS) if i not in known]
+    # Runouts are compared through their card masks, which is much cheaper
+    # than sorting the permuted cards.
+    symmetries = [
+        [1 << image for image in suit_isomorphism.permuted_card_ids(perm)]
+        for perm in suit_isomorphism.stabilizer(
+            list(hole_ids) + [board_ids, dead_ids])
+        if perm != suit_isomorphism.IDENTITY]
+
+    runouts = []
+    weights = []
+    for runout in itertools.combinations(live_ids, 5 - len(board_ids)):
+        weight = 1
+        if symmetries:
+            weight = _orbit_size_if_representative(runout, symmetries)
+            if not weight:
+                continue
+        runouts.append(runout)
+        weights.append(weight)
+        if len(runouts) >= chunk_size:
+            yield runouts, weights
+            runouts = []
+            weights = []
+    if runouts:
+        yield runouts, weights
@@ -0,0 +1,81 @@
+"""Tests for exhaustive_enumerator.py"""
+# pylint: disable=missing-docstring
+import unittest
+
+import exhaustive_enumerator
+import poker_hand
+
+
+def _ids(card_input):
+    return [c.card_id for c in poker_hand.parse_string_into_cards(card_input)]
+
+
+class WeightedRunoutsTest(unittest.TestCase):
+
+    def _total_weight(self, hole_ids, board_ids, dead_ids):
+        total = 0
+        for _, weights in exhaustive_enumerator.iter_weighted_runouts(
+                hole_ids, board_ids, dead_ids, chunk_size=100):
+            total += sum(weights)
+        return total
+
+    def test_turn_has_44_runouts(self):
+        hole_ids = [tuple(_ids('asks')), tuple(_ids('qdqh'))]
+        board_ids = _ids('2c7c9dth')
+        runouts = []
+        for chunk, weights in exhaustive_enumerator.iter_weighted_runouts(
+                hole_ids, board_ids, []):
+            runouts.extend(chunk)
+            self.assertEqual([1] * len(chunk), weights)
+        self.assertEqual(44, len(runouts))
+
+    def test_weights_cover_every_runout(self):
+        hole_ids = [tuple(_ids('asah')), tuple(_ids('kskh'))]
+        board_ids = _ids('2c2d')
+        self.assertEqual(
+            exhaustive_enumerator.count_runouts(46, 2),
+            self._total_weight(hole_ids, board_ids, []))
+
+    def test_weights_cover_every_flop_runout_with_dead_cards(self):
+        hole_ids = [tuple(_ids('7s7h'))]
+        board_ids = _ids('2c3d')
+        dead_ids = _ids('kd')
+        self.assertEqual(
+            exhaustive_enumerator.count_runouts(47, 2),
+            self._total_weight(hole_ids, board_ids, dead_ids))
+
+    def test_symmetric_runouts_are_merged(self):
+        hole_ids = [tuple(_ids('asah')), tuple(_ids('kskh'))]
+        num_runouts = 0
+        for chunk, _ in exhaustive_enumerator.iter_weighted_runouts(
+                hole_ids, _ids('2c3d4s'), []):
+            num_runouts += len(chunk)
+        # Nothing is symmetric once the board breaks every suit tie.
+        self.assertEqual(exhaustive_enumerator.count_runouts(45, 3),
+                         num_runouts)
+
+        num_runouts = 0
+        for chunk, _ in exhaustive_enumerator.iter_weighted_runouts(
+                hole_ids, _ids('2c2d'), []):
+            num_runouts += len(chunk)
+        self.assertLess(num_runouts, exhaustive_enumerator.count_runouts(46, 2))
+
+
+class WeightedAssignmentsTest(unittest.TestCase):
+
+    def test_assignments_skip_conflicts(self):
+        ranges = poker_hand.parse_hands_into_holdem_hands('aa,aks')
+        assignments = list(exhaustive_enumerator.iter_assignments(ranges))
+        # 6 * 4 combinations, minus the 3 pairs sharing an ace with each AKs.
+        self.assertEqual(6 * 4 - 3 * 4, len(assignments))
+
+    def test_weighted_assignments_total(self):
+        ranges = poker_hand.parse_hands_into_holdem_hands('aa,kk')
+        weighted = list(exhaustive_enumerator.iter_weighted_assignments(
+            ranges, [], []))
+        self.assertEqual(36, sum(weight for _, weight in weighted))
+        self.assertLess(len(weighted), 36)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,333 @@
+"""Table driven evaluation of poker hands into integer strengths.
+
+Every hand is scored as a single int where a bigger strength always means a
+better hand.  The hand category lives in the high bits (see category_of) and
+the ranks that break ties within a category are packed below it, highest
+priority first.
+
+Cards are given as card ids (see card.card_id_for).  Non-flush hands are looked
+up by the product of one prime per rank, which uniquely identifies the rank
+multiset regardless of card order; flushes are looked up by the 13-bit mask of
+ranks present.
+"""
+import itertools
+
+import card
+
+HIGH_CARD = 0
+ONE_PAIR = 1
+TWO_PAIR = 2
+THREE_OF_A_KIND = 3
+STRAIGHT = 4
+FLUSH = 5
+FULL_HOUSE = 6
+FOUR_OF_A_KIND = 7
+STRAIGHT_FLUSH = 8
+
+CATEGORY_SHIFT = 20
+
+RANK_PRIMES = {
+    2: 2, 3: 3, 4: 5, 5: 7, 6: 11, 7: 13, 8: 17, 9: 19, 10: 23, 11: 29,
+    12: 31, 13: 37, 14: 41,
+}
+
+_ACE_TO_FIVE_MASK = (1 << 12) | 0xf
+
+
+def category_of(strength):
+    """Returns the hand category (e.g. FLUSH) encoded in a strength."""
+    return strength >> CATEGORY_SHIFT
+
+
+def _make_strength(category, ranks):
+    """Packs a category and its tie breaking ranks into a strength."""
+    strength = category
+    for index in xrange(5):
+        strength <<= 4
+        if index < len(ranks):
+            strength |= ranks[index]
+    return strength
+
+
+def _rank_of_bit(bit_index):
+    return bit_index + 2
+
+
+def _straight_high_for_mask(rank_mask):
+    """Returns the high rank of the best straight in the mask, or 0."""
+    for high in xrange(14, 5, -1):
+        window = 0x1f << (high - 6)
+        if rank_mask & window == window:
+            return high
+    if rank_mask & _ACE_TO_FIVE_MASK == _ACE_TO_FIVE_MASK:
+        return 5
+    return 0
+
+
+def _ranks_in_mask(rank_mask):
+    """Returns the ranks present in the mask, highest first."""
+    return [_rank_of_bit(b) for b in xrange(12, -1, -1) if rank_mask >> b & 1]
+
+
+def _flush_strength(rank_mask):
+    """Strength of the best flush that can be made from the suited ranks."""
+    straight_high = _straight_high_for_mask(rank_mask)
+    if straight_high:
+        return _make_strength(STRAIGHT_FLUSH, [straight_high])
+    return _make_strength(FLUSH, _ranks_in_mask(rank_mask)[:5])
+
+
+def _non_flush_strength(ranks):
+    """Strength of the best hand made from ranks, ignoring flushes.
+
+    Args:
+        ranks: sequence of int, between five and seven card ranks.
+
+    Returns:
+        int, the strength.
+    """
+    counts = {}
+    rank_mask = 0
+    for r in ranks:
+        counts[r] = counts.get(r, 0) + 1
+        rank_mask |= 1 << (r - 2)
+    # Highest count first, then highest rank.
+    groups = sorted(((ct, r) for r, ct in counts.iteritems()), reverse=True)
+    top_count, top_rank = groups[0]
+    by_rank = sorted(counts, reverse=True)
+
+    def kickers(excluded, num):
+        return [r for r in by_rank if r not in excluded][:num]
+
+    if top_count == 4:
+        return _make_strength(
+            FOUR_OF_A_KIND, [top_rank] + kickers((top_rank,), 1))
+    if top_count == 3 and groups[1][0] >= 2:
+        return _make_strength(FULL_HOUSE, [top_rank, groups[1][1]])
+    straight_high = _straight_high_for_mask(rank_mask)
+    if straight_high:
+        return _make_strength(STRAIGHT, [straight_high])
+    if top_count == 3:
+        return _make_strength(
+            THREE_OF_A_KIND, [top_rank] + kickers((top_rank,), 2))
+    if top_count == 2 and groups[1][0] == 2:
+        pairs = (top_rank, groups[1][1])
+        return _make_strength(TWO_PAIR, list(pairs) + kickers(pairs, 1))
+    if top_count == 2:
+        return _make_strength(ONE_PAIR, [top_rank] + kickers((top_rank,), 3))
+    return _make_strength(HIGH_CARD, by_rank[:5])
+
+
+def _rank_product(ranks):
+    product = 1
+    for r in ranks:
+        product *= RANK_PRIMES[r]
+    return product
+
+
+def _build_non_flush_table(num_cards):
+    """Maps rank products of num_cards cards to non-flush strengths."""
+    table = {}
+    for ranks in itertools.combinations_with_replacement(
+            xrange(2, 15), num_cards):
+        if any(ranks.count(r) > 4 for r in set(ranks)):
+            continue
+        table[_rank_product(ranks)] = _non_flush_strength(ranks)
+    return table
+
+
+def _build_five_card_flush_table():
+    """Maps the rank mask of each five-card flush to its strength."""
+    table = {}
+    for bits in itertools.combinations(xrange(13), 5):
+        rank_mask = 0
+        for b in bits:
+            rank_mask |= 1 << b
+        table[rank_mask] = _flush_strength(rank_mask)
+    return table
+
+
+class _NonFlushTable(dict):
+    """Rank product table that adds six and seven card hands on first use.
+
+    The five card entries are cheap enough to build at import time, while the
+    larger tables are only needed once a seven card evaluation happens.
+    """
+    def __init__(self):
+        super(_NonFlushTable, self).__init__(_build_non_flush_table(5))
+        self.complete = False
+
+    def __missing__(self, product):
+        if self.complete:
+            raise KeyError(product)
+        self.complete = True
+        for num_cards in (6, 7):
+            self.update(_build_non_flush_table(num_cards))
+        return self[product]
+
+
+# Per card id lookups.
+CARD_PRIMES = tuple(RANK_PRIMES[(i >> 2) + 2] for i in xrange(card.NUM_CARDS))
+CARD_RANK_BITS = tuple(1 << (i >> 2) for i in xrange(card.NUM_CARDS))
+
+_NON_FLUSH_PRODUCTS = _NonFlushTable()
+_FIVE_CARD_FLUSHES = _build_five_card_flush_table()
+
+# Best flush strength for every 13-bit suited rank mask; 0 if there are fewer
+# than five ranks in the mask.
+_FLUSH_STRENGTHS = tuple(
+    _flush_strength(m) if bin(m).count('1') >= 5 else 0
+    for m in xrange(1 << 13))
+
+
+def flush_strength_table():
+    """Returns the best flush strength for each 13-bit rank mask.
+
+    Masks with fewer than five ranks map to 0.
+    """
+    return _FLUSH_STRENGTHS
+
+
+def non_flush_product_table():
+    """Returns the complete rank product to strength table for 5-7 cards."""
+    if not _NON_FLUSH_PRODUCTS.complete:
+        # Any seven card product triggers the lazy build.
+        _NON_FLUSH_PRODUCTS[RANK_PRIMES[2] ** 4 * RANK_PRIMES[3] ** 3]
+    return _NON_FLUSH_PRODUCTS
+
+
+def evaluate_five(card_ids):
+    """Scores exactly five cards.
+
+    Args:
+        card_ids: sequence of five int card ids.
+
+    Returns:
+        int, the strength of the hand.
+    """
+    c0, c1, c2, c3, c4 = card_ids
+    suit = c0 & 3
+    if c1 & 3 == suit and c2 & 3 == suit and c3 & 3 == suit and c4 & 3 == suit:
+        return _FIVE_CARD_FLUSHES[
+            CARD_RANK_BITS[c0] | CARD_RANK_BITS[c1] | CARD_RANK_BITS[c2] |
+            CARD_RANK_BITS[c3] | CARD_RANK_BITS[c4]]
+    return _NON_FLUSH_PRODUCTS[
+        CARD_PRIMES[c0] * CARD_PRIMES[c1] * CARD_PRIMES[c2] *
+        CARD_PRIMES[c3] * CARD_PRIMES[c4]]
+
+
+def evaluate_cards(card_ids):
+    """Scores the best five card hand out of five to seven cards in one pass.
+
+    No five card subsets are enumerated: at most one suit can hold five or more
+    of seven cards, and when it does the flush beats anything the other ranks
+    can make, so the result is either that suit's flush strength or the rank
+    product lookup.
+
+    Args:
+        card_ids: sequence of between five and seven int card ids.
+
+    Returns:
+        int, the strength of the best hand.
+    """
+    product = 1
+    suit_masks = [0, 0, 0, 0]
+    for c in card_ids:
+        product *= CARD_PRIMES[c]
+        suit_masks[c & 3] |= CARD_RANK_BITS[c]
+    for suit_mask in suit_masks:
+        flush_strength = _FLUSH_STRENGTHS[suit_mask]
+        if flush_strength:
+            return flush_strength
+    return _NON_FLUSH_PRODUCTS[product]
+
+
+class BoardAnalysis(object):
+    """A board folded once, so that each player's hole cards finish it.
+
+    Multiway showdowns share the board, so its rank product and its only
+    possible flush suit are worked out once and every player's two hole cards
+    are folded into them, instead of scoring all seven cards per player.  A
+    flush needs at least three of the board's cards in one suit when players
+    hold two cards, and at most one suit of a five card board can have that.
+
+    Boards can be extended a street at a time, folding in only the new cards.
+
+    Attributes:
+        card_ids: tuple of int, the board's card ids.
+        product: int, the product of the board's rank primes.
+        suit_masks: tuple of int, the rank mask of the board's cards of each
+            suit.
+        flush_suit: int or None, the suit with three or more board cards.
+        flush_mask: int, the rank mask of the board's cards of flush_suit.
+    """
+    __slots__ = ('card_ids', 'product', 'suit_masks', 'flush_suit',
+                 'flush_mask')
+
+    def __init__(self, board_ids):
+        """Initializer.
+
+        Args:
+            board_ids: sequence of between three and five int card ids.
+        """
+        self._fold((), 1, (0, 0, 0, 0), board_ids)
+
+    def _fold(self, card_ids, product, suit_masks, new_ids):
+        """Sets the analysis to a board of card_ids plus new_ids.
+
+        Args:
+            card_ids: tuple of int, cards already folded in.
+            product: int, their rank prime product.
+            suit_masks: sequence of four int, their rank masks by suit.
+            new_ids: sequence of int, the cards to add.
+        """
+        suit_masks = list(suit_masks)
+        for c in new_ids:
+            product *= CARD_PRIMES[c]
+            suit_masks[c & 3] |= CARD_RANK_BITS[c]
+        self.card_ids = card_ids + tuple(new_ids)
+        self.product = product
+        self.suit_masks = tuple(suit_masks)
+        self.flush_suit = None
+        self.flush_mask = 0
+        for suit, suit_mask in enumerate(suit_masks):
+            if bin(suit_mask).count('1') >= 3:
+                self.flush_suit = suit
+                self.flush_mask = suit_mask
+
+    def extended(self, card_ids):
+        """The analysis of this board with more cards, e.g. the turn.
+
+        Args:
+            card_ids: sequence of int, the cards to add.
+
+        Returns:
+            BoardAnalysis.
+        """
+        board = BoardAnalysis.__new__(BoardAnalysis)
+        board._fold(  # pylint: disable=protected-access
+            self.card_ids, self.product, self.suit_masks, card_ids)
+        return board
+
+    def evaluate(self, hole_ids):
+        """Scores the best hand of two hole cards with the board.
+
+        Args:
+            hole_ids: sequence of two int card ids.
+
+        Returns:
+            int, the same strength as evaluate_cards of all the cards.
+        """
+        c0, c1 = hole_ids
+        suit = self.flush_suit
+        if suit is not None:
+            suit_mask = self.flush_mask
+            if c0 & 3 == suit:
+                suit_mask |= CARD_RANK_BITS[c0]
+            if c1 & 3 == suit:
+                suit_mask |= CARD_RANK_BITS[c1]
+            flush_strength = _FLUSH_STRENGTHS[suit_mask]
+            if flush_strength:
+                return flush_strength
+        return _NON_FLUSH_PRODUCTS[
+            self.product * CARD_PRIMES[c0] * CARD_PRIMES[c1]]
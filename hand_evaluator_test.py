@@ -0,0 +1,152 @@
+"""Tests for hand_evaluator.py"""
+# pylint: disable=missing-docstring
+import itertools
+import random
+import unittest
+
+import card
+import hand_evaluator
+
+
+def _ids(short_names):
+    return [card.create_card_from_short_name(sn).card_id for sn in short_names]
+
+
+class EvaluateFiveTest(unittest.TestCase):
+
+    def _evaluate(self, short_names):
+        return hand_evaluator.evaluate_five(_ids(short_names))
+
+    def test_categories(self):
+        expected = [
+            (['2h', '5d', '6s', '7s', '9s'], hand_evaluator.HIGH_CARD),
+            (['2h', '2d', '6s', '7s', '9s'], hand_evaluator.ONE_PAIR),
+            (['2h', '2d', '6s', '6c', '9s'], hand_evaluator.TWO_PAIR),
+            (['2h', '2d', '2s', '6c', '9s'], hand_evaluator.THREE_OF_A_KIND),
+            (['2h', '3s', '4d', '5h', 'ac'], hand_evaluator.STRAIGHT),
+            (['2h', '3h', '4h', '5h', 'qh'], hand_evaluator.FLUSH),
+            (['2h', '2d', '2s', '6c', '6s'], hand_evaluator.FULL_HOUSE),
+            (['2h', '2d', '2s', '2c', '6s'], hand_evaluator.FOUR_OF_A_KIND),
+            (['2h', '3h', '4h', '5h', 'ah'], hand_evaluator.STRAIGHT_FLUSH),
+        ]
+        for short_names, category in expected:
+            self.assertEqual(
+                category,
+                hand_evaluator.category_of(self._evaluate(short_names)))
+
+    def test_order_independent(self):
+        short_names = ['as', '2d', 'qs', 'ks', 'td']
+        strengths = set(self._evaluate(p)
+                        for p in itertools.permutations(short_names))
+        self.assertEqual(1, len(strengths))
+
+    def test_ace_to_five_straight_is_lowest(self):
+        wheel = self._evaluate(['as', '2d', '3c', '4h', '5d'])
+        six_high = self._evaluate(['6s', '2d', '3c', '4h', '5d'])
+        self.assertLess(wheel, six_high)
+
+    def test_kickers_break_ties(self):
+        self.assertGreater(self._evaluate(['ah', 'ad', 'ks', '7c', '3d']),
+                           self._evaluate(['as', 'ac', 'qs', 'jc', 'td']))
+
+    def test_full_house_trips_before_pair(self):
+        self.assertGreater(self._evaluate(['3h', '3d', '3s', '2d', '2c']),
+                           self._evaluate(['2h', '2d', '2s', 'ad', 'ac']))
+
+    def test_distinct_strength_count(self):
+        strengths = set()
+        for ranks in itertools.combinations_with_replacement(xrange(13), 5):
+            if any(ranks.count(r) > 4 for r in ranks):
+                continue
+            ids = [(r << 2) | (i % 4) for i, r in enumerate(ranks)]
+            if len(set(ranks)) == 5:
+                ids[0] = (ranks[0] << 2) | 3
+                strengths.add(hand_evaluator.evaluate_five(
+                    [(r << 2) for r in ranks]))
+            strengths.add(hand_evaluator.evaluate_five(ids))
+        self.assertEqual(7462, len(strengths))
+
+
+class EvaluateCardsTest(unittest.TestCase):
+
+    def _assert_matches_best_subset(self, short_names):
+        ids = _ids(short_names)
+        expected = max(hand_evaluator.evaluate_five(five)
+                       for five in itertools.combinations(ids, 5))
+        self.assertEqual(expected, hand_evaluator.evaluate_cards(ids))
+
+    def test_matches_best_five_card_subset(self):
+        fixtures = [
+            ['2h', '2c', '2s', '9s', 'qh', '4d', '2d'],
+            ['ah', 'kh', '2h', '7h', '9c', '9d', '9h'],
+            ['ah', '2d', '3c', '4h', '5d', '6s', 'ks'],
+            ['ts', 'js', 'qs', 'ks', 'as', '9s', '8s'],
+            ['3h', '3d', '3s', '2d', '2c', '2h', 'kd'],
+            ['kh', 'kd', 'qs', 'qd', 'jc', 'jh', '4d'],
+            ['2h', '5d', '8s', 'tc', 'qh', 'kd', '3s'],
+        ]
+        for short_names in fixtures:
+            self._assert_matches_best_subset(short_names)
+
+    def test_five_and_six_cards(self):
+        self._assert_matches_best_subset(['ah', 'ad', 'ks', '7c', '3d'])
+        self._assert_matches_best_subset(['ah', 'ad', 'ks', '7c', '3d', 'kd'])
+
+    def test_flush_over_straight(self):
+        strength = hand_evaluator.evaluate_cards(
+            _ids(['4h', '5h', '6d', '7h', '8c', 'kh', '2h']))
+        self.assertEqual(
+            hand_evaluator.FLUSH, hand_evaluator.category_of(strength))
+
+
+
+class BoardAnalysisTest(unittest.TestCase):
+
+    def test_matches_evaluate_cards(self):
+        rng = random.Random(5)
+        for _ in xrange(2000):
+            ids = rng.sample(xrange(card.NUM_CARDS), 7)
+            board = hand_evaluator.BoardAnalysis(ids[2:])
+            self.assertEqual(hand_evaluator.evaluate_cards(ids),
+                             board.evaluate(ids[:2]))
+
+    def test_extended(self):
+        rng = random.Random(6)
+        for _ in xrange(500):
+            ids = rng.sample(xrange(card.NUM_CARDS), 7)
+            flop = hand_evaluator.BoardAnalysis(ids[2:5])
+            river = flop.extended(ids[5:6]).extended(ids[6:])
+            self.assertEqual(tuple(ids[2:]), river.card_ids)
+            self.assertEqual(hand_evaluator.evaluate_cards(ids[:5]),
+                             flop.evaluate(ids[:2]))
+            self.assertEqual(hand_evaluator.evaluate_cards(ids),
+                             river.evaluate(ids[:2]))
+
+    def test_flush_suit(self):
+        board = hand_evaluator.BoardAnalysis(_ids(['4h', '5h', '9h', 'kd']))
+        self.assertEqual(_ids(['4h'])[0] & 3, board.flush_suit)
+        self.assertEqual(
+            hand_evaluator.FLUSH, hand_evaluator.category_of(
+                board.evaluate(_ids(['2h', 'jh']))))
+        self.assertEqual(
+            hand_evaluator.HIGH_CARD, hand_evaluator.category_of(
+                board.evaluate(_ids(['ah', 'jc']))))
+        self.assertEqual(
+            hand_evaluator.ONE_PAIR, hand_evaluator.category_of(
+                board.evaluate(_ids(['kc', 'qh']))))
+
+    def test_no_flush_suit(self):
+        board = hand_evaluator.BoardAnalysis(
+            _ids(['4h', '5h', '6d', '7d', '8c']))
+        self.assertIsNone(board.flush_suit)
+        self.assertEqual(
+            hand_evaluator.STRAIGHT, hand_evaluator.category_of(
+                board.evaluate(_ids(['ah', 'kh']))))
+        self.assertEqual(
+            hand_evaluator.evaluate_cards(
+                _ids(['4h', '5h', '6d', '7d', '8c', '9h', 'th'])),
+            board.evaluate(_ids(['9h', 'th'])))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,6 @@
 """Utilities for generating sets of hands from higher level descriptions."""
-import itertools
-
 import card
+import combos
 import poker_hand
 
 class Error(Exception):
@@ -53,18 +52,36 @@ def single_hand_description_to_hands(description, dead_cards=None):
         'Invalid hand description: %s' % description)
 
 
+def _dead_mask(dead_cards):
+    """Returns the card mask of a possibly empty list of Cards."""
+    mask = 0
+    for c in dead_cards or ():
+        mask |= c.mask
+    return mask
+
+
+def _hands_for_combo_ids(combo_ids, dead_cards):
+    """The shared HoldemHands for the combos not using a dead card."""
+    return [poker_hand.get_holdem_hand(combo_id)
+            for combo_id in combos.filter_combo_ids(
+                combo_ids, _dead_mask(dead_cards))]
+
+
+def _distinct_rank_indices(rank1, rank2):
+    if rank1 not in card.RANKS or rank2 not in card.RANKS:
+        raise ValueError('Invalid ranks: %s, %s' % (rank1, rank2))
+    if rank1 == rank2:
+        raise HandDescriptionParseError(
+            'Suited and offsuit hands need two ranks, got %s twice' % rank1)
+    return card.RANKS[rank1], card.RANKS[rank2]
+
+
 def generate_pair_hands(rank, dead_cards=None):
     """Generates all possible pair hands for the given rank."""
     if rank not in card.RANKS:
         raise ValueError('Invalid rank: %s' % rank)
-
-    cards = [card.Card(s, rank) for s in card.SUITS]
-    filtered_cards = cards
-    if dead_cards:
-        filtered_cards = [c for c in cards if c not in dead_cards]
-
-    return [poker_hand.HoldemHand(cards=c)
-            for c in itertools.combinations(filtered_cards, 2)]
+    return _hands_for_combo_ids(
+        combos.pair_combo_ids(card.RANKS[rank]), dead_cards)
 
 def generate_suited_hands(rank1, rank2, dead_cards=None):
     """Generates all suited combinations of the two ranks.
@@ -78,14 +95,9 @@ def generate_suited_hands(rank1, rank2, dead_cards=None):
     Returns:
         list of HoldemHand.
     """
-    hands = []
-    for suit in card.SUITS:
-        c1 = card.Card(suit, rank1)
-        c2 = card.Card(suit, rank2)
-        if dead_cards and (c1 in dead_cards or c2 in dead_cards):
-            continue
-        hands.append(poker_hand.HoldemHand(cards=[c1, c2]))
-    return hands
+    return _hands_for_combo_ids(
+        combos.suited_combo_ids(*_distinct_rank_indices(rank1, rank2)),
+        dead_cards)
 
 
 def generate_unsuited_hands(rank1, rank2, dead_cards=None):
@@ -100,22 +112,156 @@ def generate_unsuited_hands(rank1, rank2, dead_cards=None):
     Returns:
         list of HoldemHand.
     """
-    c1_possibilities = [card.Card(s, rank1) for s in card.SUITS]
-    c2_possibilities = [card.Card(s, rank2) for s in card.SUITS]
+    return _hands_for_combo_ids(
+        combos.offsuit_combo_ids(*_distinct_rank_indices(rank1, rank2)),
+        dead_cards)
 
-    hands = []
-    for c1 in c1_possibilities:
-        if dead_cards and c1 in dead_cards:
-            continue
-        for c2 in c2_possibilities:
-            if dead_cards and c2 in dead_cards:
-                continue
-            if c1.suit == c2.suit:
-                continue
-            hands.append(poker_hand.HoldemHand(cards=[c1, c2]))
-    return hands
+
+# Range descriptions that stand for every combo.
+RANDOM_RANGE_NAMES = frozenset(['random', 'any'])
+SUITED = 's'
+OFFSUIT = 'o'
+# Weights are written after the hand class, as in "AKs:0.5".
+WEIGHT_SEPARATOR = ':'
+
+
+def _parse_rank(short_rank):
+    if short_rank not in card.SHORT_RANKS_TO_FULL_RANKS:
+        raise HandDescriptionParseError('Rank %s is invalid' % short_rank)
+    return card.RANKS[card.SHORT_RANKS_TO_FULL_RANKS[short_rank]]
+
+
+def _parse_hand_class(description):
+    """Parses a hand class such as "88", "AKs", "AKo" or "AK".
+
+    Returns:
+        tuple of (high rank index, low rank index, suitedness), where the
+            suitedness is SUITED, OFFSUIT or '' for both.
+    """
+    suitedness = ''
+    if len(description) == 3 and description[2] in (SUITED, OFFSUIT):
+        suitedness = description[2]
+        description = description[:2]
+    if len(description) != 2:
+        raise HandDescriptionParseError(
+            'Invalid hand description: %s' % description)
+    rank1 = _parse_rank(description[0])
+    rank2 = _parse_rank(description[1])
+    if rank1 == rank2 and suitedness:
+        raise HandDescriptionParseError(
+            'Pairs cannot be suited or offsuit: %s' % description)
+    return max(rank1, rank2), min(rank1, rank2), suitedness
 
 
+def _hand_class_combo_ids(high, low, suitedness):
+    if high == low:
+        return combos.pair_combo_ids(high)
+    combo_ids = ()
+    if suitedness != OFFSUIT:
+        combo_ids += combos.suited_combo_ids(high, low)
+    if suitedness != SUITED:
+        combo_ids += combos.offsuit_combo_ids(high, low)
+    return combo_ids
 
 
+def _span_combo_ids(first, last):
+    """Combos of all hand classes from the first to the last, inclusive.
 
+    Pairs span pair ranks, as in "22-55".  Other hands keep their high rank
+    and suitedness and span the low rank, as in "A2s-A5s".
+    """
+    if (first[0] == first[1]) != (last[0] == last[1]):
+        raise HandDescriptionParseError('Cannot span a pair and a non-pair')
+    if first[0] == first[1]:
+        ranks = xrange(min(first[0], last[0]), max(first[0], last[0]) + 1)
+        return sum((combos.pair_combo_ids(rank) for rank in ranks), ())
+    if first[0] != last[0] or first[2] != last[2]:
+        raise HandDescriptionParseError(
+            'Spans must keep the high rank and suitedness')
+    kickers = xrange(min(first[1], last[1]), max(first[1], last[1]) + 1)
+    return sum((_hand_class_combo_ids(first[0], kicker, first[2])
+                for kicker in kickers), ())
+
+
+def _plus_combo_ids(hand_class):
+    """Combos of a hand class and all better ones, as in "TT+" or "A9s+"."""
+    high, low, suitedness = hand_class
+    if high == low:
+        return _span_combo_ids(hand_class, (14, 14, ''))
+    return _span_combo_ids(hand_class, (high, high - 1, suitedness))
+
+
+def _explicit_combo_ids(description):
+    """Combo of a specific hand such as "AsKd", or None if it is not one."""
+    if len(description) != 4 or description[1] not in 'cdhs':
+        return None
+    cards = [card.create_card_from_short_name(description[start:start + 2])
+             for start in (0, 2)]
+    if cards[0] == cards[1]:
+        raise HandDescriptionParseError(
+            'Hand %s uses the same card twice' % description)
+    return (combos.combo_id_for(cards[0].card_id, cards[1].card_id),)
+
+
+def _part_combo_ids(part):
+    """Combo ids of one comma separated part of a range description."""
+    if part in RANDOM_RANGE_NAMES:
+        return xrange(combos.NUM_COMBOS)
+    explicit = _explicit_combo_ids(part)
+    if explicit is not None:
+        return explicit
+    if '-' in part:
+        first, last = part.split('-', 1)
+        return _span_combo_ids(_parse_hand_class(first),
+                               _parse_hand_class(last))
+    if part.endswith('+'):
+        return _plus_combo_ids(_parse_hand_class(part[:-1]))
+    return _hand_class_combo_ids(*_parse_hand_class(part))
+
+
+def _split_weight(part):
+    """Splits "AKs:0.5" into ("aks", 0.5); the weight defaults to 1."""
+    if WEIGHT_SEPARATOR not in part:
+        return part, 1.0
+    part, weight = part.split(WEIGHT_SEPARATOR, 1)
+    try:
+        weight = float(weight)
+    except ValueError:
+        raise HandDescriptionParseError('Invalid weight: %s' % weight)
+    if weight < 0:
+        raise HandDescriptionParseError('Weights cannot be negative')
+    return part, weight
+
+
+def range_description_to_weights(description, dead_cards=None):
+    """Parse a range description into a weight for every combo.
+
+    The description is a comma separated union of parts.  Each part is a
+    hand class ("88", "AKs", "AKo", or "AK" for both), a class and all better
+    ones ("TT+", "A9s+"), an inclusive span ("22-55", "A2s-A5s"), a specific
+    hand ("AsKd") or "random" for every combo.  A part may end in a weight,
+    as in "AKs:0.5"; later parts override the weights of earlier ones.
+
+    Args:
+        description: str, the range, e.g. "TT+,A2s-A5s,KQo:0.5".
+        dead_cards: list of Cards or None, cards no combo may use.
+
+    Returns:
+        list of float, the weight of each combo id.
+
+    Raises:
+        HandDescriptionParseError if the description cannot be parsed.
+    """
+    weights = [0.0] * combos.NUM_COMBOS
+    for part in description.replace(' ', '').lower().split(','):
+        if not part:
+            continue
+        part, weight = _split_weight(part)
+        for combo_id in _part_combo_ids(part):
+            weights[combo_id] = weight
+    dead_mask = _dead_mask(dead_cards)
+    if dead_mask:
+        for combo_id, mask in enumerate(combos.COMBO_MASKS):
+            if mask & dead_mask:
+                weights[combo_id] = 0.0
+    return weights
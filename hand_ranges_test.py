@@ -21,6 +21,10 @@ class HandRangesTest(unittest.TestCase):
         with self.assertRaises(hand_ranges.HandDescriptionParseError):
             hand_ranges.single_hand_description_to_hands('QZo')
 
+    def test_single_hand_description_same_rank_suited(self):
+        with self.assertRaises(hand_ranges.HandDescriptionParseError):
+            hand_ranges.single_hand_description_to_hands('AAs')
+
     def test_single_hand_description_to_hands_suited(self):
         desc = '76s'
         hands = hand_ranges.single_hand_description_to_hands(desc)
@@ -119,5 +123,64 @@ class HandRangesTest(unittest.TestCase):
         for dc in dead_cards:
             self.assertNotIn(dc, flattened_cards)
 
+    def test_generated_hands_are_shared(self):
+        first = hand_ranges.generate_suited_hands('Ace', 'King')
+        second = hand_ranges.generate_suited_hands('King', 'Ace')
+        self.assertEqual([id(h) for h in first], [id(h) for h in second])
+
+
+def _num_combos(description, dead_cards=None):
+    weights = hand_ranges.range_description_to_weights(
+        description, dead_cards=dead_cards)
+    return sum(1 for w in weights if w)
+
+
+class RangeDescriptionTest(unittest.TestCase):
+    def test_hand_classes(self):
+        self.assertEqual(6, _num_combos('88'))
+        self.assertEqual(4, _num_combos('AKs'))
+        self.assertEqual(12, _num_combos('AKo'))
+        self.assertEqual(16, _num_combos('KA'))
+
+    def test_plus(self):
+        self.assertEqual(5 * 6, _num_combos('TT+'))
+        # A2s through AKs.
+        self.assertEqual(12 * 4, _num_combos('A2s+'))
+        self.assertEqual(2 * 12, _num_combos('KJo+'))
+
+    def test_spans(self):
+        self.assertEqual(4 * 6, _num_combos('22-55'))
+        self.assertEqual(4 * 6, _num_combos('55-22'))
+        self.assertEqual(4 * 4, _num_combos('A2s-A5s'))
+
+    def test_invalid_spans(self):
+        for description in ('22-A5s', 'A2s-K5s', 'A2s-A5o'):
+            with self.assertRaises(hand_ranges.HandDescriptionParseError):
+                hand_ranges.range_description_to_weights(description)
+
+    def test_union_and_explicit_hands(self):
+        self.assertEqual(6 + 4 + 1, _num_combos('TT,AKs,2c3d'))
+        # Overlapping parts count each combo once.
+        self.assertEqual(7 * 6, _num_combos('TT+,QQ-88'))
+
+    def test_random(self):
+        self.assertEqual(1326, _num_combos('random'))
+        dead_cards = [card.create_card_from_short_name('as')]
+        self.assertEqual(1326 - 51, _num_combos('random', dead_cards))
+
+    def test_weights(self):
+        weights = hand_ranges.range_description_to_weights('AA,AKs:0.5,AA:0.25')
+        self.assertItemsEqual([0.25] * 6 + [0.5] * 4, [w for w in weights if w])
+
+    def test_invalid_weight(self):
+        for description in ('AKs:x', 'AKs:-1'):
+            with self.assertRaises(hand_ranges.HandDescriptionParseError):
+                hand_ranges.range_description_to_weights(description)
+
+    def test_same_card_twice(self):
+        with self.assertRaises(hand_ranges.HandDescriptionParseError):
+            hand_ranges.range_description_to_weights('AsAs')
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,141 @@
+"""Per-phase timers and counters for the simulation hot path.
+
+A MonteCarloRunner given a Profiler times dealing, hand evaluation, winner
+selection and bookkeeping separately, counts the work done in each, and
+samples the memory allocated by an occasional iteration.  Runners without a
+Profiler take the uninstrumented path and pay nothing for this.
+"""
+import gc
+import sys
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+DEAL_PHASE = 'deal'
+EVALUATE_PHASE = 'evaluate'
+WINNERS_PHASE = 'winners'
+BOOKKEEPING_PHASE = 'bookkeeping'
+PHASES = (DEAL_PHASE, EVALUATE_PHASE, WINNERS_PHASE, BOOKKEEPING_PHASE)
+# Time outside the phases: setup, caching and waiting on worker processes.
+OTHER_PHASE = 'other'
+
+ITERATIONS = 'iterations'
+EVALUATOR_CALLS = 'evaluator_calls'
+CARDS_DEALT = 'cards_dealt'
+CACHE_HITS = 'cache_hits'
+CACHE_MISSES = 'cache_misses'
+COUNTERS = (ITERATIONS, EVALUATOR_CALLS, CARDS_DEALT, CACHE_HITS,
+            CACHE_MISSES)
+
+# Every this many iterations, one has its allocations measured.
+DEFAULT_ALLOCATION_SAMPLE_INTERVAL = 1000
+# tracemalloc measures bytes.  Without it, as on Python 2, the garbage
+# collector's count of objects it tracks stands in.
+ALLOCATION_UNIT = 'bytes' if tracemalloc is not None else 'objects'
+
+
+class Error(Exception):
+    pass
+
+
+def measure_allocations(func):
+    """Calls func and measures what it allocated.
+
+    Returns:
+        int, the peak bytes traced while func ran if tracemalloc is
+            available, otherwise the net number of objects func left to the
+            garbage collector.
+    """
+    if tracemalloc is not None:
+        tracemalloc.start()
+        try:
+            func()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        before = gc.get_count()[0]
+        func()
+        return max(gc.get_count()[0] - before, 0)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+class Profiler(object):
+    """Cumulative timings and counts gathered during one or more runs.
+
+    Attributes:
+        phase_seconds: dict, mapping each of PHASES to the seconds spent in
+            it.
+        counters: dict, mapping each of COUNTERS to its count.
+        elapsed_time: float, total seconds of the runs profiled.
+        allocation_sample_interval: int, iterations per allocation sample, or
+            0 to sample none.
+        allocation_samples: list of int, what each sampled iteration
+            allocated, in ALLOCATION_UNIT.
+    """
+    def __init__(self, allocation_sample_interval=(
+            DEFAULT_ALLOCATION_SAMPLE_INTERVAL)):
+        if allocation_sample_interval < 0:
+            raise Error('Invalid allocation sample interval: %s' %
+                        allocation_sample_interval)
+        self.phase_seconds = dict.fromkeys(PHASES, 0.0)
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.elapsed_time = 0.0
+        self.allocation_sample_interval = allocation_sample_interval
+        self.allocation_samples = []
+
+    def add_time(self, phase, seconds):
+        self.phase_seconds[phase] += seconds
+
+    def count(self, counter, amount=1):
+        self.counters[counter] += amount
+
+    def samples_allocations(self, iteration):
+        """Whether the iteration-th iteration of a run is measured."""
+        return (self.allocation_sample_interval and
+                iteration % self.allocation_sample_interval == 0)
+
+    def sample_allocations(self, func):
+        """Calls func, recording what it allocated."""
+        self.allocation_samples.append(measure_allocations(func))
+
+    def report(self):
+        """dict, the timings and counts as plain JSON compatible values."""
+        phase_seconds = dict(self.phase_seconds)
+        phase_seconds[OTHER_PHASE] = max(
+            self.elapsed_time - sum(self.phase_seconds.itervalues()), 0.0)
+        allocations = None
+        if self.allocation_samples:
+            allocations = (float(sum(self.allocation_samples)) /
+                           len(self.allocation_samples))
+        return {
+            'seconds': self.elapsed_time,
+            'phase_seconds': phase_seconds,
+            'counters': dict(self.counters),
+            'allocations_per_iteration': allocations,
+            'allocation_unit': ALLOCATION_UNIT,
+            'allocation_samples': len(self.allocation_samples),
+        }
+
+    def print_report(self, output=sys.stdout):
+        """Prints the time spent in each phase and the counts."""
+        report = self.report()
+        elapsed_time = report['seconds'] or 1.0
+        output.write('Profile (%0.3f seconds)\n' % report['seconds'])
+        for phase in PHASES + (OTHER_PHASE,):
+            seconds = report['phase_seconds'][phase]
+            output.write('  %-16s %10.3fs %6.1f%%\n' % (
+                phase, seconds, 100.0 * seconds / elapsed_time))
+        for counter in COUNTERS:
+            output.write('  %-16s %11d\n' % (
+                counter, report['counters'][counter]))
+        if report['allocations_per_iteration'] is not None:
+            output.write('  %-16s %11.1f %s per iteration (%d samples)\n' % (
+                'allocations', report['allocations_per_iteration'],
+                report['allocation_unit'], report['allocation_samples']))
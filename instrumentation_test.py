@@ -0,0 +1,64 @@
+# pylint: disable=missing-docstring
+import StringIO
+import unittest
+
+import instrumentation
+
+
+class ProfilerTest(unittest.TestCase):
+    def test_report(self):
+        profiler = instrumentation.Profiler()
+        profiler.add_time(instrumentation.DEAL_PHASE, 1.0)
+        profiler.add_time(instrumentation.EVALUATE_PHASE, 2.0)
+        profiler.add_time(instrumentation.EVALUATE_PHASE, 1.0)
+        profiler.count(instrumentation.EVALUATOR_CALLS, 6)
+        profiler.count(instrumentation.CACHE_MISSES)
+        profiler.elapsed_time = 5.0
+
+        report = profiler.report()
+        self.assertEqual(5.0, report['seconds'])
+        self.assertEqual(1.0, report['phase_seconds']['deal'])
+        self.assertEqual(3.0, report['phase_seconds']['evaluate'])
+        self.assertEqual(0.0, report['phase_seconds']['winners'])
+        self.assertEqual(1.0, report['phase_seconds']['other'])
+        self.assertEqual(6, report['counters']['evaluator_calls'])
+        self.assertEqual(1, report['counters']['cache_misses'])
+        self.assertEqual(0, report['counters']['cache_hits'])
+        self.assertIsNone(report['allocations_per_iteration'])
+
+    def test_print_report(self):
+        profiler = instrumentation.Profiler()
+        profiler.add_time(instrumentation.WINNERS_PHASE, 0.5)
+        profiler.count(instrumentation.ITERATIONS, 10)
+        profiler.elapsed_time = 2.0
+        output = StringIO.StringIO()
+        profiler.print_report(output=output)
+        text = output.getvalue()
+        self.assertIn('Profile (2.000 seconds)', text)
+        self.assertIn('winners', text)
+        self.assertIn('25.0%', text)
+        self.assertIn('iterations', text)
+        self.assertNotIn('allocations', text)
+
+    def test_allocation_sampling(self):
+        profiler = instrumentation.Profiler(allocation_sample_interval=10)
+        self.assertTrue(profiler.samples_allocations(0))
+        self.assertFalse(profiler.samples_allocations(5))
+        self.assertTrue(profiler.samples_allocations(20))
+        profiler.sample_allocations(lambda: [[] for _ in xrange(100)])
+        self.assertEqual(1, len(profiler.allocation_samples))
+        self.assertGreater(
+            profiler.report()['allocations_per_iteration'], 0)
+
+        self.assertFalse(instrumentation.Profiler(
+            allocation_sample_interval=0).samples_allocations(0))
+        self.assertRaises(instrumentation.Error, instrumentation.Profiler,
+                          allocation_sample_interval=-1)
+
+    def test_measure_allocations_keeps_gc_state(self):
+        instrumentation.measure_allocations(lambda: None)
+        self.assertTrue(instrumentation.gc.isenabled())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,11 +5,36 @@ Full interactive run: $ python main_holdem_odds.py
 Specific hands: $ python main_holdem_odds.py --hands=AsAd,KsKd
 Specific hands without any interaction for dead cards and board cards:
     $ python main_holdem_odds.py --hands=AsAd,KsKd,2c3c --nointeraction
+Ranges, one player per semicolon:
+    $ python main_holdem_odds.py --hands="TT+,AKs,AQs:0.5;random"
+One hand against five opponents holding random hands:
+    $ python main_holdem_odds.py --hands=AKs --random_opponents=5
+Equity as if shown down on the flop, turn and river of the same runouts:
+    $ python main_holdem_odds.py --hands=AsKs,QdQh --streets --nointeraction
+Which turn cards change the winner on a flop:
+    $ python main_holdem_odds.py --hands=AsKs,QdQh --board_cards=Kd7d2c \
+        --runouts --nointeraction
+JSON output for other programs:
+    $ python main_holdem_odds.py --hands=AsAd,KsKd --nointeraction \
+        --format=json
+Time spent per phase, and a cProfile dump for pstats or snakeviz:
+    $ python main_holdem_odds.py --hands=AsAd,KsKd --nointeraction \
+        --profile --profile_output=holdem.prof
 """
 import argparse
+import cProfile
+import os
+import sys
+import time
 
+import instrumentation
 import monte_carlo_runner
+import persistent_cache
 import poker_hand
+import preflop_table
+import range_equity
+import runout_table
+import simulation_result
 
 
 def get_player_hands(hands='', used_cards=None):
@@ -20,15 +45,15 @@ def get_player_hands(hands='', used_cards=None):
 
     Args:
         hands: str, representation of which hands to simulate.  In the form:
-            "AsAh,KsKd".
+            "AsAh,KsKd", or "TT+,AKs;22-55" for ranges.
         used_cards: list of Card, cards that are not available.
 
     Returns:
         list of HoldemHand, the hands to simulate.
     """
     if not hands:
-        print ('Please input comma separated hold em hands.  '
-               'For example, ahad,kskd')
+        print ('Please input comma separated hold em hands, or semicolon '
+               'separated ranges.  For example, ahad,kskd or tt+,aks;random')
         hands = raw_input()
     return poker_hand.parse_hands_into_holdem_hands(
         hands, used_cards=used_cards)
@@ -72,6 +97,50 @@ def get_dead_cards(dead_cards='', interaction=True):
     return poker_hand.parse_string_into_cards(dead_cards)
 
 
+def lookup_preflop_equities(player_he_hands, table_path):
+    """Answer a heads-up preflop spot from the precomputed table.
+
+    Args:
+        player_he_hands: list of two HoldemHandRange.
+        table_path: str, path of a table built by preflop_table.py.  Empty or
+            missing tables are skipped.
+
+    Returns:
+        SimulationResult, or None if the spot is not in the table.
+    """
+    if not table_path or not os.path.exists(table_path):
+        return None
+    start_time = time.time()
+    table = preflop_table.PreflopTable(table_path)
+    try:
+        equities = table.lookup_ranges(*player_he_hands)
+    finally:
+        table.close()
+    if equities is None:
+        return None
+    return simulation_result.SimulationResult(
+        [simulation_result.PlayerResult('%r' % he_range, equity)
+         for he_range, equity in zip(player_he_hands, equities)],
+        strategy=preflop_table.LOOKUP_STRATEGY,
+        elapsed_time=time.time() - start_time, cached=True)
+
+
+def print_preflop_equities(result, table_path):
+    """Prints equities looked up by lookup_preflop_equities."""
+    print 'Looked up exact preflop equity in %s\n' % table_path
+    print 'Overall Equity'
+    for index, player in enumerate(result.players):
+        print 'P%s)  %-15s %0.3f' % (index, player.hand, player.equity)
+
+
+def _simulation_requested(parsed_args):
+    """Whether flags that only a simulation honours were given."""
+    return (parsed_args.num_iterations is not None or
+            parsed_args.target_stderr is not None or
+            parsed_args.seed is not None or bool(parsed_args.cache_file) or
+            parsed_args.profile)
+
+
 def main(parsed_args):
     """Run the main program."""
     board_cards = get_board_cards(
@@ -82,24 +151,145 @@ def main(parsed_args):
     used_cards = board_cards + dead_cards
     player_he_hands = get_player_hands(
         hands=parsed_args.hands, used_cards=used_cards)
+    print_text = parsed_args.format == simulation_result.TEXT_FORMAT
+
+    result = None
+    if parsed_args.runouts:
+        result = runout_table.runout_table(
+            player_he_hands, board_cards, dead_cards=dead_cards)
+        if print_text:
+            result.print_report()
+
+    if (result is None and not used_cards and len(player_he_hands) == 2 and
+            not parsed_args.random_opponents and not parsed_args.streets and
+            not _simulation_requested(parsed_args)):
+        result = lookup_preflop_equities(
+            player_he_hands, parsed_args.preflop_table)
+        if result is not None and print_text:
+            print_preflop_equities(result, parsed_args.preflop_table)
 
-    mc_runner = monte_carlo_runner.MonteCarloRunner(
-        player_he_hands, board_cards=board_cards, dead_cards=dead_cards,
-        iterations=parsed_args.num_iterations)
-    mc_runner.run_all_iterations()
+    if result is None and parsed_args.range_equity:
+        result = range_equity.range_equity(
+            player_he_hands, board_cards=board_cards, dead_cards=dead_cards,
+            max_boards=parsed_args.max_boards, seed=parsed_args.seed)
+        if print_text:
+            result.print_report()
+
+    if result is None:
+        iterations = parsed_args.num_iterations
+        if iterations is None:
+            iterations = monte_carlo_runner.DEFAULT_ITERATIONS
+        profiler = None
+        if parsed_args.profile:
+            profiler = instrumentation.Profiler()
+        cache = None
+        if parsed_args.cache_file:
+            cache = persistent_cache.PersistentCache(
+                parsed_args.cache_file, max_entries=parsed_args.cache_size)
+        try:
+            mc_runner = monte_carlo_runner.MonteCarloRunner(
+                player_he_hands, board_cards=board_cards,
+                dead_cards=dead_cards,
+                iterations=iterations,
+                batch_size=parsed_args.batch_size,
+                strategy=parsed_args.strategy,
+                cache=cache,
+                workers=parsed_args.workers,
+                seed=parsed_args.seed,
+                target_stderr=parsed_args.target_stderr,
+                profiler=profiler,
+                random_opponents=parsed_args.random_opponents,
+                streets=parsed_args.streets)
+            if print_text:
+                result = mc_runner.run_all_iterations()
+            else:
+                result = mc_runner.run()
+            if profiler is not None and parsed_args.format != (
+                    simulation_result.JSON_FORMAT):
+                # JSON results carry the profile; other formats keep it
+                # out of their rows.
+                output = sys.stdout if print_text else sys.stderr
+                output.write('\n')
+                profiler.print_report(output=output)
+        finally:
+            if cache is not None:
+                cache.close()
+
+    if not print_text:
+        simulation_result.write_result(result, parsed_args.format, sys.stdout)
 
 
 def _build_argparse():
     parser = argparse.ArgumentParser()
     parser.add_argument(
-        '--num_iterations', help='Number of iterations to run.',
-        type=int, default=1000)
+        '--num_iterations',
+        help='Number of iterations to run.  Defaults to %d.' % (
+            monte_carlo_runner.DEFAULT_ITERATIONS),
+        type=int, default=None)
+    parser.add_argument(
+        '--target_stderr',
+        help=('Instead of a fixed number of iterations, sample until the '
+              'standard error of every equity is at most this, e.g. 0.002.'),
+        type=float, default=None)
+    parser.add_argument(
+        '--batch_size',
+        help=('Deal, evaluate and tally iterations in blocks of this size '
+              'using NumPy.  Requires numpy.'),
+        type=int, default=None)
+    parser.add_argument(
+        '--strategy',
+        help=('How to compute the results: "sample" runs Monte Carlo '
+              'iterations, "exhaustive" enumerates every runout and range '
+              'combination for exact results, and "auto" picks whichever '
+              'needs fewer hand evaluations.'),
+        choices=monte_carlo_runner.STRATEGIES,
+        default=monte_carlo_runner.AUTO_STRATEGY)
+    parser.add_argument(
+        '--workers',
+        help=('Number of processes to split sampled iterations across.  '
+              'Exhaustive runs always use a single process.'),
+        type=int, default=1)
+    parser.add_argument(
+        '--seed',
+        help='Seed for the random number generator, for repeatable runs.',
+        type=int, default=None)
+    parser.add_argument(
+        '--random_opponents',
+        help=('Play the one hand or range given against this many opponents '
+              'holding random hands.  Every board is scored against all '
+              'the ways the opponents can hold the remaining cards, which '
+              'converges faster than dealing them.'),
+        type=int, default=0)
+    parser.add_argument(
+        '--streets',
+        help=('Deal each runout once and also show it down on the flop and '
+              'turn, reporting each street\'s equity and hand distribution.'),
+        action='store_true')
+    parser.add_argument(
+        '--runouts',
+        help=('On a flop or turn with specific hands, enumerate every next '
+              'card exactly and list the equity each gives, the cards that '
+              'change the equities most first.'),
+        action='store_true')
+    parser.add_argument(
+        '--range_equity',
+        help=('Compute heads-up range against range equity, overall and for '
+              'every combo, by ranking both ranges on each board instead of '
+              'dealing matchups.'),
+        action='store_true')
+    parser.add_argument(
+        '--max_boards',
+        help=('With --range_equity, enumerate every board if there are at '
+              'most this many, otherwise sample this many.'),
+        type=int, default=range_equity.DEFAULT_MAX_BOARDS)
     parser.add_argument(
         '--hands',
         help=('Hands to test.  If not specified, these will be provided '
               'interactively. Format should be comma separated, e.g. '
               'AhAs,KsKd .  You may also specify generic hands, like TT, '
-              'AKo, or KQs'),
+              'AKo, or KQs.  To give a player a range, separate the players '
+              'with semicolons and the parts of each range with commas, e.g. '
+              '"TT+,A2s-A5s,KQo:0.5;random".'),
         type=str, default='')
     parser.add_argument(
         '--board_cards',
@@ -111,15 +301,68 @@ def _build_argparse():
         help=('Dead cards.  These will be excluded from consideration in '
               'the hands.'),
         type=str, default='')
+    parser.add_argument(
+        '--preflop_table',
+        help=('Precomputed heads-up preflop equity table, as built by '
+              'preflop_table.py.  Heads-up spots without board or dead cards '
+              'are looked up there when it exists, unless --num_iterations, '
+              '--target_stderr, --seed, --cache_file or --profile asks for a '
+              'simulation.  Empty to always simulate.'),
+        type=str, default=preflop_table.DEFAULT_TABLE_PATH)
+    parser.add_argument(
+        '--cache_file',
+        help=('SQLite file that keeps results between runs.  Cached sampled '
+              'results with too few iterations are topped up.'),
+        type=str, default='')
+    parser.add_argument(
+        '--cache_size',
+        help='Number of results kept in --cache_file.',
+        type=int, default=persistent_cache.DEFAULT_MAX_ENTRIES)
+    parser.add_argument(
+        '--format',
+        help=('Output format: a "text" report, or a "json" document or '
+              '"csv" rows for other programs.  Combine with '
+              '--nointeraction to keep prompts out of the output.'),
+        choices=simulation_result.FORMATS,
+        default=simulation_result.TEXT_FORMAT)
+    parser.add_argument(
+        '--profile',
+        help=('Time dealing, evaluation, winner selection and bookkeeping '
+              'separately and count the work done.  The breakdown is added '
+              'to JSON output and printed otherwise, to stderr for CSV.  '
+              'Runs with --random_opponents or --streets are counted but not '
+              'broken down; their time is reported as other.'),
+        action='store_true')
+    parser.add_argument(
+        '--profile_output',
+        help='Write cProfile statistics of the whole run to this file.',
+        type=str, default='')
     parser.add_argument(
         '--nointeraction',
         help='Disable interactively asking for cards.',
         action='store_false',
         dest='interaction')
     parser.set_defaults(interaction=True)
-    return parser.parse_args()
+    parsed_args = parser.parse_args()
+    if parsed_args.range_equity and (
+            parsed_args.random_opponents or parsed_args.streets):
+        parser.error('--random_opponents and --streets cannot be combined '
+                     'with --range_equity')
+    if parsed_args.runouts and (
+            parsed_args.random_opponents or parsed_args.streets or
+            parsed_args.range_equity):
+        parser.error('--runouts cannot be combined with --random_opponents, '
+                     '--streets or --range_equity')
+    return parsed_args
 
 
 if __name__ == '__main__':
     args = _build_argparse()
-    main(args)
+    if args.profile_output:
+        profile = cProfile.Profile()
+        try:
+            profile.runcall(main, args)
+        finally:
+            profile.dump_stats(args.profile_output)
+    else:
+        main(args)
@@ -1,47 +1,187 @@
 """Probabilistic runner for Hold em equity and hand statistics."""
-import collections
+import array
+import fractions
+import math
+import multiprocessing
 import random
 import time
 
+import batch_evaluator
+import card
 import deck
+import exhaustive_enumerator
+import hand_evaluator
+import instrumentation
+import planner
 import poker_hand
+import range_sampler
+import simulation_result
+import suit_isomorphism
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 DEFAULT_ITERATIONS = 1000
 WIN_RESULT = 'w'
 LOSS_RESULT = 'l'
 TIE_RESULT = 't'
 VALID_RESULTS = frozenset([WIN_RESULT, LOSS_RESULT, TIE_RESULT])
+# Results in the order of their slots in HandDistribution.tallies.
+RESULTS = (WIN_RESULT, TIE_RESULT, LOSS_RESULT)
+RESULT_INDICES = dict((result, index) for index, result in enumerate(RESULTS))
+WIN_INDEX = RESULT_INDICES[WIN_RESULT]
+TIE_INDEX = RESULT_INDICES[TIE_RESULT]
+LOSS_INDEX = RESULT_INDICES[LOSS_RESULT]
+NUM_TALLIES = len(poker_hand.HAND_RANK_NAMES) * len(RESULTS)
+SAMPLE_STRATEGY = planner.SAMPLE_STRATEGY
+EXHAUSTIVE_STRATEGY = planner.EXHAUSTIVE_STRATEGY
+AUTO_STRATEGY = planner.AUTO_STRATEGY
+STRATEGIES = (AUTO_STRATEGY, SAMPLE_STRATEGY, EXHAUSTIVE_STRATEGY)
+# Parallel runs split the iterations into about this many chunks per worker,
+# so that faster workers pick up the slack, but never into chunks smaller than
+# MIN_PARALLEL_CHUNK iterations, so that transferring results stays cheap.
+PARALLEL_CHUNKS_PER_WORKER = 4
+MIN_PARALLEL_CHUNK = 5000
+# Runs with a target standard error check for convergence every this many
+# iterations per worker.
+CONVERGENCE_CHECK_INTERVAL = 1000
+# Normal quantile for the reported 95% confidence intervals.
+CONFIDENCE_Z = 1.96
+# How random opponents are labeled in reports.
+RANDOM_OPPONENT_LABEL = 'random'
+# Streets that street by street runs show hands down on, by board size.
+STREETS = (('flop', 3), ('turn', 4), ('river', 5))
 
 
 class Error(Exception):
     pass
 
 
+def tally_index(category, result_index):
+    """Slot of a hand category and result in HandDistribution.tallies.
+
+    Args:
+        category: int, the hand_evaluator category, as in HAND_RANKS.
+        result_index: int, the index of the result in RESULTS.
+    """
+    return category * len(RESULTS) + result_index
+
+
+def binomial(n, k):
+    """The number of ways to choose k of n items."""
+    result = 1
+    for i in xrange(k):
+        result = result * (n - i) // (i + 1)
+    return result
+
+
+def estimate_equity(shares, squares, unit, iterations):
+    """The mean pot share of iterations and its standard error.
+
+    Args:
+        shares: int, the summed pot shares, in units of 1 / unit pots.
+        squares: int, the summed squared pot shares.
+        unit: int, the pot share unit.
+        iterations: int, the number of iterations summed.
+
+    Returns:
+        tuple of (float equity, float standard error); 0 without iterations.
+    """
+    if not iterations:
+        return 0.0, 0.0
+    mean = float(shares) / (unit * iterations)
+    if iterations < 2:
+        return mean, 0.0
+    mean_square = float(squares) / (unit * unit * iterations)
+    variance = max(0.0, mean_square - mean * mean) * (
+        float(iterations) / (iterations - 1))
+    return mean, math.sqrt(variance / iterations)
+
+
+def share_unit(num_players):
+    """Integer worth a whole pot, so that every chop share is an integer.
+
+    This is the least common multiple of 1 to num_players.
+    """
+    unit = 1
+    for ways in xrange(2, num_players + 1):
+        unit = unit * ways // fractions.gcd(unit, ways)
+    return unit
+
+
 class HandDistribution(object):
-    """Track basic statistics about a single player's hands."""
+    """Track basic statistics about a single player's hands.
+
+    The counts live in tallies, a flat integer array with a slot for every
+    hand category and result, indexed by tally_index.  The counts attribute
+    is a dict view of it for reports.
+    """
     def __init__(self, player_label='Label'):
         self.label = player_label
-        self.total_items = 0
-        self.counts = {}
-        for rank in poker_hand.HAND_RANKS.iterkeys():
-            self.counts[rank] = {}
-            for result in VALID_RESULTS:
-                self.counts[rank][result] = 0
-
-    def increment_rank(self, rank, result):
+        self.tallies = array.array('l', [0]) * NUM_TALLIES
+
+    @property
+    def total_items(self):
+        return sum(self.tallies)
+
+    @property
+    def counts(self):
+        """dict, mapping hand rank names to dicts of counts by result."""
+        counts = {}
+        for rank, category in poker_hand.HAND_RANKS.iteritems():
+            counts[rank] = dict(
+                (result, self.tallies[tally_index(category, result_index)])
+                for result_index, result in enumerate(RESULTS))
+        return counts
+
+    def result_total(self, result_index):
+        """Number of hands with a result, over every hand category.
+
+        Args:
+            result_index: int, the index of the result in RESULTS.
+        """
+        return sum(self.tallies[result_index::len(RESULTS)])
+
+    def named_counts(self):
+        """Counts by rank name and then by simulation_result.RESULT_NAMES."""
+        return dict(
+            (rank, dict(
+                (name, self.tallies[tally_index(category, result_index)])
+                for result_index, name in enumerate(
+                    simulation_result.RESULT_NAMES)))
+            for rank, category in poker_hand.HAND_RANKS.iteritems())
+
+    def increment_rank(self, rank, result, count=1):
         """Increment the proper counter for the rank.
 
         Args:
             rank: str, the rank of the hand to record.
             result: str, one of the above results.
+            count: int, how many hands to record.
         """
-        if result not in VALID_RESULTS:
+        if result not in RESULT_INDICES:
             raise ValueError('Invalid result: %s' % result)
-        self.counts[rank][result] += 1
-        self.total_items += 1
+        self.tallies[tally_index(
+            poker_hand.HAND_RANKS[rank], RESULT_INDICES[result])] += count
+
+    def add_tallies(self, tallies):
+        """Add the tallies of another distribution or of a batch to these.
+
+        Args:
+            tallies: sequence of NUM_TALLIES ints, such as another
+                distribution's tallies or a NumPy array.
+        """
+        if numpy is not None:
+            numpy.frombuffer(self.tallies, dtype=numpy.int_)[:] += tallies
+            return
+        for index, count in enumerate(tallies):
+            self.tallies[index] += count
 
     def print_report(self):
         """Prints out stats about the hand distribution."""
+        total_items = self.total_items
         print '=' * 20 + ' %s ' % self.label + '=' * 20
         print '%-20s%5s\t%4s\t%4s\t%4s\t%4s' % (
             'Hand' + '=' * 16, '#', 'Frac', 'W', 'Tie', 'L')
@@ -57,27 +197,149 @@ class HandDistribution(object):
                 loss_frac = float(
                     result_dict[LOSS_RESULT])/total_for_hand
             print '%-20s%5d\t%0.3f\t%0.3f\t%0.3f\t%0.3f' % (
-                hand, total_for_hand, float(total_for_hand)/self.total_items,
+                hand, total_for_hand, float(total_for_hand)/total_items,
                 win_frac, tie_frac, loss_frac)
 
 
+class StreetStatistics(object):
+    """Results of a street by street run as if shown down on a street.
+
+    Attributes:
+        street: str, the street's name in STREETS.
+        num_board_cards: int, the number of board cards on the street.
+        win_shares: list of int, each player's pot shares, in units of the
+            runner's share_unit.
+        share_squares: list of int, each player's sum of squared pot shares.
+        player_stats: list of HandDistribution, the hands each player had
+            made by the street and how they would have fared.
+    """
+    def __init__(self, street, num_board_cards, holdem_ranges):
+        self.street = street
+        self.num_board_cards = num_board_cards
+        self.win_shares = [0] * len(holdem_ranges)
+        self.share_squares = [0] * len(holdem_ranges)
+        self.player_stats = [HandDistribution(player_label=str(hand))
+                             for hand in holdem_ranges]
+
+
 class MonteCarloRunner(object):
     """Runs a Monte Carlo simulation of Hold em and outputs equity stats."""
     def __init__(self, holdem_ranges, board_cards=None, dead_cards=None,
-                 iterations=DEFAULT_ITERATIONS):
+                 iterations=DEFAULT_ITERATIONS, batch_size=None,
+                 strategy=SAMPLE_STRATEGY, cache=None, workers=1, seed=None,
+                 target_stderr=None, pool=None, profiler=None,
+                 random_opponents=0, streets=False):
+        """Initializer.
+
+        Args:
+            holdem_ranges: list of HoldemHandRange, one per player.
+            board_cards: list of Card or None, cards already on the board.
+            dead_cards: list of Card or None, cards out of play.
+            iterations: int, the number of iterations to sample.
+            batch_size: int or None, sample this many iterations at a time
+                with NumPy.
+            strategy: str, one of STRATEGIES.
+            cache: LRUCache or None, results shared between runners.
+            workers: int, the number of processes to sample with.
+            seed: hashable or None, seed for the random number generator.
+                A seed is drawn when none is given, so that every result
+                not served or topped up from the cache records the seed that
+                repeats it.
+            target_stderr: float or None, sample until every equity has at
+                most this standard error instead of a fixed number of times.
+            pool: multiprocessing.Pool or None, a pool of worker processes
+                shared between runners, used instead of starting one.
+            profiler: instrumentation.Profiler or None, times the phases of
+                each iteration and counts the work done.  Sampling without
+                one takes the uninstrumented path.
+            random_opponents: int, play the single hand or range given
+                against this many opponents holding random hands.  Each
+                sampled board is scored against every way of seating the
+                opponents among the live cards' hands at once.
+            streets: bool, also show every sampled runout down on each
+                street from the flop on, reporting the equities and hands
+                players would have had then in street_stats.
+
+        Raises:
+            Error if the specification is invalid.
+        """
         self._validate_input_specification(
             holdem_ranges, board_cards or [], dead_cards or [])
+        if batch_size and not batch_evaluator.AVAILABLE:
+            raise Error('Batched iterations require numpy')
+        if strategy not in STRATEGIES:
+            raise Error('Invalid strategy: %s' % strategy)
+        if workers < 1:
+            raise Error('Invalid number of workers: %s' % workers)
+        if iterations <= 0:
+            raise Error('Invalid number of iterations: %s' % iterations)
+        if target_stderr is not None and target_stderr <= 0:
+            raise Error('Invalid target standard error: %s' % target_stderr)
+        if random_opponents:
+            self._validate_random_opponents(
+                holdem_ranges, dead_cards or [], random_opponents, strategy,
+                batch_size, workers)
+            strategy = SAMPLE_STRATEGY
+        if streets:
+            self._validate_streets(strategy, batch_size, workers, cache,
+                                   random_opponents)
+            strategy = SAMPLE_STRATEGY
         self.holdem_ranges = holdem_ranges
-        self.board_cards = board_cards
-        self.dead_cards = dead_cards
+        self.board_cards = board_cards or []
+        self.dead_cards = dead_cards or []
         self.iterations = iterations
+        self.batch_size = batch_size
+        self.target_stderr = target_stderr
+        try:
+            self.plan = planner.plan(
+                self.holdem_ranges, self.board_cards, self.dead_cards,
+                iterations=iterations, target_stderr=target_stderr,
+                strategy=strategy)
+        except planner.Error as e:
+            raise Error(str(e))
+        self.strategy = self.plan.strategy
+        if (self.strategy == EXHAUSTIVE_STRATEGY and
+                not all(her.is_uniform for her in holdem_ranges)):
+            raise Error('Exhaustive runs need ranges without weights')
+        self.cache = cache
+        self.cache_hit = False
+        # Iterations of a cached result that this run topped up.
+        self.cached_iterations = 0
+        self.workers = workers
+        self.pool = pool
+        self.profiler = profiler
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(64)
+        self.seed = seed
+        self.rng = random.Random(seed)
 
         self.current_deck = None
+        self._sampler = None
         self.start_time = 0
         self.elapsed_time = 0
 
-        # Hand index to number of wins.
-        self.win_stats = collections.defaultdict(float)
+        # Pot shares are counted exactly in units of 1 / share_unit pots.
+        num_players = len(self.holdem_ranges)
+        self.share_unit = share_unit(num_players)
+        # Number of winners to each winner's share of the pot.
+        self._chop_shares = [0] + [self.share_unit // ways
+                                   for ways in xrange(1, num_players + 1)]
+        self.streets = streets
+        # Showdowns on the streets before the river; the river's are the
+        # runner's own statistics.
+        self.street_stats = []
+        if streets:
+            self.street_stats = [
+                StreetStatistics(street, num_board_cards, self.holdem_ranges)
+                for street, num_board_cards in STREETS
+                if len(self.board_cards) <= num_board_cards < 5]
+        self.random_opponents = random_opponents
+        if random_opponents:
+            self._init_random_opponents()
+        # Each player's total pot shares and sum of squared pot shares, the
+        # latter for the variance.
+        self.win_shares = [0] * num_players
+        self.share_squares = [0] * num_players
         self.player_stats = []
         for hand in self.holdem_ranges:
             self.player_stats.append(
@@ -89,59 +351,384 @@ class MonteCarloRunner(object):
 
         Ensures that cards aren't specified multiple times.
         """
-        explicit_card_count = collections.defaultdict(int)
-        for c in (board_cards + dead_cards) or ():
-            explicit_card_count[c] += 1
-
-        for her in holdem_ranges:
-            if len(her.possible_hands) == 1:
-                for c in her.possible_hands[0].cards:
-                    explicit_card_count[c] += 1
+        masks = [c.mask for c in board_cards + dead_cards]
+        masks.extend(her.possible_hands[0].mask for her in holdem_ranges
+                     if len(her.possible_hands) == 1)
+        used_mask = repeated_mask = 0
+        for mask in masks:
+            repeated_mask |= used_mask & mask
+            used_mask |= mask
 
-        multiple_specified_cards = []
-        for card, count in explicit_card_count.iteritems():
-            if count > 1:
-                multiple_specified_cards.append(card)
+        multiple_specified_cards = [
+            card.get_card_by_id(card_id) for card_id in xrange(card.NUM_CARDS)
+            if repeated_mask >> card_id & 1]
         if multiple_specified_cards:
             raise Error('Cards specified multiple times: %s' % (
                 ','.join('%s' % c for c in multiple_specified_cards)))
 
+    @staticmethod
+    def _validate_random_opponents(holdem_ranges, dead_cards,
+                                   random_opponents, strategy, batch_size,
+                                   workers):
+        """Sanity check for runs against random opponents."""
+        if len(holdem_ranges) != 1:
+            raise Error('Random opponents play against exactly one hand')
+        max_opponents = (card.NUM_CARDS - 5 - 2 - len(dead_cards)) // 2
+        if not 0 < random_opponents <= max_opponents:
+            raise Error('Invalid number of random opponents: %s' %
+                        random_opponents)
+        if strategy == EXHAUSTIVE_STRATEGY:
+            raise Error('Random opponents can only be sampled')
+        if batch_size or workers > 1:
+            raise Error('Random opponents are sampled in a single process '
+                        'without batches')
+
+    @staticmethod
+    def _validate_streets(strategy, batch_size, workers, cache,
+                          random_opponents):
+        """Sanity check for street by street runs."""
+        if strategy == EXHAUSTIVE_STRATEGY:
+            raise Error('Street by street runs can only be sampled')
+        if batch_size or workers > 1:
+            raise Error('Street by street runs are sampled in a single '
+                        'process without batches')
+        if cache is not None:
+            raise Error('Street by street runs are not cached')
+        if random_opponents:
+            raise Error('Street by street runs need every hand given')
+
+    def _init_random_opponents(self):
+        """Sets up the exact pot share units of random opponent runs.
+
+        Each board's live cards are dealt into as many disjoint hands as
+        they make, and the hero's pot share is averaged over every choice of
+        random_opponents of those hands, so it is kept exactly in units of
+        1 / share_unit pots.
+        """
+        num_live_cards = card.NUM_CARDS - 5 - 2 - len(self.dead_cards)
+        self._num_seats = num_live_cards // 2
+        self._num_seatings = binomial(self._num_seats, self.random_opponents)
+        tie_unit = share_unit(self.random_opponents + 1)
+        self.share_unit = tie_unit * self._num_seatings
+        # The hero's share of the pot when tying k opponents, in tie_units.
+        self._tie_shares = [tie_unit // (k + 1)
+                            for k in xrange(self.random_opponents + 1)]
+        # The ways to seat k opponents among n hands, by n then k.
+        self._seatings = [
+            [binomial(n, k) for k in xrange(self.random_opponents + 1)]
+            for n in xrange(self._num_seats + 1)]
+
     def _reset_deck(self, player_starting_hands):
-        if not self.current_deck:
-            self.current_deck = deck.Deck()
-        self.current_deck.reset_and_shuffle()
+        """Leaves only the cards not in play this iteration in the deck.
 
-        cards_to_remove = self.board_cards + self.dead_cards
-        for h in player_starting_hands:
-            cards_to_remove.extend(h.cards)
+        The board, dead cards and the hands of single hand ranges are removed
+        once per scenario; only hands drawn from ranges are patched in.
+        """
+        if not self.current_deck:
+            fixed_cards = self.board_cards + self.dead_cards
+            for her in self.holdem_ranges:
+                if len(her.possible_hands) == 1:
+                    fixed_cards.extend(her.possible_hands[0].cards)
+            self.current_deck = deck.Dealer(
+                excluded_cards=fixed_cards, rng=self.rng)
+        self.current_deck.restore()
 
-        self.current_deck.remove_cards_from_deck(cards_to_remove)
+        for her, h in zip(self.holdem_ranges, player_starting_hands):
+            if len(her.possible_hands) > 1:
+                self.current_deck.remove(h.cards)
 
     def print_statistics(self):
         """Print out statistics about equity along with final hand counts."""
-        print 'Ran %s iterations in %0.3f seconds\n' % (
-            self.iterations, self.elapsed_time)
+        if self.strategy == EXHAUSTIVE_STRATEGY:
+            print 'Enumerated %s outcomes exactly in %0.3f seconds\n' % (
+                self.iterations, self.elapsed_time)
+        else:
+            print 'Ran %s iterations in %0.3f seconds\n' % (
+                self.iterations, self.elapsed_time)
+        if self.cache_hit:
+            cache_note = ' (cached result)'
+        elif self.cached_iterations:
+            cache_note = ' (topped up %d cached iterations)' % (
+                self.cached_iterations)
+        else:
+            cache_note = ''
+        print 'Strategy: %r%s\n' % (self.plan, cache_note)
 
-        print 'Overall Equity'
+        if self.strategy == EXHAUSTIVE_STRATEGY:
+            print 'Overall Equity'
+        else:
+            print 'Overall Equity (95% confidence interval)'
         for index in range(len(self.holdem_ranges)):
             range_short_form = '%r' % self.holdem_ranges[index]
-            print 'P%s)  %-15s %0.3f' % (
+            line = 'P%s)  %-15s %0.3f' % (
                 index,
                 range_short_form,
-                float(self.win_stats.get(index, 0))/self.iterations)
+                self.equity(index))
+            if self.strategy != EXHAUSTIVE_STRATEGY:
+                line += ' +/- %0.4f' % (
+                    CONFIDENCE_Z * self.equity_stderr(index))
+            print line
+        for index in xrange(1, self.random_opponents + 1):
+            print 'P%s)  %-15s %0.3f +/- %0.4f' % (
+                index, RANDOM_OPPONENT_LABEL, self.opponent_equity(),
+                CONFIDENCE_Z * self.equity_stderr(0) / self.random_opponents)
+        if self.street_stats:
+            self._print_street_equities()
         print '\n'
         print 'Hand distribution for each player'
         for stats in self.player_stats:
             stats.print_report()
+        for street_stats in self.street_stats:
+            print '\nHand distribution for each player on the %s' % (
+                street_stats.street)
+            for stats in street_stats.player_stats:
+                stats.print_report()
+
+    def _print_street_equities(self):
+        """Prints each player's equity as if shown down on each street."""
+        print '\nEquity if shown down on each street'
+        streets = [street_stats.street for street_stats in self.street_stats]
+        print '%-20s' % '' + ''.join(
+            '%8s' % street for street in streets + ['river'])
+        for index in range(len(self.holdem_ranges)):
+            line = 'P%s)  %-15s' % (index, '%r' % self.holdem_ranges[index])
+            for street_stats in self.street_stats:
+                line += '%8.3f' % self.street_equity(street_stats, index)[0]
+            print line + '%8.3f' % self.equity(index)
+
+    @property
+    def win_stats(self):
+        """dict, mapping player indices to the number of pots they won."""
+        return dict((idx, float(shares) / self.share_unit)
+                    for idx, shares in enumerate(self.win_shares))
+
+    @property
+    def win_squares(self):
+        """dict, mapping player indices to their sums of squared pot shares."""
+        unit_squared = float(self.share_unit * self.share_unit)
+        return dict((idx, squares / unit_squared)
+                    for idx, squares in enumerate(self.share_squares))
+
+    def equity(self, index):
+        """A player's equity, the fraction of the pots they won.
+
+        Args:
+            index: int, the player index.
+
+        Returns:
+            float, the equity; 0 before any iterations.
+        """
+        if not self.iterations:
+            return 0.0
+        return float(self.win_shares[index]) / (
+            self.share_unit * self.iterations)
+
+    def opponent_equity(self):
+        """Each random opponent's equity, an even split of the rest."""
+        if not self.iterations:
+            return 0.0
+        return (1.0 - self.equity(0)) / self.random_opponents
+
+    def equity_stderr(self, index):
+        """Standard error of a player's equity estimate.
+
+        Args:
+            index: int, the player index.
+
+        Returns:
+            float, the standard error; 0 for exact results.
+        """
+        if self.strategy == EXHAUSTIVE_STRATEGY:
+            return 0.0
+        return estimate_equity(
+            self.win_shares[index], self.share_squares[index],
+            self.share_unit, self.iterations)[1]
+
+    def street_equity(self, street_stats, index):
+        """A player's equity had the hands been shown down on a street.
+
+        Args:
+            street_stats: StreetStatistics, one of street_stats.
+            index: int, the player index.
+
+        Returns:
+            tuple of (float equity, float standard error).
+        """
+        return estimate_equity(
+            street_stats.win_shares[index], street_stats.share_squares[index],
+            self.share_unit, self.iterations)
+
+    def is_converged(self):
+        """Whether every player's equity is within the target standard error."""
+        return all(self.equity_stderr(idx) <= self.target_stderr
+                   for idx in xrange(len(self.holdem_ranges)))
 
     def run_all_iterations(self):
-        """Run the specified number of iterations and print out stats."""
+        """Run the specified number of iterations and print out stats.
+
+        Returns:
+            SimulationResult.
+        """
+        result = self.run()
+        self.print_statistics()
+        return result
+
+    def run(self):
+        """Compute the statistics, from the cache if possible.
+
+        Sampled results are cached by scenario alone, along with their sample
+        count.  A cached result with too few samples for this run is topped up
+        with just the missing samples and stored again.
+
+        Returns:
+            SimulationResult.
+        """
         self.start_time = time.time()
-        for _ in xrange(self.iterations):
-            self.run_iteration()
+        requested_iterations = self.iterations
+        canonical = cache_key = None
+        if self.cache is not None:
+            canonical = suit_isomorphism.canonicalize_scenario(
+                self.holdem_ranges, self.board_cards, self.dead_cards)
+            cache_key = self._cache_key(canonical)
+            cached = self.cache.get(cache_key)
+            # Entries without samples, as older versions could store, are
+            # recomputed and replaced.
+            if cached is not None and cached[0] > 0:
+                self._load_cached_statistics(cached, canonical)
+                self.cached_iterations = self.iterations
+                self.cache_hit = self._has_enough_samples(requested_iterations)
+            if self.profiler is not None:
+                self.profiler.count(
+                    instrumentation.CACHE_HITS if self.cache_hit
+                    else instrumentation.CACHE_MISSES)
+
+        if not self.cache_hit:
+            if self.strategy == EXHAUSTIVE_STRATEGY:
+                self._run_exhaustive()
+            else:
+                self._run_sampled(requested_iterations)
+            if self.cache is not None:
+                self.cache.put(
+                    cache_key, self._cacheable_statistics(canonical))
         self.elapsed_time = time.time() - self.start_time
+        if self.profiler is not None:
+            self.profiler.elapsed_time += self.elapsed_time
+        return self.result()
 
-        self.print_statistics()
+    def _run_sampled(self, requested_iterations):
+        """Sample the iterations this run still needs.
+
+        With several workers and no shared pool, one pool is started for the
+        whole run, so that convergence checks do not start a pool per step.
+        """
+        run_pool = None
+        if self.workers > 1 and self.pool is None:
+            # Build the lookup tables once here so forked workers inherit them.
+            hand_evaluator.non_flush_product_table()
+            run_pool = self.pool = multiprocessing.Pool(self.workers)
+        try:
+            if self.target_stderr:
+                self._run_until_converged()
+            else:
+                num_samples = requested_iterations - self.cached_iterations
+                self._run_samples(num_samples)
+                self.iterations = self.cached_iterations + num_samples
+        finally:
+            if run_pool is not None:
+                self.pool = None
+                run_pool.close()
+                run_pool.join()
+
+    def result(self):
+        """The statistics gathered so far.
+
+        Returns:
+            SimulationResult.
+        """
+        players = []
+        for idx, (her, stats) in enumerate(
+                zip(self.holdem_ranges, self.player_stats)):
+            total_items = float(stats.total_items) or 1.0
+            players.append(simulation_result.PlayerResult(
+                '%r' % her, self.equity(idx),
+                stderr=self.equity_stderr(idx),
+                win=stats.result_total(WIN_INDEX) / total_items,
+                tie=stats.result_total(TIE_INDEX) / total_items,
+                counts=stats.named_counts()))
+        for _ in xrange(self.random_opponents):
+            players.append(simulation_result.PlayerResult(
+                RANDOM_OPPONENT_LABEL, self.opponent_equity(),
+                stderr=self.equity_stderr(0) / self.random_opponents))
+        streets = None
+        if self.streets:
+            streets = [
+                simulation_result.StreetResult(
+                    street_stats.street,
+                    [self._street_player_result(street_stats, idx)
+                     for idx in xrange(len(self.holdem_ranges))])
+                for street_stats in self.street_stats]
+            streets.append(simulation_result.StreetResult('river', players))
+        # Samples loaded from the cache were drawn with other seeds.
+        seed = None if self.cached_iterations else self.seed
+        return simulation_result.SimulationResult(
+            players,
+            board=''.join(c.short_form() for c in self.board_cards),
+            dead=''.join(c.short_form() for c in self.dead_cards),
+            iterations=self.iterations, strategy=self.strategy,
+            elapsed_time=self.elapsed_time, seed=seed,
+            cached=self.cache_hit,
+            profile=(self.profiler.report() if self.profiler is not None
+                     else None),
+            streets=streets)
+
+    def _street_player_result(self, street_stats, index):
+        """PlayerResult of a player as if shown down on a street."""
+        stats = street_stats.player_stats[index]
+        total_items = float(stats.total_items) or 1.0
+        equity, stderr = self.street_equity(street_stats, index)
+        return simulation_result.PlayerResult(
+            '%r' % self.holdem_ranges[index], equity, stderr=stderr,
+            win=stats.result_total(WIN_INDEX) / total_items,
+            tie=stats.result_total(TIE_INDEX) / total_items,
+            counts=stats.named_counts())
+
+    def _cache_key(self, canonical):
+        """Key for results of this run; sample counts are kept in the value."""
+        if self.random_opponents:
+            return canonical.key, self.strategy, self.random_opponents
+        return canonical.key, self.strategy
+
+    def _has_enough_samples(self, requested_iterations):
+        """Whether the loaded statistics are as precise as this run asks."""
+        if self.strategy == EXHAUSTIVE_STRATEGY:
+            return True
+        if self.target_stderr:
+            return (self.is_converged() or
+                    self.iterations >= self.plan.num_samples)
+        return self.iterations >= requested_iterations
+
+    def _cacheable_statistics(self, canonical):
+        """Copies the statistics out, with players in canonical order.
+
+        Returns:
+            tuple of (iterations, list of int pot shares, list of int squared
+                pot shares, list of tally arrays).
+        """
+        tallies = [array.array('l', stats.tallies)
+                   for stats in self.player_stats]
+        return (self.iterations, canonical.to_canonical_order(self.win_shares),
+                canonical.to_canonical_order(self.share_squares),
+                canonical.to_canonical_order(tallies))
+
+    def _load_cached_statistics(self, cached, canonical):
+        """Replaces the statistics with ones from _cacheable_statistics."""
+        iterations, shares, squares, tallies = cached
+        self.iterations = iterations
+        self.win_shares = list(canonical.from_canonical_order(shares))
+        self.share_squares = list(canonical.from_canonical_order(squares))
+        for stats, player_tallies in zip(
+                self.player_stats, canonical.from_canonical_order(tallies)):
+            stats.tallies = array.array('l', player_tallies)
 
     def _get_best_hands_for_each_player(
             self, player_hands, iteration_board_cards):
@@ -155,11 +742,15 @@ class MonteCarloRunner(object):
         Returns:
             dict, mapping player indices to their best hand for this hand.
         """
+        # The board is analyzed once and shared by every player's hand.
+        board = hand_evaluator.BoardAnalysis(
+            [c.card_id for c in iteration_board_cards])
+        board_ids = board.card_ids
         index_to_best_hands = {}
         for idx, player_hand in enumerate(player_hands):
-            best_hand_for_player = poker_hand.get_best_hand_from_cards(
-                list(player_hand.cards) + iteration_board_cards)
-            index_to_best_hands[idx] = best_hand_for_player
+            hole_ids = player_hand.card_ids
+            index_to_best_hands[idx] = poker_hand.BestHand(
+                hole_ids + board_ids, strength=board.evaluate(hole_ids))
         return index_to_best_hands
 
     def _get_winning_indices(self, index_to_best_hands):
@@ -187,13 +778,29 @@ class MonteCarloRunner(object):
                 winning_indices.append(idx)
         return winning_indices
 
+    def _get_sampler(self):
+        """The joint sampler of starting hands, built on first use."""
+        if self._sampler is None:
+            excluded_mask = 0
+            for c in self.board_cards + self.dead_cards:
+                excluded_mask |= c.mask
+            try:
+                self._sampler = range_sampler.JointRangeSampler(
+                    self.holdem_ranges, excluded_mask=excluded_mask)
+            except range_sampler.Error as e:
+                raise Error(str(e))
+        return self._sampler
+
     def select_hands_for_players(self):
         """Randomly selects hands for each player.
 
+        Every card-disjoint combination of hands is chosen with the same
+        probability, as if the ranges had really been dealt.
+
         Returns:
             list of HoldemHand, which specific hand to use for each player.
         """
-        return [random.choice(h.possible_hands) for h in self.holdem_ranges]
+        return self._get_sampler().sample(self.rng)
 
     def run_iteration(self):
         """Run a single iteration of the simulation."""
@@ -202,26 +809,457 @@ class MonteCarloRunner(object):
         self._reset_deck(starting_hands_for_players)
 
         # Finish the board
-        iteration_board_cards = self.board_cards[:]
-        while len(iteration_board_cards) < 5:
-            iteration_board_cards.append(self.current_deck.pop())
+        iteration_board_cards = self.board_cards + self.current_deck.deal(
+            5 - len(self.board_cards))
+
+        index_to_best_hands = self._get_best_hands_for_each_player(
+            starting_hands_for_players, iteration_board_cards)
+        winning_indices = self._get_winning_indices(index_to_best_hands)
 
+        self._update_statistics(index_to_best_hands, winning_indices)
+
+    def _run_profiled_iteration(self):
+        """run_iteration, timing each phase into the profiler."""
+        profiler = self.profiler
+        start_time = time.time()
+        starting_hands_for_players = self.select_hands_for_players()
+        self._reset_deck(starting_hands_for_players)
+        num_cards = 5 - len(self.board_cards)
+        iteration_board_cards = self.board_cards + self.current_deck.deal(
+            num_cards)
+        dealt_time = time.time()
         index_to_best_hands = self._get_best_hands_for_each_player(
             starting_hands_for_players, iteration_board_cards)
+        evaluated_time = time.time()
+        winning_indices = self._get_winning_indices(index_to_best_hands)
+        decided_time = time.time()
+        self._update_statistics(index_to_best_hands, winning_indices)
+        end_time = time.time()
+
+        profiler.add_time(instrumentation.DEAL_PHASE, dealt_time - start_time)
+        profiler.add_time(
+            instrumentation.EVALUATE_PHASE, evaluated_time - dealt_time)
+        profiler.add_time(
+            instrumentation.WINNERS_PHASE, decided_time - evaluated_time)
+        profiler.add_time(
+            instrumentation.BOOKKEEPING_PHASE, end_time - decided_time)
+        profiler.count(instrumentation.CARDS_DEALT, num_cards)
+        profiler.count(
+            instrumentation.EVALUATOR_CALLS, len(starting_hands_for_players))
+
+    def _run_street_iteration(self):
+        """run_iteration, also showing the hands down on earlier streets.
+
+        The runout is dealt once and the board analysis is extended a street
+        at a time, so each street only folds in its new cards.
+        """
+        starting_hands_for_players = self.select_hands_for_players()
+        self._reset_deck(starting_hands_for_players)
+        board_ids = [c.card_id for c in self.board_cards +
+                     self.current_deck.deal(5 - len(self.board_cards))]
+        hole_ids = [h.card_ids for h in starting_hands_for_players]
+
+        board = None
+        for street_stats in self.street_stats:
+            street_ids = board_ids[:street_stats.num_board_cards]
+            if board is None:
+                board = hand_evaluator.BoardAnalysis(street_ids)
+            else:
+                board = board.extended(street_ids[len(board.card_ids):])
+            self._update_street_statistics(
+                street_stats, [board.evaluate(ids) for ids in hole_ids])
+        if board is None:
+            board = hand_evaluator.BoardAnalysis(board_ids)
+        else:
+            board = board.extended(board_ids[len(board.card_ids):])
+
+        index_to_best_hands = {}
+        for idx, ids in enumerate(hole_ids):
+            index_to_best_hands[idx] = poker_hand.BestHand(
+                ids + board.card_ids, strength=board.evaluate(ids))
         winning_indices = self._get_winning_indices(index_to_best_hands)
+        self._update_statistics(index_to_best_hands, winning_indices)
 
-        # Now update the statistics.
+    def _update_street_statistics(self, street_stats, strengths):
+        """Record the outcome of one hand shown down on an earlier street.
+
+        Args:
+            street_stats: StreetStatistics, the street's statistics.
+            strengths: list of int, each player's hand strength there.
+        """
+        best_strength = max(strengths)
+        num_winners = strengths.count(best_strength)
+        share = self._chop_shares[num_winners]
+        winner_index = TIE_INDEX if num_winners > 1 else WIN_INDEX
+        for idx, strength in enumerate(strengths):
+            if strength == best_strength:
+                street_stats.win_shares[idx] += share
+                street_stats.share_squares[idx] += share * share
+                result_index = winner_index
+            else:
+                result_index = LOSS_INDEX
+            street_stats.player_stats[idx].tallies[tally_index(
+                hand_evaluator.category_of(strength), result_index)] += 1
+
+    def _update_statistics(self, index_to_best_hands, winning_indices,
+                           weight=1):
+        """Record the outcome of one hand.
+
+        Args:
+            index_to_best_hands: dict, mapping player indices to their best
+                hand.
+            winning_indices: list of int, the players that won or tied.
+            weight: int, how many hands this outcome stands for.
+        """
+        share = self._chop_shares[len(winning_indices)]
         for idx in winning_indices:
-            self.win_stats[idx] += 1.0 / len(winning_indices)
+            self.win_shares[idx] += weight * share
+            self.share_squares[idx] += weight * share * share
+        winner_index = TIE_INDEX if len(winning_indices) > 1 else WIN_INDEX
         for idx, best_hand in index_to_best_hands.iteritems():
-            if idx in winning_indices:
-                if len(winning_indices) > 1:
-                    self.player_stats[idx].increment_rank(
-                        best_hand.hand_rank, TIE_RESULT)
+            result_index = (
+                winner_index if idx in winning_indices else LOSS_INDEX)
+            self.player_stats[idx].tallies[tally_index(
+                best_hand.hand_rank_index, result_index)] += weight
+
+    def _run_exhaustive(self):
+        """Enumerate every hand assignment and runout exactly.
+
+        Afterwards self.iterations holds the total number of outcomes, so that
+        equities and hand distributions are exact fractions of it.
+        """
+        board_ids = [c.card_id for c in self.board_cards]
+        dead_ids = [c.card_id for c in self.dead_cards]
+        use_numpy = batch_evaluator.AVAILABLE and self.holdem_ranges
+        total_weight = 0
+        for hands, assignment_weight in (
+                exhaustive_enumerator.iter_weighted_assignments(
+                    self.holdem_ranges, board_ids, dead_ids)):
+            hole_ids = [h.card_ids for h in hands]
+            for runouts, weights in exhaustive_enumerator.iter_weighted_runouts(
+                    hole_ids, board_ids, dead_ids):
+                weights = [w * assignment_weight for w in weights]
+                total_weight += sum(weights)
+                if use_numpy:
+                    boards = numpy.array(
+                        [tuple(board_ids) + r for r in runouts],
+                        dtype=numpy.int64).reshape(len(runouts), 5)
+                    strengths, categories = batch_evaluator.evaluate_batch(
+                        numpy.array(hole_ids, dtype=numpy.int64), boards)
+                    self._tally_batch(
+                        strengths, categories,
+                        weights=numpy.array(weights, dtype=numpy.int64))
+                    continue
+                for runout, weight in zip(runouts, weights):
+                    iteration_board_cards = self.board_cards + [
+                        card.get_card_by_id(i) for i in runout]
+                    index_to_best_hands = self._get_best_hands_for_each_player(
+                        hands, iteration_board_cards)
+                    self._update_statistics(
+                        index_to_best_hands,
+                        self._get_winning_indices(index_to_best_hands),
+                        weight=weight)
+        self.iterations = total_weight
+
+    def _run_samples(self, iterations):
+        """Sample iterations with whichever sampling mode is configured."""
+        if self.profiler is not None:
+            self.profiler.count(instrumentation.ITERATIONS, iterations)
+        if self.random_opponents:
+            self._run_random_opponent_iterations(iterations)
+        elif self.streets:
+            for _ in xrange(iterations):
+                self._run_street_iteration()
+        elif self.workers > 1:
+            self._run_parallel_iterations(iterations)
+        elif self.batch_size:
+            self._run_batched_iterations(iterations)
+        elif self.profiler is not None:
+            profiler = self.profiler
+            for iteration in xrange(iterations):
+                if profiler.samples_allocations(iteration):
+                    profiler.sample_allocations(self._run_profiled_iteration)
                 else:
-                    self.player_stats[idx].increment_rank(
-                        best_hand.hand_rank, WIN_RESULT)
+                    self._run_profiled_iteration()
+        else:
+            for _ in xrange(iterations):
+                self.run_iteration()
+
+    def _run_random_opponent_iterations(self, iterations):
+        """Sample boards and score the hero against every seating of them.
+
+        The live cards are shuffled and dealt out, first to complete the
+        board and then as disjoint two card hands.  Any random_opponents of
+        those hands are a fair deal to the opponents, so with each hand
+        ranked once against the hero's, the hero's pot share is averaged over
+        all of these deals by counting.
+        The hero's hand category is tallied with one result drawn with the
+        board's chances of winning, tying and losing.
+        """
+        num_opponents = self.random_opponents
+        num_seatings = self._num_seatings
+        seatings = self._seatings
+        tie_shares = self._tie_shares
+        num_cards = 5 - len(self.board_cards)
+        seats_end = num_cards + 2 * self._num_seats
+        board_ids = [c.card_id for c in self.board_cards]
+        tallies = self.player_stats[0].tallies
+        shuffle = self.rng.shuffle
+        for _ in xrange(iterations):
+            starting_hands_for_players = self.select_hands_for_players()
+            self._reset_deck(starting_hands_for_players)
+            live_ids = [c.card_id for c in self.current_deck.cards]
+            shuffle(live_ids)
+            board = hand_evaluator.BoardAnalysis(
+                board_ids + live_ids[:num_cards])
+            evaluate = board.evaluate
+            hero_strength = evaluate(starting_hands_for_players[0].card_ids)
+
+            below = equal = 0
+            for seat in xrange(num_cards, seats_end, 2):
+                strength = evaluate(live_ids[seat:seat + 2])
+                if strength < hero_strength:
+                    below += 1
+                elif strength == hero_strength:
+                    equal += 1
+            share = 0
+            for ties in xrange(min(equal, num_opponents) + 1):
+                share += (seatings[equal][ties] *
+                          seatings[below][num_opponents - ties] *
+                          tie_shares[ties])
+            self.win_shares[0] += share
+            self.share_squares[0] += share * share
+
+            seating = self.rng.randrange(num_seatings)
+            if seating < seatings[below][num_opponents]:
+                result_index = WIN_INDEX
+            elif seating < seatings[below + equal][num_opponents]:
+                result_index = TIE_INDEX
             else:
-                self.player_stats[idx].increment_rank(
-                    best_hand.hand_rank, LOSS_RESULT)
+                result_index = LOSS_INDEX
+            tallies[tally_index(hand_evaluator.category_of(hero_strength),
+                                result_index)] += 1
+
+        if self.profiler is not None:
+            self.profiler.count(instrumentation.CARDS_DEALT,
+                                iterations * seats_end)
+            self.profiler.count(instrumentation.EVALUATOR_CALLS,
+                                iterations * (1 + self._num_seats))
+
+    def _run_until_converged(self):
+        """Sample until every equity is within the target standard error.
+
+        Convergence is checked every CONVERGENCE_CHECK_INTERVAL iterations per
+        worker.  The planned number of samples, which bounds the standard
+        error of any equity, caps the run.  Sampling continues from any cached
+        iterations, and afterwards self.iterations holds the total.
+        """
+        max_iterations = self.plan.num_samples
+        step = CONVERGENCE_CHECK_INTERVAL * self.workers
+        self.iterations = self.cached_iterations
+        while self.iterations < max_iterations:
+            num_samples = min(step, max_iterations - self.iterations)
+            self._run_samples(num_samples)
+            self.iterations += num_samples
+            if self.is_converged():
+                break
+
+    def _run_batched_iterations(self, iterations=None):
+        """Run iterations as NumPy arrays, batch_size at a time.
+
+        Args:
+            iterations: int or None, how many to run.  Defaults to all.
+        """
+        rng = numpy.random.RandomState(self.rng.getrandbits(32))
+        sampler = self._get_sampler()
+        board_ids = [c.card_id for c in self.board_cards]
+        excluded_ids = board_ids + [c.card_id for c in self.dead_cards]
+        range_card_ids = [
+            numpy.array([h.card_ids for h in hands], dtype=numpy.int64)
+            for hands in sampler.hands_by_range]
+        range_cumulative_weights = [
+            numpy.cumsum(weights) for weights in sampler.weights_by_range]
+
+        profiler = self.profiler
+        remaining = self.iterations if iterations is None else iterations
+        while remaining > 0:
+            num_boards = min(self.batch_size, remaining)
+            remaining -= num_boards
+            start_time = time.time()
+
+            if sampler.mode == range_sampler.INDEPENDENT_MODE:
+                hole_cards = numpy.stack(
+                    [ids[numpy.minimum(
+                        numpy.searchsorted(
+                            cumulative,
+                            rng.random_sample(num_boards) * cumulative[-1],
+                            side='right'),
+                        len(ids) - 1)]
+                     for ids, cumulative in zip(range_card_ids,
+                                                range_cumulative_weights)],
+                    axis=1)
+            else:
+                hole_cards = numpy.array(
+                    [[h.card_ids for h in sampler.sample(self.rng)]
+                     for _ in xrange(num_boards)],
+                    dtype=numpy.int64).reshape(num_boards, -1, 2)
+            dealt = batch_evaluator.deal_boards(
+                rng, num_boards, 5 - len(board_ids), excluded_ids,
+                hole_cards=hole_cards)
+            boards = numpy.concatenate(
+                [numpy.tile(numpy.array(board_ids, dtype=numpy.int64),
+                            (num_boards, 1)), dealt], axis=1)
+
+            dealt_time = time.time()
+            strengths, categories = batch_evaluator.evaluate_batch(
+                hole_cards, boards)
+            evaluated_time = time.time()
+            self._tally_batch(strengths, categories)
+
+            if profiler is not None:
+                # Winners are picked while tallying, so that time is counted
+                # as bookkeeping.
+                profiler.add_time(
+                    instrumentation.DEAL_PHASE, dealt_time - start_time)
+                profiler.add_time(instrumentation.EVALUATE_PHASE,
+                                  evaluated_time - dealt_time)
+                profiler.add_time(instrumentation.BOOKKEEPING_PHASE,
+                                  time.time() - evaluated_time)
+                profiler.count(
+                    instrumentation.CARDS_DEALT, dealt.size)
+                profiler.count(
+                    instrumentation.EVALUATOR_CALLS, strengths.size)
+
+    def _run_parallel_iterations(self, iterations=None):
+        """Sample iterations in chunks across a pool of worker processes.
+
+        Every chunk is run by a fresh single process runner with its own seed
+        drawn from this runner's generator, and the chunks' statistics are
+        merged back in.  Only combo ids, weights and card ids travel to the
+        workers and only the totals travel back.
+
+        Args:
+            iterations: int or None, how many to run.  Defaults to all.
+        """
+        if iterations is None:
+            iterations = self.iterations
+        range_combos = [(her.combo_ids, her.hand_weights)
+                        for her in self.holdem_ranges]
+        board_ids = [c.card_id for c in self.board_cards]
+        dead_ids = [c.card_id for c in self.dead_cards]
+        tasks = [
+            (range_combos, board_ids, dead_ids, chunk, self.batch_size,
+             self.rng.getrandbits(64))
+            for chunk in split_iterations(iterations, self.workers)]
+
+        if self.pool is not None:
+            self._merge_chunks(self.pool, tasks)
+            return
+        # Build the lookup tables once here so forked workers inherit them.
+        hand_evaluator.non_flush_product_table()
+        pool = multiprocessing.Pool(self.workers)
+        try:
+            self._merge_chunks(pool, tasks)
+        finally:
+            pool.close()
+            pool.join()
+
+    def _merge_chunks(self, pool, tasks):
+        for shares, squares, tallies in pool.imap_unordered(
+                _run_sample_chunk, tasks):
+            self.merge_statistics(shares, squares, tallies)
+
+    def merge_statistics(self, shares, squares, tallies):
+        """Add statistics gathered by another runner of the same scenario.
+
+        Args:
+            shares: list of int, each player's pot shares, in units of
+                1 / share_unit pots.
+            squares: list of int, each player's sum of squared pot shares.
+            tallies: list of arrays, each player's HandDistribution tallies.
+        """
+        for idx, share in enumerate(shares):
+            self.win_shares[idx] += share
+        for idx, square in enumerate(squares):
+            self.share_squares[idx] += square
+        for stats, player_tallies in zip(self.player_stats, tallies):
+            stats.add_tallies(player_tallies)
+
+    def _tally_batch(self, strengths, categories, weights=None):
+        """Update the statistics with a batch of evaluated iterations.
+
+        Args:
+            strengths: int array of shape (N, M), each player's hand strength
+                for each of N iterations.
+            categories: int array of shape (N, M), the matching categories.
+            weights: int array of shape (N,) or None, how many hands each
+                iteration stands for.  Defaults to one each.
+        """
+        num_players = strengths.shape[1]
+        winners = strengths == strengths.max(axis=1)[:, numpy.newaxis]
+        num_winners = winners.sum(axis=1)[:, numpy.newaxis]
+        shares = winners * numpy.array(
+            self._chop_shares, dtype=numpy.int64)[num_winners]
+        squares = shares * shares
+        if weights is not None:
+            shares *= weights[:, numpy.newaxis]
+            squares *= weights[:, numpy.newaxis]
+            weights = numpy.repeat(weights, num_players)
+        results = numpy.where(
+            winners, numpy.where(num_winners > 1, TIE_INDEX, WIN_INDEX),
+            LOSS_INDEX)
+
+        # One weighted count over every player's tally slots at once.
+        slots = (tally_index(categories, results) +
+                 NUM_TALLIES * numpy.arange(num_players))
+        tallies = numpy.bincount(
+            slots.ravel(), weights=weights,
+            minlength=NUM_TALLIES * num_players)
+        tallies = numpy.rint(tallies).astype(numpy.int_).reshape(
+            num_players, NUM_TALLIES)
+        self.merge_statistics(
+            [int(total) for total in shares.sum(axis=0)],
+            [int(total) for total in squares.sum(axis=0)], tallies)
+
+
+def split_iterations(iterations, workers):
+    """Split a number of iterations into chunks for a pool of workers.
+
+    Args:
+        iterations: int, the total number of iterations.
+        workers: int, the number of worker processes.
+
+    Returns:
+        list of int, the size of each chunk, summing to iterations.
+    """
+    max_chunks = (iterations + MIN_PARALLEL_CHUNK - 1) // MIN_PARALLEL_CHUNK
+    num_chunks = max(1, min(workers * PARALLEL_CHUNKS_PER_WORKER, max_chunks))
+    base, extra = divmod(iterations, num_chunks)
+    return [base + 1 if i < extra else base for i in xrange(num_chunks)]
+
+
+def _run_sample_chunk(task):
+    """Run one chunk of a parallel simulation inside a worker process.
+
+    Args:
+        task: tuple of (list of each player's combo ids and their weights,
+            board card ids, dead card ids, iterations, batch size, seed).
 
+    Returns:
+        tuple of (list of int pot shares, list of int squared pot shares,
+            list of tally arrays) for each player.
+    """
+    range_combos, board_ids, dead_ids, iterations, batch_size, seed = task
+    holdem_ranges = [
+        poker_hand.HoldemHandRange.from_combo_ids(
+            combo_ids, label='P%d' % idx, hand_weights=hand_weights)
+        for idx, (combo_ids, hand_weights) in enumerate(range_combos)]
+    runner = MonteCarloRunner(
+        holdem_ranges,
+        board_cards=[card.get_card_by_id(i) for i in board_ids],
+        dead_cards=[card.get_card_by_id(i) for i in dead_ids],
+        iterations=iterations, batch_size=batch_size,
+        strategy=SAMPLE_STRATEGY, seed=seed)
+    runner._run_samples(iterations)
+    return (runner.win_shares, runner.share_squares,
+            [stats.tallies for stats in runner.player_stats])
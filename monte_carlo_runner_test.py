@@ -1,8 +1,11 @@
 import unittest
 
+import batch_evaluator
 import card
+import instrumentation
 import monte_carlo_runner
 import poker_hand
+import result_cache
 
 class MonteCarloRunnerTest(unittest.TestCase):
     def test_reset_deck(self):
@@ -39,6 +42,18 @@ class MonteCarloRunnerTest(unittest.TestCase):
             monte_carlo_runner.Error, 'Cards specified multiple times'):
             monte_carlo_runner.MonteCarloRunner(hand_ranges)
 
+    def test_ranges_that_cannot_be_dealt(self):
+        hand_ranges = poker_hand.parse_hands_into_holdem_hands('aa;aa;aa')
+        with self.assertRaisesRegexp(
+            monte_carlo_runner.Error, 'cannot be dealt'):
+            monte_carlo_runner.MonteCarloRunner(
+                hand_ranges, strategy=monte_carlo_runner.AUTO_STRATEGY)
+        # Sampling runs find out from the sampler.
+        mcr = monte_carlo_runner.MonteCarloRunner(hand_ranges)
+        with self.assertRaisesRegexp(
+            monte_carlo_runner.Error, 'cannot be dealt'):
+            mcr.run()
+
     def test_non_overlapping_card_hands(self):
         hand_ranges = poker_hand.parse_hands_into_holdem_hands('TT')
         dead_cards = poker_hand.parse_string_into_cards('Th')
@@ -122,6 +137,352 @@ class MonteCarloRunnerTest(unittest.TestCase):
             [0, 1], mcr._get_winning_indices(index_to_hand_dict))
 
 
+    @unittest.skipUnless(batch_evaluator.AVAILABLE, 'numpy is not installed')
+    def test_batched_iterations(self):
+        he_hands = poker_hand.parse_hands_into_holdem_hands('asad,kk')
+        board_cards = poker_hand.parse_string_into_cards('ac,ah,2d')
+        mcr = monte_carlo_runner.MonteCarloRunner(
+            he_hands, board_cards=board_cards, iterations=250, batch_size=100)
+
+        mcr._run_batched_iterations()
+
+        self.assertAlmostEqual(250, sum(mcr.win_stats.values()))
+        for stats in mcr.player_stats:
+            self.assertEqual(250, stats.total_items)
+        # Quad aces never lose here.
+        self.assertEqual(250, mcr.win_stats[0])
+
+    def test_exhaustive_river(self):
+        he_hands = poker_hand.parse_hands_into_holdem_hands('asad,kskd')
+        board_cards = poker_hand.parse_string_into_cards('ac,kh,2d,7s,9c')
+        mcr = monte_carlo_runner.MonteCarloRunner(
+            he_hands, board_cards=board_cards,
+            strategy=monte_carlo_runner.EXHAUSTIVE_STRATEGY)
+
+        mcr._run_exhaustive()
+
+        self.assertEqual(1, mcr.iterations)
+        self.assertEqual(1, mcr.win_stats[0])
+
+    def test_exhaustive_turn_matches_enumeration(self):
+        he_hands = poker_hand.parse_hands_into_holdem_hands('asks,qdqh')
+        board_cards = poker_hand.parse_string_into_cards('2c7c9dth')
+        mcr = monte_carlo_runner.MonteCarloRunner(
+            he_hands, board_cards=board_cards,
+            strategy=monte_carlo_runner.EXHAUSTIVE_STRATEGY)
+        mcr._run_exhaustive()
+
+        # Only the three remaining aces and kings win for AsKs.
+        self.assertEqual(44, mcr.iterations)
+        self.assertAlmostEqual(6, mcr.win_stats[0])
+        self.assertAlmostEqual(44 - 6, mcr.win_stats[1])
+        for stats in mcr.player_stats:
+            self.assertEqual(44, stats.total_items)
+
+    def test_exhaustive_symmetric_preflop_ranges(self):
+        he_hands = poker_hand.parse_hands_into_holdem_hands('22,22')
+        board_cards = poker_hand.parse_string_into_cards('ac,kh,qd,7s')
+        mcr = monte_carlo_runner.MonteCarloRunner(
+            he_hands, board_cards=board_cards,
+            strategy=monte_carlo_runner.EXHAUSTIVE_STRATEGY)
+        mcr._run_exhaustive()
+
+        # Once the first player holds two deuces the second player's pair is
+        # forced, leaving 6 assignments with 44 rivers each.
+        self.assertEqual(6 * 44, mcr.iterations)
+        self.assertAlmostEqual(mcr.win_stats[0], mcr.win_stats[1])
+
+    def test_exhaustive_without_numpy_matches(self):
+        he_hands = poker_hand.parse_hands_into_holdem_hands('asah,kk')
+        board_cards = poker_hand.parse_string_into_cards('2c2d7s')
+
+        results = []
+        available = batch_evaluator.AVAILABLE
+        try:
+            for use_numpy in (False, available):
+                batch_evaluator.AVAILABLE = use_numpy
+                mcr = monte_carlo_runner.MonteCarloRunner(
+                    he_hands, board_cards=board_cards,
+                    strategy=monte_carlo_runner.EXHAUSTIVE_STRATEGY)
+                mcr._run_exhaustive()
+                results.append((mcr.iterations, dict(mcr.win_stats),
+                                mcr.player_stats[1].counts))
+        finally:
+            batch_evaluator.AVAILABLE = available
+        self.assertEqual(results[0], results[1])
+
+    def test_cache_hit_for_isomorphic_scenario(self):
+        cache = result_cache.LRUCache()
+        mcr = monte_carlo_runner.MonteCarloRunner(
+            poker_hand.parse_hands_into_holdem_hands('asks,qdqh'),
+            board_cards=poker_hand.parse_string_into_cards('2c7c9dth'),
+            strategy=monte_carlo_runner.EXHAUSTIVE_STRATEGY, cache=cache)
+        mcr.run_all_iterations()
+        self.assertFalse(mcr.cache_hit)
+
+        swapped = monte_carlo_runner.MonteCarloRunner(
+            poker_hand.parse_hands_into_holdem_hands('qsqc,ahkh'),
+            board_cards=poker_hand.parse_string_into_cards('2d7d9stc'),
+            strategy=monte_carlo_runner.EXHAUSTIVE_STRATEGY, cache=cache)
+        swapped.run_all_iterations()
+
+        self.assertTrue(swapped.cache_hit)
+        self.assertEqual(44, swapped.iterations)
+        self.assertEqual(mcr.win_stats[0], swapped.win_stats[1])
+        self.assertEqual(mcr.win_stats[1], swapped.win_stats[0])
+        self.assertEqual(mcr.player_stats[0].counts,
+                         swapped.player_stats[1].counts)
+        self.assertEqual(44, swapped.player_stats[0].total_items)
+
+    def test_cache_tops_up_sampled_results(self):
+        cache = result_cache.LRUCache()
+        hands = 'asks,qdqh'
+        mcr = monte_carlo_runner.MonteCarloRunner(
+            poker_hand.parse_hands_into_holdem_hands(hands), iterations=300,
+            cache=cache, seed=1)
+        mcr.run()
+        wins = mcr.win_stats[0]
+        self.assertEqual(1, mcr.result().seed)
+
+        more = monte_carlo_runner.MonteCarloRunner(
+            poker_hand.parse_hands_into_holdem_hands(hands), iterations=500,
+            cache=cache, seed=2)
+        more.run()
+        self.assertFalse(more.cache_hit)
+        self.assertEqual(300, more.cached_iterations)
+        self.assertEqual(500, more.iterations)
+        self.assertEqual(500, more.player_stats[0].total_items)
+        self.assertGreaterEqual(more.win_stats[0], wins)
+        self.assertIsNone(more.result().seed)
+
+        fewer = monte_carlo_runner.MonteCarloRunner(
+            poker_hand.parse_hands_into_holdem_hands(hands), iterations=200,
+            cache=cache)
+        fewer.run()
+        self.assertTrue(fewer.cache_hit)
+        self.assertEqual(500, fewer.iterations)
+        self.assertEqual(more.win_stats[0], fewer.win_stats[0])
+        self.assertIsNone(fewer.result().seed)
+
+    def test_cache_replaces_entries_without_samples(self):
+        cache = result_cache.LRUCache()
+        he_ranges = poker_hand.parse_hands_into_holdem_hands('asks,qdqh')
+        mcr = monte_carlo_runner.MonteCarloRunner(
+            he_ranges, iterations=300, cache=cache, seed=1)
+        mcr.run()
+        key, entry = next(cache._entries.iteritems())
+        cache.put(key, (-100,) + entry[1:])
+
+        more = monte_carlo_runner.MonteCarloRunner(
+            he_ranges, iterations=1000, cache=cache, seed=2)
+        result = more.run()
+        self.assertEqual(0, more.cached_iterations)
+        self.assertEqual(1000, more.iterations)
+        self.assertEqual(1000, more.player_stats[0].total_items)
+        self.assertAlmostEqual(1.0, sum(result.equities))
+        self.assertEqual(1000, cache.get(key)[0])
+
+    def test_cache_tops_up_to_target_stderr(self):
+        cache = result_cache.LRUCache()
+        hands = 'asks,qdqh'
+        loose = monte_carlo_runner.MonteCarloRunner(
+            poker_hand.parse_hands_into_holdem_hands(hands),
+            strategy=monte_carlo_runner.SAMPLE_STRATEGY, target_stderr=0.05,
+            cache=cache, seed=1)
+        loose.run()
+
+        tight = monte_carlo_runner.MonteCarloRunner(
+            poker_hand.parse_hands_into_holdem_hands(hands),
+            strategy=monte_carlo_runner.SAMPLE_STRATEGY, target_stderr=0.01,
+            cache=cache, seed=2)
+        tight.run()
+        self.assertFalse(tight.cache_hit)
+        self.assertEqual(loose.iterations, tight.cached_iterations)
+        self.assertGreater(tight.iterations, loose.iterations)
+        self.assertTrue(tight.is_converged())
+
+        again = monte_carlo_runner.MonteCarloRunner(
+            poker_hand.parse_hands_into_holdem_hands(hands),
+            strategy=monte_carlo_runner.SAMPLE_STRATEGY, target_stderr=0.02,
+            cache=cache)
+        again.run()
+        self.assertTrue(again.cache_hit)
+        self.assertEqual(tight.iterations, again.iterations)
+
+    def test_seed_repeats_results(self):
+        results = []
+        for _ in xrange(2):
+            mcr = monte_carlo_runner.MonteCarloRunner(
+                poker_hand.parse_hands_into_holdem_hands('aks,qq'),
+                iterations=50, seed=1234)
+            for _ in xrange(mcr.iterations):
+                mcr.run_iteration()
+            results.append(dict(mcr.win_stats))
+        self.assertEqual(results[0], results[1])
+
+    def test_profiler_does_not_change_results(self):
+        results = []
+        for profiler in (None, instrumentation.Profiler()):
+            mcr = monte_carlo_runner.MonteCarloRunner(
+                poker_hand.parse_hands_into_holdem_hands('aks,qq,jts'),
+                board_cards=poker_hand.parse_string_into_cards('2c7d'),
+                iterations=200, strategy=monte_carlo_runner.SAMPLE_STRATEGY,
+                seed=7, profiler=profiler)
+            result = mcr.run()
+            results.append((dict(mcr.win_stats),
+                            [stats.counts for stats in mcr.player_stats]))
+        self.assertEqual(results[0], results[1])
+
+        counters = profiler.counters
+        self.assertEqual(200, counters[instrumentation.ITERATIONS])
+        self.assertEqual(600, counters[instrumentation.EVALUATOR_CALLS])
+        self.assertEqual(600, counters[instrumentation.CARDS_DEALT])
+        self.assertEqual(1, len(profiler.allocation_samples))
+        self.assertLessEqual(sum(profiler.phase_seconds.values()),
+                             profiler.elapsed_time)
+        self.assertEqual(profiler.report(), result.profile)
+
+    def test_profiler_counts_cache_hits(self):
+        cache = result_cache.LRUCache()
+        profiler = instrumentation.Profiler()
+        for _ in xrange(2):
+            monte_carlo_runner.MonteCarloRunner(
+                poker_hand.parse_hands_into_holdem_hands('asks,qdqh'),
+                iterations=100, cache=cache, seed=1,
+                profiler=profiler).run()
+        self.assertEqual(1, profiler.counters[instrumentation.CACHE_HITS])
+        self.assertEqual(1, profiler.counters[instrumentation.CACHE_MISSES])
+        self.assertEqual(100, profiler.counters[instrumentation.ITERATIONS])
+
+    @unittest.skipUnless(batch_evaluator.AVAILABLE, 'requires numpy')
+    def test_profiler_batched(self):
+        profiler = instrumentation.Profiler()
+        monte_carlo_runner.MonteCarloRunner(
+            poker_hand.parse_hands_into_holdem_hands('asks,qdqh'),
+            board_cards=poker_hand.parse_string_into_cards('2c7d9h'),
+            iterations=250, batch_size=100,
+            strategy=monte_carlo_runner.SAMPLE_STRATEGY, seed=1,
+            profiler=profiler).run()
+        self.assertEqual(250, profiler.counters[instrumentation.ITERATIONS])
+        self.assertEqual(
+            500, profiler.counters[instrumentation.EVALUATOR_CALLS])
+        self.assertEqual(500, profiler.counters[instrumentation.CARDS_DEALT])
+
+    def test_split_iterations(self):
+        self.assertEqual([10], monte_carlo_runner.split_iterations(10, 4))
+        chunks = monte_carlo_runner.split_iterations(100001, 2)
+        self.assertEqual(8, len(chunks))
+        self.assertEqual(100001, sum(chunks))
+        self.assertLessEqual(max(chunks) - min(chunks), 1)
+
+    def test_invalid_iterations(self):
+        for iterations in (0, -100):
+            self.assertRaises(
+                monte_carlo_runner.Error, monte_carlo_runner.MonteCarloRunner,
+                [], iterations=iterations)
+
+    def test_invalid_workers(self):
+        self.assertRaises(
+            monte_carlo_runner.Error, monte_carlo_runner.MonteCarloRunner,
+            [], workers=0)
+
+    def test_parallel_iterations_merge(self):
+        he_hands = poker_hand.parse_hands_into_holdem_hands('asad,kk')
+        board_cards = poker_hand.parse_string_into_cards('ac,ah,2d')
+        monte_carlo_runner.MIN_PARALLEL_CHUNK, min_chunk = (
+            100, monte_carlo_runner.MIN_PARALLEL_CHUNK)
+        try:
+            mcr = monte_carlo_runner.MonteCarloRunner(
+                he_hands, board_cards=board_cards, iterations=450,
+                workers=2, seed=7)
+            mcr._run_parallel_iterations()
+        finally:
+            monte_carlo_runner.MIN_PARALLEL_CHUNK = min_chunk
+
+        self.assertAlmostEqual(450, sum(mcr.win_stats.values()))
+        # Quad aces never lose here.
+        self.assertEqual(450, mcr.win_stats[0])
+        for stats in mcr.player_stats:
+            self.assertEqual(450, stats.total_items)
+        self.assertEqual(
+            450, mcr.player_stats[0].counts[poker_hand.FOUR_OF_A_KIND][
+                monte_carlo_runner.WIN_RESULT])
+
+    def test_equity_stderr(self):
+        mcr = monte_carlo_runner.MonteCarloRunner(
+            poker_hand.parse_hands_into_holdem_hands('aks,qq'), iterations=4)
+        # Player 0 wins two pots outright and chops one, in half pot units.
+        mcr.win_shares[0] = 5
+        mcr.share_squares[0] = 9
+
+        # Shares 1, 1, 0.5, 0 have a sample variance of 0.229.
+        self.assertAlmostEqual(
+            (0.6875 / 3) ** 0.5 / 2, mcr.equity_stderr(0))
+
+    def test_equity_stderr_exhaustive(self):
+        mcr = monte_carlo_runner.MonteCarloRunner(
+            poker_hand.parse_hands_into_holdem_hands('asks,qdqh'),
+            board_cards=poker_hand.parse_string_into_cards('2c7c9dth'),
+            strategy=monte_carlo_runner.EXHAUSTIVE_STRATEGY)
+        mcr._run_exhaustive()
+        self.assertEqual(0.0, mcr.equity_stderr(0))
+
+    def test_run_until_converged(self):
+        mcr = monte_carlo_runner.MonteCarloRunner(
+            poker_hand.parse_hands_into_holdem_hands('asad,kk'),
+            board_cards=poker_hand.parse_string_into_cards('ac,ah,2d'),
+            target_stderr=0.01, seed=3)
+        mcr._run_until_converged()
+
+        # Quad aces never lose, so the first check already converges.
+        self.assertEqual(
+            monte_carlo_runner.CONVERGENCE_CHECK_INTERVAL, mcr.iterations)
+        self.assertTrue(mcr.is_converged())
+
+    def test_run_until_converged_stops_at_plan(self):
+        mcr = monte_carlo_runner.MonteCarloRunner(
+            poker_hand.parse_hands_into_holdem_hands('aks,qq'),
+            target_stderr=0.05, seed=3)
+        mcr._run_until_converged()
+
+        # A close spot cannot beat the worst case bound of 100 samples.
+        self.assertEqual(100, mcr.iterations)
+        self.assertAlmostEqual(100, sum(mcr.win_stats.values()))
+
+    def test_run_until_converged_starts_one_pool(self):
+        pools = []
+        original = (monte_carlo_runner.multiprocessing.Pool,
+                    monte_carlo_runner.CONVERGENCE_CHECK_INTERVAL,
+                    monte_carlo_runner.MIN_PARALLEL_CHUNK)
+
+        def counting_pool(*args):
+            pool = original[0](*args)
+            pools.append(pool)
+            return pool
+        monte_carlo_runner.multiprocessing.Pool = counting_pool
+        monte_carlo_runner.CONVERGENCE_CHECK_INTERVAL = 100
+        monte_carlo_runner.MIN_PARALLEL_CHUNK = 50
+        try:
+            mcr = monte_carlo_runner.MonteCarloRunner(
+                poker_hand.parse_hands_into_holdem_hands('aks,qq'),
+                strategy=monte_carlo_runner.SAMPLE_STRATEGY,
+                target_stderr=0.02, workers=2, seed=3)
+            mcr.run()
+        finally:
+            (monte_carlo_runner.multiprocessing.Pool,
+             monte_carlo_runner.CONVERGENCE_CHECK_INTERVAL,
+             monte_carlo_runner.MIN_PARALLEL_CHUNK) = original
+
+        # 625 samples in four convergence steps share one pool.
+        self.assertEqual(625, mcr.iterations)
+        self.assertEqual(1, len(pools))
+        self.assertIsNone(mcr.pool)
+
+    def test_invalid_target_stderr(self):
+        self.assertRaises(
+            monte_carlo_runner.Error, monte_carlo_runner.MonteCarloRunner,
+            [], target_stderr=0)
+
 
 class HandDistributionTest(unittest.TestCase):
     def test_init(self):
@@ -148,6 +509,173 @@ class HandDistributionTest(unittest.TestCase):
                              sum(result_dict.itervalues()))
         self.assertEqual(6, hd.total_items)
 
+    def test_tallies_back_the_counts(self):
+        hd = monte_carlo_runner.HandDistribution()
+        hd.increment_rank(poker_hand.FLUSH, monte_carlo_runner.TIE_RESULT)
+
+        index = monte_carlo_runner.tally_index(
+            poker_hand.HAND_RANKS[poker_hand.FLUSH],
+            monte_carlo_runner.TIE_INDEX)
+        self.assertEqual(1, hd.tallies[index])
+        self.assertEqual(1, sum(hd.tallies))
+
+    def test_add_tallies(self):
+        hd = monte_carlo_runner.HandDistribution()
+        hd.increment_rank(poker_hand.FLUSH, monte_carlo_runner.WIN_RESULT)
+        hd.add_tallies([1] * monte_carlo_runner.NUM_TALLIES)
+
+        self.assertEqual(
+            2, hd.counts[poker_hand.FLUSH][monte_carlo_runner.WIN_RESULT])
+        self.assertEqual(monte_carlo_runner.NUM_TALLIES + 1, hd.total_items)
+
+    def test_invalid_result(self):
+        hd = monte_carlo_runner.HandDistribution()
+        with self.assertRaises(ValueError):
+            hd.increment_rank(poker_hand.FLUSH, 'x')
+
+
+class RandomOpponentsTest(unittest.TestCase):
+    def _runner(self, hands, board='', **kwargs):
+        return monte_carlo_runner.MonteCarloRunner(
+            poker_hand.parse_hands_into_holdem_hands(hands),
+            board_cards=poker_hand.parse_string_into_cards(board), seed=1,
+            **kwargs)
+
+    def test_agrees_with_known_equity(self):
+        # Pocket aces win about 85.2% against one random hand.
+        mcr = self._runner('asad', iterations=2000, random_opponents=1)
+        result = mcr.run()
+        self.assertLess(abs(mcr.equity(0) - 0.852),
+                        4 * mcr.equity_stderr(0))
+        self.assertEqual(2, len(result.players))
+        self.assertEqual(
+            monte_carlo_runner.RANDOM_OPPONENT_LABEL, result.players[1].hand)
+        self.assertAlmostEqual(1.0, sum(result.equities))
+        self.assertEqual(2000, mcr.player_stats[0].total_items)
+
+    def test_chopped_boards_are_exact(self):
+        mcr = self._runner('2c3d', board='asksqsjsts', iterations=50,
+                           random_opponents=3)
+        result = mcr.run()
+        self.assertEqual(0.25, mcr.equity(0))
+        self.assertEqual([0.25] * 4, result.equities)
+        self.assertEqual(0.0, mcr.equity_stderr(0))
+        self.assertEqual(50, mcr.player_stats[0].counts['Straight Flush']['t'])
+
+    def test_nuts_win_every_seating(self):
+        mcr = self._runner('ts9h', board='asksqsjs2d', iterations=20,
+                           random_opponents=8)
+        mcr.run()
+        self.assertEqual(1.0, mcr.equity(0))
+        self.assertEqual(0.0, mcr.opponent_equity())
+
+    def test_opponents_are_in_cache_key(self):
+        cache = result_cache.LRUCache()
+        self._runner('aks', iterations=100, random_opponents=2,
+                     cache=cache).run()
+        mcr = self._runner('aks', iterations=100, random_opponents=3,
+                           cache=cache)
+        mcr.run()
+        self.assertFalse(mcr.cache_hit)
+        mcr = self._runner('aks', iterations=100, random_opponents=3,
+                           cache=cache)
+        mcr.run()
+        self.assertTrue(mcr.cache_hit)
+
+    def test_invalid_specifications(self):
+        self.assertRaises(monte_carlo_runner.Error, self._runner,
+                          'aks,qq', random_opponents=2)
+        self.assertRaises(monte_carlo_runner.Error, self._runner,
+                          'aks', random_opponents=23)
+        self.assertRaises(monte_carlo_runner.Error, self._runner,
+                          'aks', random_opponents=-1)
+        self.assertRaises(
+            monte_carlo_runner.Error, self._runner, 'aks',
+            random_opponents=2,
+            strategy=monte_carlo_runner.EXHAUSTIVE_STRATEGY)
+        self.assertRaises(monte_carlo_runner.Error, self._runner,
+                          'aks', random_opponents=2, workers=2)
+        self._runner('aks', random_opponents=22)
+
+
+class StreetsTest(unittest.TestCase):
+    def _runner(self, hands, board='', **kwargs):
+        return monte_carlo_runner.MonteCarloRunner(
+            poker_hand.parse_hands_into_holdem_hands(hands),
+            board_cards=poker_hand.parse_string_into_cards(board), **kwargs)
+
+    def test_river_matches_plain_run(self):
+        plain = self._runner('aks,qq,jts', iterations=300, seed=4,
+                             strategy=monte_carlo_runner.SAMPLE_STRATEGY)
+        plain.run()
+        streets = self._runner('aks,qq,jts', iterations=300, seed=4,
+                               streets=True)
+        streets.run()
+        self.assertEqual(plain.win_shares, streets.win_shares)
+        self.assertEqual([stats.counts for stats in plain.player_stats],
+                         [stats.counts for stats in streets.player_stats])
+        self.assertEqual(['flop', 'turn'],
+                         [s.street for s in streets.street_stats])
+        for street_stats in streets.street_stats:
+            self.assertEqual(300, street_stats.player_stats[0].total_items)
+            self.assertAlmostEqual(1.0, sum(
+                streets.street_equity(street_stats, idx)[0]
+                for idx in xrange(3)))
+
+    def test_showdown_on_given_flop(self):
+        mcr = self._runner('asks,qdqh', board='kd7d2c', iterations=50,
+                           seed=1, streets=True)
+        result = mcr.run()
+        flop = mcr.street_stats[0]
+        self.assertEqual((1.0, 0.0), mcr.street_equity(flop, 0))
+        self.assertEqual(50, flop.player_stats[0].counts['One pair']['w'])
+        self.assertEqual(50, flop.player_stats[1].counts['One pair']['l'])
+        self.assertEqual(['flop', 'turn', 'river'],
+                         [street.street for street in result.streets])
+        self.assertEqual(result.players, result.streets[-1].players)
+
+    def test_turn_board_has_no_flop(self):
+        mcr = self._runner('asks,qdqh', board='kd7d2c3h', iterations=10,
+                           streets=True)
+        mcr.run()
+        self.assertEqual(['turn'], [s.street for s in mcr.street_stats])
+
+    def test_invalid_specifications(self):
+        self.assertRaises(
+            monte_carlo_runner.Error, self._runner, 'aks,qq', streets=True,
+            strategy=monte_carlo_runner.EXHAUSTIVE_STRATEGY)
+        self.assertRaises(monte_carlo_runner.Error, self._runner, 'aks,qq',
+                          streets=True, workers=2)
+        self.assertRaises(monte_carlo_runner.Error, self._runner, 'aks,qq',
+                          streets=True, cache=result_cache.LRUCache())
+        self.assertRaises(monte_carlo_runner.Error, self._runner, 'aks',
+                          streets=True, random_opponents=2)
+
+
+class ShareUnitTest(unittest.TestCase):
+    def test_binomial(self):
+        self.assertEqual(1, monte_carlo_runner.binomial(5, 0))
+        self.assertEqual(10, monte_carlo_runner.binomial(5, 2))
+        self.assertEqual(0, monte_carlo_runner.binomial(2, 3))
+        self.assertEqual(26334, monte_carlo_runner.binomial(22, 5))
+
+    def test_share_unit(self):
+        self.assertEqual(1, monte_carlo_runner.share_unit(1))
+        self.assertEqual(2, monte_carlo_runner.share_unit(2))
+        self.assertEqual(12, monte_carlo_runner.share_unit(4))
+        self.assertEqual(2520, monte_carlo_runner.share_unit(10))
+
+    def test_three_way_chops_are_exact(self):
+        he_hands = poker_hand.parse_hands_into_holdem_hands('2c3d,2d3h,2h3s')
+        board_cards = poker_hand.parse_string_into_cards('asksqsjsts')
+        mcr = monte_carlo_runner.MonteCarloRunner(
+            he_hands, board_cards=board_cards,
+            strategy=monte_carlo_runner.EXHAUSTIVE_STRATEGY)
+        mcr._run_exhaustive()
+
+        self.assertEqual([2, 2, 2], mcr.win_shares)
+        self.assertEqual(1.0 / 3, mcr.equity(0))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,103 @@
+"""Caching of simulation results in a SQLite file, shared between runs."""
+import cPickle
+import sqlite3
+
+DEFAULT_MAX_ENTRIES = 100000
+# Bumped whenever the layout of cached results changes, so that results
+# written by older versions are never read back.
+FORMAT_VERSION = 2
+# Seconds to wait for another process that is writing to the same file.
+LOCK_TIMEOUT = 30.0
+# Entries are stamped with a counter kept in the file itself, so that
+# processes sharing the file agree on which entry was used least recently.
+_NEXT_USE = 'SELECT COALESCE(MAX(last_used), 0) + 1 FROM results'
+
+
+class Error(Exception):
+    pass
+
+
+class PersistentCache(object):
+    """An on-disk mapping that evicts the least recently used entries.
+
+    It has the get and put interface of result_cache.LRUCache, so runners can
+    use either.  Keys are any values with a stable repr, such as the tuples
+    of ints, floats and strings built by MonteCarloRunner; values are pickled.
+    """
+    def __init__(self, path, max_entries=DEFAULT_MAX_ENTRIES):
+        """Initializer.
+
+        Args:
+            path: str, the SQLite file, created if missing.
+            max_entries: int, the number of entries kept.
+
+        Raises:
+            ValueError if max_entries is not positive.
+            Error if the file cannot be opened as a cache.
+        """
+        if max_entries < 1:
+            raise ValueError('max_entries must be positive: %s' % max_entries)
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        try:
+            self._connection = sqlite3.connect(path, timeout=LOCK_TIMEOUT)
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS results ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, '
+                'last_used INTEGER NOT NULL)')
+            self._connection.execute(
+                'CREATE INDEX IF NOT EXISTS results_last_used '
+                'ON results (last_used)')
+            self._connection.commit()
+        except sqlite3.DatabaseError as e:
+            raise Error('Cannot open cache %s: %s' % (path, e))
+
+    def close(self):
+        """Closes the file."""
+        self._connection.close()
+
+    @staticmethod
+    def _encode_key(key):
+        return '%d:%r' % (FORMAT_VERSION, key)
+
+    def __len__(self):
+        return self._connection.execute(
+            'SELECT COUNT(*) FROM results').fetchone()[0]
+
+    def __contains__(self, key):
+        return self._connection.execute(
+            'SELECT 1 FROM results WHERE key = ?',
+            (self._encode_key(key),)).fetchone() is not None
+
+    def get(self, key, default=None):
+        """Returns the value for key and marks it as recently used."""
+        encoded = self._encode_key(key)
+        row = self._connection.execute(
+            'SELECT value FROM results WHERE key = ?', (encoded,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return default
+        with self._connection:
+            self._connection.execute(
+                'UPDATE results SET last_used = (%s) '
+                'WHERE key = ?' % _NEXT_USE, (encoded,))
+        self.hits += 1
+        return cPickle.loads(str(row[0]))
+
+    def put(self, key, value):
+        """Stores the value, evicting the least recently used if full."""
+        blob = sqlite3.Binary(
+            cPickle.dumps(value, protocol=cPickle.HIGHEST_PROTOCOL))
+        with self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO results (key, value, last_used) '
+                'VALUES (?, ?, (%s))' % _NEXT_USE,
+                (self._encode_key(key), blob))
+            excess = len(self) - self.max_entries
+            if excess > 0:
+                self._connection.execute(
+                    'DELETE FROM results WHERE key IN ('
+                    'SELECT key FROM results ORDER BY last_used LIMIT ?)',
+                    (excess,))
@@ -0,0 +1,72 @@
+"""Tests for persistent_cache.py"""
+# pylint: disable=missing-docstring
+import os
+import shutil
+import tempfile
+import unittest
+
+import persistent_cache
+
+
+class PersistentCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'cache.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_get_and_put(self):
+        cache = persistent_cache.PersistentCache(self.path, max_entries=2)
+        cache.put(('a', 1), [1.5, {'w': 2}])
+        self.assertEqual([1.5, {'w': 2}], cache.get(('a', 1)))
+        self.assertIsNone(cache.get(('b', 1)))
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(1, cache.misses)
+        cache.close()
+
+    def test_persists_between_instances(self):
+        cache = persistent_cache.PersistentCache(self.path)
+        cache.put('a', (100, [0.5]))
+        cache.close()
+
+        reopened = persistent_cache.PersistentCache(self.path)
+        self.assertIn('a', reopened)
+        self.assertEqual((100, [0.5]), reopened.get('a'))
+        reopened.close()
+
+    def test_evicts_least_recently_used(self):
+        cache = persistent_cache.PersistentCache(self.path, max_entries=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+
+        self.assertEqual(2, len(cache))
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertIn('c', cache)
+        cache.close()
+
+    def test_put_replaces(self):
+        cache = persistent_cache.PersistentCache(self.path, max_entries=2)
+        cache.put('a', 1)
+        cache.put('a', 2)
+        self.assertEqual(1, len(cache))
+        self.assertEqual(2, cache.get('a'))
+        cache.close()
+
+    def test_invalid_size(self):
+        with self.assertRaises(ValueError):
+            persistent_cache.PersistentCache(self.path, max_entries=0)
+
+    def test_invalid_file(self):
+        with open(self.path, 'w') as f:
+            f.write('not a database' * 100)
+        with self.assertRaises(persistent_cache.Error):
+            persistent_cache.PersistentCache(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
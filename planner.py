@@ -0,0 +1,133 @@
+"""Chooses between exact enumeration and sampling based on estimated work.
+
+Work is measured in hand evaluations: enumerating a scenario exactly costs one
+evaluation per player for every card-disjoint range assignment and every board
+runout, while sampling costs one evaluation per player per iteration.
+"""
+import math
+
+import card
+import exhaustive_enumerator
+
+SAMPLE_STRATEGY = 'sample'
+EXHAUSTIVE_STRATEGY = 'exhaustive'
+AUTO_STRATEGY = 'auto'
+
+# Above this many raw range combinations the disjoint assignments are not
+# counted one by one; the raw product is used as the estimate instead.
+MAX_COUNTED_ASSIGNMENTS = 100000
+
+
+class Error(Exception):
+    pass
+
+
+class Plan(object):
+    """The chosen strategy together with the estimates behind it.
+
+    num_assignments and exhaustive_cost are None when sampling was asked for,
+    since the assignments are then not counted.
+    """
+    def __init__(self, strategy, num_assignments, num_runouts, num_players,
+                 num_samples):
+        self.strategy = strategy
+        self.num_assignments = num_assignments
+        self.num_runouts = num_runouts
+        self.num_samples = num_samples
+        self.exhaustive_cost = None
+        if num_assignments is not None:
+            self.exhaustive_cost = num_assignments * num_runouts * num_players
+        self.sample_cost = num_samples * num_players
+
+    @property
+    def estimated_cost(self):
+        """int, estimated hand evaluations for the chosen strategy."""
+        if self.strategy == EXHAUSTIVE_STRATEGY:
+            return self.exhaustive_cost
+        return self.sample_cost
+
+    def __repr__(self):
+        return '%s (estimated cost: %d hand evaluations)' % (
+            self.strategy, self.estimated_cost)
+
+
+def samples_for_stderr(target_stderr):
+    """Iterations needed so that any equity has at most target_stderr.
+
+    A single hand's equity lies in [0, 1], so its variance is at most 0.25.
+    """
+    return int(math.ceil(0.25 / target_stderr ** 2))
+
+
+def count_assignments(holdem_ranges, excluded_mask=0):
+    """Counts card-disjoint choices of one hand per range.
+
+    Args:
+        holdem_ranges: list of HoldemHandRange.
+        excluded_mask: int, mask of cards no hand may use.
+
+    Returns:
+        int, the exact count, or an upper bound when there are more than
+            MAX_COUNTED_ASSIGNMENTS raw combinations.
+    """
+    raw_combinations = 1
+    for her in holdem_ranges:
+        raw_combinations *= len(her.possible_hands)
+    if raw_combinations > MAX_COUNTED_ASSIGNMENTS:
+        return raw_combinations
+    return sum(1 for _ in exhaustive_enumerator.iter_assignments(
+        holdem_ranges, excluded_mask=excluded_mask))
+
+
+def plan(holdem_ranges, board_cards, dead_cards, iterations=None,
+         target_stderr=None, strategy=AUTO_STRATEGY):
+    """Estimates the work of each strategy and picks one.
+
+    Args:
+        holdem_ranges: list of HoldemHandRange.
+        board_cards: list of Card.
+        dead_cards: list of Card.
+        iterations: int or None, the number of samples requested.
+        target_stderr: float or None, the standard error the results need.
+            Takes precedence over iterations when both are given.
+        strategy: str, AUTO_STRATEGY to choose the cheaper strategy, or a
+            specific strategy to only record its estimates.  Assignments are
+            not counted for SAMPLE_STRATEGY, which the sampler checks.
+
+    Returns:
+        Plan.
+
+    Raises:
+        Error if the assignments are counted and the ranges cannot be dealt
+            without sharing a card.
+    """
+    num_assignments = None
+    if strategy != SAMPLE_STRATEGY:
+        excluded_mask = 0
+        for c in list(board_cards) + list(dead_cards):
+            excluded_mask |= c.mask
+        num_assignments = count_assignments(
+            holdem_ranges, excluded_mask=excluded_mask)
+        if not num_assignments:
+            raise Error('The ranges cannot be dealt without sharing a card')
+
+    num_live_cards = (card.NUM_CARDS - len(board_cards) - len(dead_cards) -
+                      2 * len(holdem_ranges))
+    num_runouts = exhaustive_enumerator.count_runouts(
+        num_live_cards, len(board_cards))
+
+    if target_stderr:
+        num_samples = samples_for_stderr(target_stderr)
+    else:
+        num_samples = iterations or 0
+
+    result = Plan(SAMPLE_STRATEGY, num_assignments, num_runouts,
+                  len(holdem_ranges), num_samples)
+    if strategy != AUTO_STRATEGY:
+        result.strategy = strategy
+    elif (all(her.is_uniform for her in holdem_ranges) and
+          result.exhaustive_cost <= result.sample_cost):
+        # Enumeration counts outcomes, which weighted hands cannot be, so
+        # only uniform ranges are enumerated.
+        result.strategy = EXHAUSTIVE_STRATEGY
+    return result
@@ -0,0 +1,60 @@
+"""Tests for planner.py"""
+# pylint: disable=missing-docstring
+import unittest
+
+import planner
+import poker_hand
+
+
+class PlannerTest(unittest.TestCase):
+
+    def _plan(self, hands, board='', dead='', **kwargs):
+        board_cards = poker_hand.parse_string_into_cards(board)
+        dead_cards = poker_hand.parse_string_into_cards(dead)
+        holdem_ranges = poker_hand.parse_hands_into_holdem_hands(
+            hands, used_cards=board_cards + dead_cards)
+        return planner.plan(holdem_ranges, board_cards, dead_cards, **kwargs)
+
+    def test_turn_prefers_exhaustive(self):
+        plan = self._plan('asks,qdqh', board='2c7c9dth', iterations=1000)
+        self.assertEqual(planner.EXHAUSTIVE_STRATEGY, plan.strategy)
+        self.assertEqual(44, plan.num_runouts)
+        self.assertEqual(88, plan.estimated_cost)
+
+    def test_preflop_prefers_sampling(self):
+        plan = self._plan('asks,qdqh', iterations=1000)
+        self.assertEqual(planner.SAMPLE_STRATEGY, plan.strategy)
+        self.assertEqual(2000, plan.estimated_cost)
+
+    def test_target_stderr_drives_sample_count(self):
+        plan = self._plan('asks,qdqh', board='2c7c9d', target_stderr=0.01)
+        self.assertEqual(2500, plan.num_samples)
+        # 990 runouts beat 2500 samples.
+        self.assertEqual(planner.EXHAUSTIVE_STRATEGY, plan.strategy)
+
+    def test_ranges_multiply_runouts(self):
+        plan = self._plan('aa,kk', board='2c7c9dth', iterations=100000)
+        self.assertEqual(36, plan.num_assignments)
+        self.assertEqual(planner.EXHAUSTIVE_STRATEGY, plan.strategy)
+
+    def test_explicit_strategy_is_kept(self):
+        plan = self._plan('asks,qdqh', board='2c7c9dth', iterations=1000,
+                          strategy=planner.SAMPLE_STRATEGY)
+        self.assertEqual(planner.SAMPLE_STRATEGY, plan.strategy)
+        self.assertEqual(2000, plan.estimated_cost)
+        # Sampling skips counting the assignments.
+        self.assertIsNone(plan.num_assignments)
+        self.assertIsNone(plan.exhaustive_cost)
+
+    def test_ranges_that_cannot_be_dealt(self):
+        for strategy in (planner.AUTO_STRATEGY, planner.EXHAUSTIVE_STRATEGY):
+            self.assertRaises(planner.Error, self._plan, 'aa;aa;aa',
+                              iterations=1000, strategy=strategy)
+
+    def test_count_assignments_skips_conflicts(self):
+        holdem_ranges = poker_hand.parse_hands_into_holdem_hands('aa,aks')
+        self.assertEqual(12, planner.count_assignments(holdem_ranges))
+
+
+if __name__ == '__main__':
+    unittest.main()
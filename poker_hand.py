@@ -1,9 +1,11 @@
 """Representations and evaluations of Poker hands."""
+import array
 import card
-import collections
 import itertools
 import re
 
+import combos
+import hand_evaluator
 import hand_ranges
 
 
@@ -29,7 +31,14 @@ HAND_RANKS = {
     STRAIGHT_FLUSH: 8,
 }
 
+# Hand rank names indexed by hand_evaluator category.
+HAND_RANK_NAMES = tuple(
+    sorted(HAND_RANKS, key=HAND_RANKS.__getitem__))
+
 HAND_RANGE_REGEX = re.compile(r'([2-9tjqka]{2}|[2-9tjqka]{2}[os])')
+EXPLICIT_HAND_REGEX = re.compile(r'^([2-9tjqka][cdhs]){2}$')
+# Separates the players' ranges in hand input.
+PLAYER_SEPARATOR = ';'
 
 class Error(Exception):
     pass
@@ -39,74 +48,237 @@ class InvalidHandSpecification(Error):
     """Raised if the hand specification results in zero hands."""
 
 
-class PokerHand(object):
-    """Represents a five card poker hand."""
-    def __init__(self, cards=None):
-        self.cards = cards
-        self.hand_rank = get_hand_rank(self)
-        self.hand_rank_index = HAND_RANKS[self.hand_rank]
-        self.sorted_ranks = sorted(c.rank_index for c in cards)
+class _StrengthOrdered(object):
+    """Orders hands by their integer strength attribute."""
+    __slots__ = ()
 
     def __eq__(self, other):
-        return (self.hand_rank_index == other.hand_rank_index and
-                compare_secondary_ranks(self, other) == 0)
+        return self.strength == other.strength
 
-    def __lt__(self, rhs):
-        if self.hand_rank_index < rhs.hand_rank_index:
-            return True
-        elif self.hand_rank_index > rhs.hand_rank_index:
-            return False
+    def __ne__(self, other):
+        return self.strength != other.strength
 
-        # Compare secondary ranks returns < 0 if RHS is a "better" hand.
-        return compare_secondary_ranks(self, rhs) < 0
+    def __lt__(self, rhs):
+        return self.strength < rhs.strength
 
     def __gt__(self, other):
-        return (not self.__lt__(other) and
-                not self == other)
+        return self.strength > other.strength
 
     def __le__(self, other):
-        return self.__lt__(other) or self == other
+        return self.strength <= other.strength
+
+    def __ge__(self, other):
+        return self.strength >= other.strength
+
+
+class PokerHand(_StrengthOrdered):
+    """Represents a five card poker hand."""
+    def __init__(self, cards=None):
+        self.cards = cards
+        self.strength = hand_evaluator.evaluate_five(
+            [c.card_id for c in cards])
+        self.hand_rank_index = hand_evaluator.category_of(self.strength)
+        self.hand_rank = HAND_RANK_NAMES[self.hand_rank_index]
+        self.sorted_ranks = sorted(c.rank_index for c in cards)
+
+
+class BestHand(_StrengthOrdered):
+    """The best five card hand that can be made from five to seven cards.
+
+    The strength is computed directly from all of the cards.  The five cards
+    that make up the hand are only worked out if they are asked for.
+    """
+    __slots__ = ('card_ids', 'strength', 'hand_rank_index', '_poker_hand')
+
+    def __init__(self, card_ids, strength=None):
+        self.card_ids = card_ids
+        if strength is None:
+            strength = hand_evaluator.evaluate_cards(card_ids)
+        self.strength = strength
+        self.hand_rank_index = hand_evaluator.category_of(strength)
+        self._poker_hand = None
+
+    @property
+    def hand_rank(self):
+        return HAND_RANK_NAMES[self.hand_rank_index]
+
+    @property
+    def poker_hand(self):
+        """PokerHand, the five cards making up the best hand."""
+        if self._poker_hand is None:
+            for five_ids in itertools.combinations(self.card_ids, 5):
+                if hand_evaluator.evaluate_five(five_ids) == self.strength:
+                    self._poker_hand = PokerHand(
+                        cards=[card.get_card_by_id(i) for i in five_ids])
+                    break
+        return self._poker_hand
+
+    @property
+    def cards(self):
+        return self.poker_hand.cards
 
 
 class HoldemHand(object):
     """Representation of a holdem hand."""
+    __slots__ = ('cards', 'card_ids', 'mask', 'combo_id')
+
     def __init__(self, cards=None):
+        if len(set(cards)) != len(cards):
+            raise InvalidHandSpecification(
+                'Hand %s uses the same card twice' %
+                ''.join(c.short_form() for c in cards))
         self.cards = cards
-        self.as_set = set(cards)
+        self.card_ids = tuple(c.card_id for c in cards)
+        self.mask = 0
+        for c in cards:
+            self.mask |= c.mask
+        self.combo_id = combos.combo_id_for(*self.card_ids)
+
+    @property
+    def as_set(self):
+        return set(self.cards)
 
     def __repr__(self):
         return '%s%s' % (self.cards[0].short_form(), self.cards[1].short_form())
 
     def __eq__(self, other):
-        return self.as_set == other.as_set
+        return self.mask == other.mask
+
+    def __ne__(self, other):
+        return self.mask != other.mask
 
-    def __hash__(self, other):
-        return str(self.as_set).__hash__()
+    def __hash__(self):
+        return self.mask
+
+
+# Combo id to its shared HoldemHand, filled in on first use.
+_COMBO_HANDS = [None] * combos.NUM_COMBOS
+
+
+def get_holdem_hand(combo_id):
+    """Returns the shared HoldemHand for a combo id, higher card first."""
+    hand = _COMBO_HANDS[combo_id]
+    if hand is None:
+        hand = HoldemHand(cards=[card.get_card_by_id(card_id)
+                                 for card_id in combos.COMBO_CARD_IDS[combo_id]])
+        _COMBO_HANDS[combo_id] = hand
+    return hand
 
 
 class HoldemHandRange(object):
-    def __init__(self, possible_hands, label=None):
-        self.possible_hands = possible_hands
+    """A player's range: a weight for each of the 1326 combos.
+
+    Only the weights are stored; the HoldemHands for the combos in the range
+    are looked up from the shared instances when first asked for.
+    """
+    def __init__(self, possible_hands=None, label=None, weights=None):
+        """Initializer.
+
+        Args:
+            possible_hands: list of HoldemHand, hands of weight 1.  Ignored if
+                weights are given.
+            label: str or None, how to display the range.  Defaults to the
+                list of hands.
+            weights: sequence of float or None, the weight of each combo id.
+        """
+        if weights is None:
+            self.weights = array.array('d', [0.0]) * combos.NUM_COMBOS
+            for h in possible_hands:
+                self.weights[h.combo_id] = 1.0
+            self.combo_ids = tuple(h.combo_id for h in possible_hands)
+            self._possible_hands = possible_hands
+        else:
+            self.weights = array.array('d', weights)
+            self.combo_ids = tuple(
+                combo_id for combo_id, weight in enumerate(self.weights)
+                if weight > 0)
+            self._possible_hands = None
         if not label:
-            self.label = ','.join('%s' % h for h in possible_hands)
+            self.label = ','.join('%s' % h for h in self.possible_hands)
         else:
             self.label = label
 
+    @classmethod
+    def from_combo_ids(cls, combo_ids, label=None, hand_weights=None):
+        """Builds a range from combo ids and optionally their weights."""
+        if hand_weights is None:
+            return cls([get_holdem_hand(i) for i in combo_ids], label=label)
+        weights = [0.0] * combos.NUM_COMBOS
+        for combo_id, weight in zip(combo_ids, hand_weights):
+            weights[combo_id] = weight
+        return cls(label=label, weights=weights)
+
+    @property
+    def possible_hands(self):
+        """list of HoldemHand, the hands in the range, by combo_ids."""
+        if self._possible_hands is None:
+            self._possible_hands = [get_holdem_hand(i) for i in self.combo_ids]
+        return self._possible_hands
+
+    @property
+    def hand_weights(self):
+        """tuple of float, the weight of each hand in possible_hands."""
+        return tuple(self.weights[i] for i in self.combo_ids)
+
+    @property
+    def is_uniform(self):
+        """bool, whether every hand in the range has the same weight."""
+        return len(set(self.hand_weights)) <= 1
+
+    @property
+    def combo_bitset(self):
+        """int, bitset over combo ids of the hands in the range."""
+        return combos.to_bitset(self.combo_ids)
+
+    @property
+    def cards_mask(self):
+        """int, mask of every card used by some hand in the range."""
+        return combos.cards_mask(self.combo_ids)
+
     def __repr__(self):
         return self.label
 
 
 def prettify_range_label(label):
-    if len(label) == 3:
-        return label[0:2].upper() + label[2].lower()
-    return label.upper()
+    """Capitalizes ranks and lowercases suits, e.g. "tt+,a2s-a5s:0.5"."""
+    parts = []
+    for part in label.split(','):
+        description, separator, weight = part.partition(
+            hand_ranges.WEIGHT_SEPARATOR)
+        if description in hand_ranges.RANDOM_RANGE_NAMES:
+            pass
+        elif EXPLICIT_HAND_REGEX.match(description):
+            description = ''.join(
+                c.upper() if i % 2 == 0 else c
+                for i, c in enumerate(description))
+        else:
+            description = ''.join(
+                c.upper() if c not in 'so' else c for c in description)
+        parts.append(description + separator + weight)
+    return ','.join(parts)
+
+
+def _split_players(hand_input):
+    """Splits the input into one range description per player.
+
+    Players are separated by semicolons, so that a player's range can be a
+    comma separated union.  Without semicolons every comma starts a new
+    player, as in "AsAd,KK".
+    """
+    hand_input = hand_input.replace(' ', '').lower()
+    if PLAYER_SEPARATOR in hand_input:
+        return [p for p in hand_input.split(PLAYER_SEPARATOR) if p]
+    return hand_input.split(',')
+
 
 def parse_hands_into_holdem_hands(hand_input, used_cards=None):
     """Split the string into holdem hands.
 
     Args:
-        hand_input: str, comma separated string of concatenated short card
-            names.  For example: "ahad,kskc,qdqc".  Space is ignored.
+        hand_input: str, the players' hands, separated by semicolons, or by
+            commas when no player needs a multi-part range.  Each is a
+            specific hand like "AhAd" or a range like "TT+,AKs:0.5"; see
+            hand_ranges.range_description_to_weights.  Space is ignored.
         used_cards: list of Card, cards that are unavailable.  Only relevant
             for hand ranges.
 
@@ -114,31 +286,29 @@ def parse_hands_into_holdem_hands(hand_input, used_cards=None):
         list of HoldemHandRange.
 
     Raises:
-        InvalidHandSpeci
+        InvalidHandSpecification
     """
     holdem_ranges = []
-    hands = hand_input.replace(' ', '').lower().split(',')
+    used_mask = 0
+    for c in used_cards or ():
+        used_mask |= c.mask
 
-    for hand in hands:
-        if HAND_RANGE_REGEX.search(hand):
-            possible_hands = hand_ranges.single_hand_description_to_hands(
-                hand, dead_cards=used_cards)
-            if not possible_hands:
-                raise InvalidHandSpecification(
-                    'No hands possible from %s with used cards: %s' % (
-                        hand, used_cards))
-            holdem_ranges.append(
-                HoldemHandRange(possible_hands,
-                                label=prettify_range_label(hand)))
-        else:
+    for hand in _split_players(hand_input):
+        if EXPLICIT_HAND_REGEX.match(hand):
             he_hand = HoldemHand(cards=parse_string_into_cards(hand))
-            # TODO: clean this up.
-            if used_cards:
-                for c in he_hand.cards:
-                    if used_cards and c in used_cards:
-                        raise InvalidHandSpecification(
-                            'Required card in hand %s is unavailable' % he_hand)
+            if he_hand.mask & used_mask:
+                raise InvalidHandSpecification(
+                    'Required card in hand %s is unavailable' % he_hand)
             holdem_ranges.append(HoldemHandRange([he_hand]))
+            continue
+        weights = hand_ranges.range_description_to_weights(
+            hand, dead_cards=used_cards)
+        if not any(weights):
+            raise InvalidHandSpecification(
+                'No hands possible from %s with used cards: %s' % (
+                    hand, used_cards))
+        holdem_ranges.append(
+            HoldemHandRange(weights=weights, label=prettify_range_label(hand)))
     return holdem_ranges
 
 
@@ -170,8 +340,8 @@ def compare_secondary_ranks(lhs, rhs):
         rhs: PokerHand.
 
     Returns:
-        int, -1 if the lhs hand ranks LOWER.  1 if the rhs hand ranks LOWER. 0
-            if they rank equally.
+        int, < 0 if the lhs hand ranks LOWER.  > 0 if the rhs hand ranks LOWER.
+            0 if they rank equally.
 
     Raises:
         ValueError if the hands are not of the same rank.
@@ -179,25 +349,7 @@ def compare_secondary_ranks(lhs, rhs):
     if lhs.hand_rank != rhs.hand_rank:
         raise ValueError(
             'Hands must be of the same rank to use secondary ranks')
-
-    # Special case for ace_to_five straights
-    if _is_ace_to_five_straight(lhs.sorted_ranks):
-        if _is_ace_to_five_straight(rhs.sorted_ranks):
-            return 0
-        return -1
-    elif _is_ace_to_five_straight(rhs.sorted_ranks):
-        return 1
-
-    lhs_buckets = _build_rank_buckets_from_hand(lhs)
-    lhs_rank_counts = reversed(
-            sorted((ct, rank) for rank, ct in lhs_buckets.iteritems()))
-    rhs_buckets = _build_rank_buckets_from_hand(rhs)
-    rhs_rank_counts = reversed(
-            sorted((ct, rank) for rank, ct in rhs_buckets.iteritems()))
-    for lhs_info, rhs_info in zip(lhs_rank_counts, rhs_rank_counts):
-        if lhs_info[1] != rhs_info[1]:
-            return lhs_info[1] - rhs_info[1]
-    return 0
+    return cmp(lhs.strength, rhs.strength)
 
 
 def get_hand_rank(hand):
@@ -209,161 +361,8 @@ def get_hand_rank(hand):
     Returns:
         str, key of RANKS.
     """
-    if contains_straight_flush(hand):
-        return STRAIGHT_FLUSH
-    if contains_four_of_a_kind(hand):
-        return FOUR_OF_A_KIND
-    if contains_full_house(hand):
-        return FULL_HOUSE
-    if contains_flush(hand):
-        return FLUSH
-    if contains_straight(hand):
-        return STRAIGHT
-    if contains_three_of_a_kind(hand):
-        return THREE_OF_A_KIND
-    if contains_two_pair(hand):
-        return TWO_PAIR
-    if contains_one_pair(hand):
-        return ONE_PAIR
-    return HIGH_CARD
-
-
-def _build_rank_buckets_from_hand(hand):
-    """Builds up a dict mapping rank to counts within the hand."""
-    rank_buckets = collections.defaultdict(int)
-    for c in hand.cards:
-        rank_buckets[c.rank_index] += 1
-    return rank_buckets
-
-
-def _contains_exactly_x_of_a_kind(hand, num):
-    rank_buckets = _build_rank_buckets_from_hand(hand)
-    for count in rank_buckets.itervalues():
-        if count == num:
-            return True
-    return False
-
-
-def contains_one_pair(hand):
-    """Determine if a hand contains exactly one pair.
-
-    Args:
-        hand: PokerHand.
-
-    Returns:
-        bool, indicating whether or not the hand contains exactly one pair.
-    """
-    return (_contains_exactly_x_of_a_kind(hand, 2) and
-            not contains_two_pair(hand))
-
-
-def contains_two_pair(hand):
-    """Determine if a hand contains two pair.
-
-    Args:
-        hand: PokerHand.
-
-    Returns:
-        bool, indicating whether or not the hand contains two pair.
-    """
-    rank_buckets = _build_rank_buckets_from_hand(hand)
-    has_pair = False
-    for count in rank_buckets.itervalues():
-        if count == 2:
-            if has_pair:
-                return True
-            has_pair = True
-    return False
-
-
-def contains_full_house(hand):
-    """Determine if a hand contains a full house.
-
-    Args:
-        hand: PokerHand.
-
-    Returns:
-        bool, indicating whether or not the hand contains a full house.
-    """
-
-    return (_contains_exactly_x_of_a_kind(hand, 3) and
-            _contains_exactly_x_of_a_kind(hand, 2))
-
-
-def contains_four_of_a_kind(hand):
-    """Determine if a hand contains four of a kind.
-
-    Args:
-        hand: PokerHand.
-
-    Returns:
-        bool, indicating whether or not the hand contains four of a kind.
-    """
-    return _contains_exactly_x_of_a_kind(hand, 4)
-
-
-def contains_three_of_a_kind(hand):
-    """Determine if a hand contains three of a kind.
-
-    Args:
-        hand: PokerHand.
-
-    Returns:
-        bool, indicating whether or not the hand contains three of a kind.
-    """
-    return _contains_exactly_x_of_a_kind(hand, 3)
-
-def contains_straight_flush(hand):
-    """Determine if a hand contains a straight flush.
-
-    Args:
-        hand: PokerHand.
-
-    Returns:
-        bool, indicating whether or not the hand contains a straight flush.
-    """
-    return contains_flush(hand) and contains_straight(hand)
-
-
-def contains_flush(hand):
-    """Determine if the given hand contains a flush.
-
-    Args:
-        hand: PokerHand.
-
-    Returns:
-        bool, whether or not the hand contains a flush.
-    """
-    suit_set = set(c.suit for c in hand.cards)
-    return len(suit_set) == 1
-
-
-def _is_ace_to_five_straight(sorted_ranks):
-    """Special case for the ace-to-five straight."""
-    return sorted_ranks == [2, 3, 4, 5, 14]
-
-
-def contains_straight(hand):
-    """Determine if the hand contains a straight.
-
-    Args:
-        hand: PokerHand.
-
-    Returns:
-        bool, whether or not the hand contains a straight.
-    """
-    sorted_rank_index = sorted(c.rank_index for c in hand.cards)
-
-    # Special case of the ace to five straight.
-    if _is_ace_to_five_straight(sorted_rank_index):
-        return True
-
-    expected_rank = sorted_rank_index[0] + 1
-    for rank_index in sorted_rank_index[1:]:
-        if rank_index != expected_rank:
-            return False
-        expected_rank += 1
-    return True
+    return HAND_RANK_NAMES[hand_evaluator.category_of(
+        hand_evaluator.evaluate_five([c.card_id for c in hand.cards]))]
 
 
 def get_best_hand_from_cards(cards):
@@ -373,15 +372,7 @@ def get_best_hand_from_cards(cards):
         cards: list of Cards.
 
     Returns:
-        PokerHand, the highest ranking poker hand possible, given the
+        BestHand, the highest ranking poker hand possible, given the
             collection of cards input.
     """
-    best_hand = None
-    for five_cards in itertools.combinations(cards, 5):
-        if not best_hand:
-            best_hand = PokerHand(cards=five_cards)
-            continue
-        five_card_hand = PokerHand(cards=five_cards)
-        best_hand = max(best_hand, five_card_hand)
-    return best_hand
-
+    return BestHand([c.card_id for c in cards])
@@ -28,6 +28,25 @@ class HoldemHandTest(unittest.TestCase):
         rhs_he_hand = poker_hand.HoldemHand(cards=rhs_cards)
         self.assertNotEqual(lhs_he_hand, rhs_he_hand)
 
+    def test_get_holdem_hand(self):
+        cards = [card.create_card_from_short_name(sn) for sn in ('ks', 'ah')]
+        he_hand = poker_hand.HoldemHand(cards=cards)
+
+        shared = poker_hand.get_holdem_hand(he_hand.combo_id)
+
+        self.assertEqual(he_hand, shared)
+        self.assertIs(shared, poker_hand.get_holdem_hand(he_hand.combo_id))
+        self.assertEqual('AhKs', '%r' % shared)
+
+    def test_range_from_combo_ids(self):
+        he_range = poker_hand.parse_hands_into_holdem_hands('qq')[0]
+        rebuilt = poker_hand.HoldemHandRange.from_combo_ids(
+            he_range.combo_ids, label='QQ')
+
+        self.assertEqual(he_range.possible_hands, rebuilt.possible_hands)
+        self.assertEqual(6, bin(rebuilt.combo_bitset).count('1'))
+        self.assertEqual(4, bin(rebuilt.cards_mask).count('1'))
+
 
 class PokerHandParsingTest(unittest.TestCase):
 
@@ -38,6 +57,29 @@ class PokerHandParsingTest(unittest.TestCase):
             poker_hand.parse_hands_into_holdem_hands(
                 hand_input, used_cards=used_cards)
 
+    def test_parse_hands_into_holdem_hands_repeated_card(self):
+        with self.assertRaises(poker_hand.InvalidHandSpecification):
+            poker_hand.parse_hands_into_holdem_hands('asas,kk')
+        with self.assertRaises(poker_hand.InvalidHandSpecification):
+            poker_hand.HoldemHand(
+                cards=poker_hand.parse_string_into_cards('kdkd'))
+
+    def test_parse_hands_into_holdem_hands_ranges(self):
+        he_ranges = poker_hand.parse_hands_into_holdem_hands(
+            'tt+,aks:0.5;2c3d;random')
+
+        self.assertEqual(3, len(he_ranges))
+        self.assertEqual('TT+,AKs:0.5', he_ranges[0].label)
+        self.assertEqual(30 + 4, len(he_ranges[0].possible_hands))
+        self.assertFalse(he_ranges[0].is_uniform)
+        self.assertEqual(1, len(he_ranges[1].possible_hands))
+        self.assertEqual(1326, len(he_ranges[2].combo_ids))
+        self.assertTrue(he_ranges[2].is_uniform)
+
+    def test_parse_hands_into_holdem_hands_legacy_commas(self):
+        he_ranges = poker_hand.parse_hands_into_holdem_hands('asad,kk,qq+')
+        self.assertEqual(['AsAd', 'KK', 'QQ+'], [r.label for r in he_ranges])
+
     def test_parse_hands_into_holdem_hands_impossible_pair(self):
         hand_input = 'tt'
         short_names = ['th', 'ts', 'td']
@@ -123,111 +165,16 @@ class PokerHandTest(unittest.TestCase):
         self.assertItemsEqual(
             expected_cards, poker_hand.get_best_hand_from_cards(cards).cards)
 
-    def test_contains_straight_no_straight(self):
-        short_names = ['2h', '5d', '6s', '7s', '9s']
-        hand = self._create_poker_hand_from_short_name_list(short_names)
-        self.assertFalse(poker_hand.contains_straight(hand))
-
-    def test_contains_straight_normal_straight(self):
-        short_names = ['2h', '3s', '4d', '5h', '6c']
-        hand = self._create_poker_hand_from_short_name_list(short_names)
-        self.assertTrue(poker_hand.contains_straight(hand))
-
-    def test_contains_straight_ace_to_five(self):
-        short_names = ['2h', '3s', '4d', '5h', 'ac']
-        hand = self._create_poker_hand_from_short_name_list(short_names)
-        self.assertTrue(poker_hand.contains_straight(hand))
-
-    def test_contains_straight_invalid_wrap(self):
-        short_names = ['qh', 'kh', 'as', '2d', '3c']
-        hand = self._create_poker_hand_from_short_name_list(short_names)
-        self.assertFalse(poker_hand.contains_straight(hand))
-
-    def test_contains_flush_with_flush(self):
-        short_names = ['2h', '3h', '4h', '5h', 'qh']
-        hand = self._create_poker_hand_from_short_name_list(short_names)
-        self.assertTrue(poker_hand.contains_flush(hand))
-
-    def test_contains_flush_no_flush(self):
-        short_names = ['2h', '3h', '4c', '5h', 'qh']
-        hand = self._create_poker_hand_from_short_name_list(short_names)
-        self.assertFalse(poker_hand.contains_flush(hand))
-
-    def test_contains_straight_flush_no_straight_flush(self):
-        short_names = ['2h', '3h', '4h', '5h', 'qh']
-        hand = self._create_poker_hand_from_short_name_list(short_names)
-        self.assertFalse(poker_hand.contains_straight_flush(hand))
-
-    def test_contains_straight_flush_straight_flush(self):
-        short_names = ['2h', '3h', '4h', '5h', '6h']
-        hand = self._create_poker_hand_from_short_name_list(short_names)
-        self.assertTrue(poker_hand.contains_straight_flush(hand))
-
-    def test_contains_four_of_a_kind_with_four_of_a_kind(self):
-        short_names = ['2h', '2c', '2d', '2s', '6h']
-        hand = self._create_poker_hand_from_short_name_list(short_names)
-        self.assertTrue(poker_hand.contains_four_of_a_kind(hand))
-
-    def test_contains_four_of_a_kind_no_four_of_a_kind(self):
-        short_names = ['2h', '2c', '2d', '3s', '6h']
-        hand = self._create_poker_hand_from_short_name_list(short_names)
-        self.assertFalse(poker_hand.contains_four_of_a_kind(hand))
-
-    def test_contains_three_of_a_kind_with_three_of_a_kind(self):
-        short_names = ['2h', '2c', '2d', '3s', '6h']
-        hand = self._create_poker_hand_from_short_name_list(short_names)
-        self.assertTrue(poker_hand.contains_three_of_a_kind(hand))
-
-    def test_contains_three_of_a_kind_with_four_of_a_kind(self):
-        """Note that this should return false since we want exact counts"""
-        short_names = ['2h', '2c', '2d', '2s', '6h']
-        hand = self._create_poker_hand_from_short_name_list(short_names)
-        self.assertFalse(poker_hand.contains_three_of_a_kind(hand))
-
-    def test_contains_three_of_a_kind_no_three_of_a_kind(self):
-        short_names = ['ah', 'jc', '2d', '2s', '6h']
-        hand = self._create_poker_hand_from_short_name_list(short_names)
-        self.assertFalse(poker_hand.contains_three_of_a_kind(hand))
-
-    def test_contains_full_house_with_full_house(self):
-        short_names = ['ah', 'ac', '2d', '2s', '2h']
-        hand = self._create_poker_hand_from_short_name_list(short_names)
-        self.assertTrue(poker_hand.contains_full_house(hand))
-
-    def test_contains_full_house_with_three_of_a_kind_only(self):
-        short_names = ['ah', 'jc', '2d', '2s', '2h']
-        hand = self._create_poker_hand_from_short_name_list(short_names)
-        self.assertFalse(poker_hand.contains_full_house(hand))
-
-    def test_contains_full_house_with_two_pair_only(self):
-        short_names = ['ah', 'jc', '2d', '2s', '8h']
-        hand = self._create_poker_hand_from_short_name_list(short_names)
-        self.assertFalse(poker_hand.contains_full_house(hand))
-
-    def test_contains_two_pair_with_two_pair(self):
-        short_names = ['ah', '8c', '2d', '2s', '8h']
-        hand = self._create_poker_hand_from_short_name_list(short_names)
-        self.assertTrue(poker_hand.contains_two_pair(hand))
-
-    def test_contains_two_pair_with_one_pair(self):
-        short_names = ['ah', '8c', '2d', '2s', '9h']
-        hand = self._create_poker_hand_from_short_name_list(short_names)
-        self.assertFalse(poker_hand.contains_two_pair(hand))
-
-    def test_contains_two_pair_with_no_pair(self):
-        short_names = ['ah', '8c', 'qd', '2s', '9h']
-        hand = self._create_poker_hand_from_short_name_list(short_names)
-        self.assertFalse(poker_hand.contains_two_pair(hand))
-
-    def test_contains_one_pair_with_one_pair(self):
-        short_names = ['ah', '8c', 'qd', '8s', '9h']
-        hand = self._create_poker_hand_from_short_name_list(short_names)
-        self.assertTrue(poker_hand.contains_one_pair(hand))
+    def test_get_best_hand_from_cards_rank_and_strength(self):
+        short_names = ['ah', 'kh', '2h', '7h', '9c', '9d', '9h']
+        cards = [card.create_card_from_short_name(s) for s in short_names]
 
-    def test_contains_one_pair_with_two_pair(self):
-        short_names = ['9d', '8c', 'qd', '8s', '9h']
-        hand = self._create_poker_hand_from_short_name_list(short_names)
-        self.assertFalse(poker_hand.contains_one_pair(hand))
+        best_hand = poker_hand.get_best_hand_from_cards(cards)
+        expected_hand = self._create_poker_hand_from_short_name_list(
+            ['ah', 'kh', '2h', '7h', '9h'])
+        self.assertEqual(poker_hand.FLUSH, best_hand.hand_rank)
+        self.assertEqual(expected_hand, best_hand)
+        self.assertItemsEqual(expected_hand.cards, best_hand.cards)
 
     def test_get_hand_rank_straight_flush(self):
         short_names = ['2h', '3h', '4h', '5h', '6h']
@@ -0,0 +1,316 @@
+"""Precomputed exact heads-up preflop equities, stored in a binary file.
+
+Every pair of disjoint starting hands is reduced to a canonical matchup by suit
+symmetry and player order, so matchups that only differ in how their suits
+overlap are still stored separately.  The file holds one fixed size record per
+canonical matchup, sorted by key, and is memory-mapped and binary searched at
+query time.
+
+Build the table with:
+    $ python preflop_table.py --output preflop_equity.bin --workers 32
+"""
+import argparse
+import itertools
+import mmap
+import multiprocessing
+import os
+import struct
+import sys
+import time
+
+import card
+import monte_carlo_runner
+import poker_hand
+import suit_isomorphism
+
+DEFAULT_TABLE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'preflop_equity.bin')
+# Strategy reported for spots answered from a table.
+LOOKUP_STRATEGY = 'preflop_table'
+
+MAGIC = 'HEPF'
+VERSION = 1
+# Magic, version, number of records, outcomes per matchup.
+_HEADER = struct.Struct('<4sIII')
+# Matchup key, first player's wins, second player's wins.  Ties are whatever
+# is left of the outcomes.
+_RECORD = struct.Struct('<III')
+
+
+class Error(Exception):
+    pass
+
+
+class InvalidTableError(Error):
+    """Raised if a table file is not in the expected format."""
+
+
+def _pack_key(card_ids):
+    key = 0
+    for card_id in card_ids:
+        key = (key << 6) | card_id
+    return key
+
+
+def canonical_matchup(hand0_ids, hand1_ids):
+    """Maps a heads-up matchup to its canonical form.
+
+    Args:
+        hand0_ids: pair of int, the first player's card ids.
+        hand1_ids: pair of int, the second player's card ids.
+
+    Returns:
+        (int, bool): the packed key of the canonical matchup, and whether the
+            players are swapped relative to it.
+    """
+    best = None
+    for perm in suit_isomorphism.SUIT_PERMUTATIONS:
+        first = suit_isomorphism.permute_cards(hand0_ids, perm)
+        second = suit_isomorphism.permute_cards(hand1_ids, perm)
+        swapped = second < first
+        candidate = (second + first, True) if swapped else (
+            first + second, False)
+        if best is None or candidate[0] < best[0]:
+            best = candidate
+    return _pack_key(best[0]), best[1]
+
+
+def _suit_normal_form(card_ids):
+    """Relabels suits in order of first appearance.
+
+    The same cards in the same order under any suit permutation share a
+    form, which has the same canonical matchup as each of them.
+
+    Args:
+        card_ids: tuple of int card ids.
+
+    Returns:
+        tuple of int card ids.
+    """
+    suits = {}
+    form = []
+    for card_id in card_ids:
+        suit = suits.setdefault(card_id & 3, len(suits))
+        form.append((card_id & ~3) | suit)
+    return tuple(form)
+
+
+def iter_canonical_matchups():
+    """Yields the card ids of every canonical heads-up matchup once.
+
+    Yields:
+        tuple of four int: the first hand's two card ids then the second's.
+    """
+    seen = set()
+    for hand0 in itertools.combinations(xrange(card.NUM_CARDS), 2):
+        for hand1 in itertools.combinations(xrange(card.NUM_CARDS), 2):
+            if set(hand0) & set(hand1):
+                continue
+            key, _ = canonical_matchup(hand0, hand1)
+            if key in seen:
+                continue
+            seen.add(key)
+            yield hand0 + hand1
+
+
+def compute_matchup(card_ids):
+    """Enumerates every board for one matchup.
+
+    Args:
+        card_ids: tuple of four int, the two hands' card ids.
+
+    Returns:
+        tuple of (key, first player's wins, second player's wins, outcomes).
+    """
+    holdem_ranges = [
+        poker_hand.HoldemHandRange([poker_hand.HoldemHand(
+            cards=[card.get_card_by_id(i) for i in card_ids[start:start + 2]])])
+        for start in (0, 2)]
+    runner = monte_carlo_runner.MonteCarloRunner(
+        holdem_ranges, strategy=monte_carlo_runner.EXHAUSTIVE_STRATEGY)
+    runner.run()
+    wins = [sum(result_dict[monte_carlo_runner.WIN_RESULT]
+                for result_dict in stats.counts.itervalues())
+            for stats in runner.player_stats]
+    key, _ = canonical_matchup(card_ids[:2], card_ids[2:])
+    return key, wins[0], wins[1], runner.iterations
+
+
+def write_table(path, records, outcomes_per_matchup):
+    """Writes matchup records to path.
+
+    Args:
+        path: str, output file.
+        records: iterable of (key, wins0, wins1) tuples.
+        outcomes_per_matchup: int, number of boards each matchup covers.
+    """
+    records = sorted(records)
+    with open(path, 'wb') as output:
+        output.write(_HEADER.pack(
+            MAGIC, VERSION, len(records), outcomes_per_matchup))
+        for record in records:
+            output.write(_RECORD.pack(*record))
+
+
+def build_table(path, workers=1, limit=None):
+    """Computes every canonical matchup and writes the table.
+
+    Args:
+        path: str, output file.
+        workers: int, number of processes to compute matchups with.
+        limit: int or None, only compute this many matchups.  Useful for
+            trying out the build.
+    """
+    matchups = iter_canonical_matchups()
+    if limit:
+        matchups = itertools.islice(matchups, limit)
+
+    if workers > 1:
+        pool = multiprocessing.Pool(workers)
+        results = pool.imap_unordered(compute_matchup, matchups, chunksize=4)
+    else:
+        pool = None
+        results = itertools.imap(compute_matchup, matchups)
+
+    records = []
+    outcomes_per_matchup = 0
+    start_time = time.time()
+    for key, wins0, wins1, outcomes in results:
+        records.append((key, wins0, wins1))
+        outcomes_per_matchup = outcomes
+        if len(records) % 100 == 0:
+            print >> sys.stderr, 'Computed %d matchups in %0.1f seconds' % (
+                len(records), time.time() - start_time)
+    if pool:
+        pool.close()
+        pool.join()
+    write_table(path, records, outcomes_per_matchup)
+
+
+class PreflopTable(object):
+    """Read-only, memory-mapped view of a table written by write_table."""
+    def __init__(self, path):
+        """Initializer.
+
+        Raises:
+            InvalidTableError if the file is not a complete table.
+        """
+        self._file = open(path, 'rb')
+        self._data = None
+        try:
+            # mmap cannot map an empty file, so check the size first.
+            if os.fstat(self._file.fileno()).st_size < _HEADER.size:
+                raise InvalidTableError('Table %s is truncated' % path)
+            self._data = mmap.mmap(
+                self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, self.num_records, self.outcomes_per_matchup = (
+                _HEADER.unpack_from(self._data, 0))
+            if magic != MAGIC or version != VERSION:
+                raise InvalidTableError('%s is not a preflop table' % path)
+            if len(self._data) != (
+                    _HEADER.size + self.num_records * _RECORD.size):
+                raise InvalidTableError('Table %s is truncated' % path)
+        except InvalidTableError:
+            self.close()
+            raise
+
+    def close(self):
+        if self._data is not None:
+            self._data.close()
+        self._file.close()
+
+    def _find(self, key):
+        """Binary search for key; returns (wins0, wins1) or None."""
+        low, high = 0, self.num_records
+        while low < high:
+            middle = (low + high) // 2
+            record_key, wins0, wins1 = _RECORD.unpack_from(
+                self._data, _HEADER.size + middle * _RECORD.size)
+            if record_key < key:
+                low = middle + 1
+            elif record_key > key:
+                high = middle
+            else:
+                return wins0, wins1
+        return None
+
+    def lookup(self, hand0, hand1):
+        """Exact equities of one heads-up matchup.
+
+        Args:
+            hand0: HoldemHand.
+            hand1: HoldemHand.
+
+        Returns:
+            (float, float), each hand's equity, or None if the matchup is not
+                in the table.
+        """
+        return self._lookup_ids(hand0.card_ids, hand1.card_ids)
+
+    def _lookup_ids(self, hand0_ids, hand1_ids):
+        """Like lookup, for the hands' card ids."""
+        key, swapped = canonical_matchup(hand0_ids, hand1_ids)
+        found = self._find(key)
+        if found is None:
+            return None
+        wins0, wins1 = found
+        if swapped:
+            wins0, wins1 = wins1, wins0
+        half_ties = (self.outcomes_per_matchup - wins0 - wins1) / 2.0
+        total = float(self.outcomes_per_matchup)
+        return (wins0 + half_ties) / total, (wins1 + half_ties) / total
+
+    def lookup_ranges(self, range0, range1):
+        """Exact equities of two ranges, weighting disjoint pairs by hand weight.
+
+        Args:
+            range0: HoldemHandRange.
+            range1: HoldemHandRange.
+
+        Returns:
+            (float, float), each range's equity, or None if no pair of hands is
+                disjoint or any matchup is missing from the table.
+        """
+        total0 = total1 = total_weight = 0.0
+        # Equities by suit normal form, so that each matchup is made
+        # canonical once rather than once per pair of combos.
+        equities_by_form = {}
+        for hand0, weight0 in zip(range0.possible_hands, range0.hand_weights):
+            for hand1, weight1 in zip(range1.possible_hands,
+                                      range1.hand_weights):
+                if hand0.mask & hand1.mask:
+                    continue
+                form = _suit_normal_form(hand0.card_ids + hand1.card_ids)
+                equities = equities_by_form.get(form)
+                if equities is None:
+                    equities = self._lookup_ids(form[:2], form[2:])
+                    if equities is None:
+                        return None
+                    equities_by_form[form] = equities
+                weight = weight0 * weight1
+                total0 += weight * equities[0]
+                total1 += weight * equities[1]
+                total_weight += weight
+        if not total_weight:
+            return None
+        return total0 / total_weight, total1 / total_weight
+
+
+def _build_argparse():
+    parser = argparse.ArgumentParser(
+        description='Build the heads-up preflop equity table.')
+    parser.add_argument(
+        '--output', help='Where to write the table.',
+        type=str, default=DEFAULT_TABLE_PATH)
+    parser.add_argument(
+        '--workers', help='Number of processes to compute matchups with.',
+        type=int, default=multiprocessing.cpu_count())
+    parser.add_argument(
+        '--limit', help='Only compute this many matchups.',
+        type=int, default=None)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = _build_argparse()
+    build_table(args.output, workers=args.workers, limit=args.limit)
@@ -0,0 +1,101 @@
+"""Tests for preflop_table.py"""
+# pylint: disable=missing-docstring
+import os
+import shutil
+import tempfile
+import unittest
+
+import poker_hand
+import preflop_table
+
+
+def _hand(card_input):
+    return poker_hand.HoldemHand(
+        cards=poker_hand.parse_string_into_cards(card_input))
+
+
+def _ids(card_input):
+    return _hand(card_input).card_ids
+
+
+class CanonicalMatchupTest(unittest.TestCase):
+
+    def test_suit_permutations_share_a_key(self):
+        lhs, _ = preflop_table.canonical_matchup(_ids('asks'), _ids('qdqh'))
+        rhs, _ = preflop_table.canonical_matchup(_ids('ahkh'), _ids('qsqc'))
+        self.assertEqual(lhs, rhs)
+
+    def test_player_swap(self):
+        lhs, lhs_swapped = preflop_table.canonical_matchup(
+            _ids('asks'), _ids('qdqh'))
+        rhs, rhs_swapped = preflop_table.canonical_matchup(
+            _ids('qdqh'), _ids('asks'))
+        self.assertEqual(lhs, rhs)
+        self.assertNotEqual(lhs_swapped, rhs_swapped)
+
+    def test_suit_overlap_is_kept_separate(self):
+        dominated, _ = preflop_table.canonical_matchup(
+            _ids('asks'), _ids('qsqh'))
+        free, _ = preflop_table.canonical_matchup(_ids('asks'), _ids('qdqh'))
+        self.assertNotEqual(dominated, free)
+
+
+class PreflopTableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'table.bin')
+        key, swapped = preflop_table.canonical_matchup(
+            _ids('asks'), _ids('qdqh'))
+        wins_ak, wins_qq = 700, 280
+        if swapped:
+            wins_ak, wins_qq = wins_qq, wins_ak
+        preflop_table.write_table(self.path, [(key, wins_ak, wins_qq)], 1000)
+        self.table = preflop_table.PreflopTable(self.path)
+
+    def tearDown(self):
+        self.table.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_lookup(self):
+        equities = self.table.lookup(_hand('ahkh'), _hand('qsqc'))
+        self.assertAlmostEqual(0.71, equities[0])
+        self.assertAlmostEqual(0.29, equities[1])
+
+    def test_lookup_swapped(self):
+        equities = self.table.lookup(_hand('qsqc'), _hand('ahkh'))
+        self.assertAlmostEqual(0.29, equities[0])
+        self.assertAlmostEqual(0.71, equities[1])
+
+    def test_lookup_missing(self):
+        self.assertIsNone(self.table.lookup(_hand('2c2d'), _hand('3c3d')))
+
+    def test_lookup_ranges_missing_matchup(self):
+        ranges = poker_hand.parse_hands_into_holdem_hands('aks,qq')
+        self.assertIsNone(self.table.lookup_ranges(*ranges))
+
+    def test_lookup_ranges(self):
+        # Every combo pair is a suit permutation of the stored matchup.
+        ranges = poker_hand.parse_hands_into_holdem_hands('AsKs,AcKc;QdQh')
+        equities = self.table.lookup_ranges(*ranges)
+        self.assertAlmostEqual(0.71, equities[0])
+        self.assertAlmostEqual(0.29, equities[1])
+
+    def test_invalid_file(self):
+        with open(self.path, 'wb') as output:
+            output.write('not a table')
+        with self.assertRaises(preflop_table.InvalidTableError):
+            preflop_table.PreflopTable(self.path)
+
+    def test_empty_and_truncated_files(self):
+        with open(self.path, 'rb') as table_file:
+            contents = table_file.read()
+        for truncated in ('', contents[:-1]):
+            with open(self.path, 'wb') as output:
+                output.write(truncated)
+            with self.assertRaises(preflop_table.InvalidTableError):
+                preflop_table.PreflopTable(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
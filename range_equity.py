@@ -0,0 +1,357 @@
+"""Heads-up range against range equity without dealing matchups.
+
+Each board is scored once for every live combo of both ranges.  With the
+opposing combos sorted by strength, the weight a combo beats is a prefix sum
+over them, less the opposing combos that share one of its cards; ties are
+handled the same way within its strength.  The identical combo in the other
+range is subtracted for both of its cards, so it is added back once.  This
+costs a sort per board instead of an evaluation per matchup.
+
+Boards are enumerated when there are few enough of them, and sampled
+uniformly otherwise.  Every board is weighted equally, which weights every
+card-disjoint (combo, combo, board) triple equally, exactly as dealing would.
+"""
+import itertools
+import random
+
+import batch_evaluator
+import card
+import combos
+import exhaustive_enumerator
+import hand_evaluator
+import poker_hand
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Boards are enumerated when there are at most this many, else sampled.
+DEFAULT_MAX_BOARDS = 20000
+# Boards scored together in one NumPy batch.
+DEFAULT_CHUNK_SIZE = 256
+# Every strength is below this, so sort keys can pack a board, a card and a
+# strength into one integer.
+_STRENGTH_RANGE = (
+    (hand_evaluator.STRAIGHT_FLUSH + 1) << hand_evaluator.CATEGORY_SHIFT)
+
+
+class Error(Exception):
+    pass
+
+
+class _Player(object):
+    """One range's combos and the totals gathered for each of them."""
+    def __init__(self, holdem_range, excluded_mask):
+        pairs = [(combo_id, weight) for combo_id, weight in zip(
+                     holdem_range.combo_ids, holdem_range.hand_weights)
+                 if not combos.COMBO_MASKS[combo_id] & excluded_mask]
+        if not pairs:
+            raise Error('No hand of range %s is available' % holdem_range)
+        self.holdem_range = holdem_range
+        self.combo_ids = [combo_id for combo_id, _ in pairs]
+        self.weights = [weight for _, weight in pairs]
+        self.card_ids = [combos.COMBO_CARD_IDS[c] for c in self.combo_ids]
+        self.masks = [combos.COMBO_MASKS[c] for c in self.combo_ids]
+        self.weight_by_combo = dict(pairs)
+        # Opposing weight beaten, with ties counting half, and opposing weight
+        # faced, summed over boards for each combo.
+        self.shares = [0.0] * len(pairs)
+        self.matchups = [0.0] * len(pairs)
+
+    def combo_equities(self):
+        """list of (HoldemHand, weight, equity or None) for each combo."""
+        return [(poker_hand.get_holdem_hand(combo_id), weight,
+                 share / matchups if matchups else None)
+                for combo_id, weight, share, matchups in zip(
+                    self.combo_ids, self.weights, self.shares, self.matchups)]
+
+    def equity(self):
+        shares = sum(w * s for w, s in zip(self.weights, self.shares))
+        matchups = sum(w * m for w, m in zip(self.weights, self.matchups))
+        if not matchups:
+            raise Error('The ranges have no card-disjoint matchups')
+        return shares / matchups
+
+
+class RangeEquityResult(object):
+    """Aggregate and per-combo equities of two ranges.
+
+    Attributes:
+        holdem_ranges: list of HoldemHandRange.
+        equities: list of float, each range's equity.
+        combo_equities: list with, for each range, a list of (HoldemHand,
+            weight, equity) for its combos.  The equity is None for combos
+            that never had an opponent.
+        num_boards: int, the number of boards scored.
+        exhaustive: bool, whether every board was enumerated.
+    """
+    CSV_FIELDS = ['player', 'range', 'combo', 'weight', 'equity',
+                  'range_equity', 'boards', 'exhaustive']
+
+    def __init__(self, holdem_ranges, players, num_boards, exhaustive):
+        self.holdem_ranges = holdem_ranges
+        self.equities = [player.equity() for player in players]
+        self.combo_equities = [player.combo_equities() for player in players]
+        self.num_boards = num_boards
+        self.exhaustive = exhaustive
+
+    def to_dict(self):
+        """dict, the result as plain JSON compatible values."""
+        return {
+            'players': [
+                {'range': '%r' % he_range, 'equity': equity,
+                 'combos': [{'combo': '%r' % he_hand, 'weight': weight,
+                             'equity': combo_equity}
+                            for he_hand, weight, combo_equity
+                            in combo_equities]}
+                for he_range, equity, combo_equities in zip(
+                    self.holdem_ranges, self.equities, self.combo_equities)],
+            'boards': self.num_boards,
+            'exhaustive': self.exhaustive,
+        }
+
+    def csv_rows(self):
+        """list of dict, one CSV row per combo, keyed by CSV_FIELDS."""
+        rows = []
+        for index, (he_range, equity, combo_equities) in enumerate(zip(
+                self.holdem_ranges, self.equities, self.combo_equities)):
+            for he_hand, weight, combo_equity in combo_equities:
+                rows.append({
+                    'player': index, 'range': '%r' % he_range,
+                    'combo': '%r' % he_hand, 'weight': weight,
+                    'equity': combo_equity, 'range_equity': equity,
+                    'boards': self.num_boards, 'exhaustive': self.exhaustive})
+        return rows
+
+    def print_report(self):
+        """Prints the equity of each range and of each of its combos."""
+        if self.exhaustive:
+            print 'Enumerated all %d boards exactly\n' % self.num_boards
+        else:
+            print 'Sampled %d boards\n' % self.num_boards
+        print 'Overall Equity'
+        for index, (he_range, equity) in enumerate(
+                zip(self.holdem_ranges, self.equities)):
+            print 'P%s)  %-15s %0.3f' % (index, '%r' % he_range, equity)
+        for index, combo_equities in enumerate(self.combo_equities):
+            print '\n' + '=' * 20 + ' P%s combos ' % index + '=' * 20
+            ranked = sorted(combo_equities, key=lambda c: c[2], reverse=True)
+            for he_hand, weight, equity in ranked:
+                if equity is None:
+                    continue
+                print '%-8s%0.2f\t%0.3f' % ('%r' % he_hand, weight, equity)
+
+
+def _iter_board_chunks(board_ids, dead_ids, max_boards, chunk_size, rng):
+    """Yields chunks of complete boards, all of them or max_boards samples.
+
+    Yields:
+        list of tuple of int, up to chunk_size boards of five card ids.
+    """
+    excluded = set(board_ids) | set(dead_ids)
+    live_ids = [i for i in xrange(card.NUM_CARDS) if i not in excluded]
+    num_missing = 5 - len(board_ids)
+    board_ids = tuple(board_ids)
+    if (exhaustive_enumerator.count_runouts(len(live_ids), len(board_ids)) <=
+            max_boards):
+        runouts = itertools.combinations(live_ids, num_missing)
+    else:
+        runouts = (tuple(rng.sample(live_ids, num_missing))
+                   for _ in xrange(max_boards))
+    while True:
+        chunk = [board_ids + r for r in itertools.islice(runouts, chunk_size)]
+        if not chunk:
+            return
+        yield chunk
+
+
+def _sweep(hero, hero_live, hero_strengths, villain, villain_live,
+           villain_strengths):
+    """Adds one board's shares and matchups to every live hero combo."""
+    groups = {}
+    total = 0.0
+    card_totals = [0.0] * card.NUM_CARDS
+    for index, strength in zip(villain_live, villain_strengths):
+        weight = villain.weights[index]
+        group = groups.get(strength)
+        if group is None:
+            group = groups[strength] = [0.0, {}]
+        group[0] += weight
+        for card_id in villain.card_ids[index]:
+            group[1][card_id] = group[1].get(card_id, 0.0) + weight
+            card_totals[card_id] += weight
+        total += weight
+    group_strengths = sorted(groups)
+
+    below = 0.0
+    below_cards = [0.0] * card.NUM_CARDS
+    next_group = 0
+    for strength, index in sorted(zip(hero_strengths, hero_live)):
+        while (next_group < len(group_strengths) and
+               group_strengths[next_group] < strength):
+            group_total, group_cards = groups[group_strengths[next_group]]
+            below += group_total
+            for card_id, weight in group_cards.iteritems():
+                below_cards[card_id] += weight
+            next_group += 1
+        equal, equal_cards = groups.get(strength, (0.0, {}))
+        card1, card2 = hero.card_ids[index]
+        same = villain.weight_by_combo.get(hero.combo_ids[index], 0.0)
+        wins = below - below_cards[card1] - below_cards[card2]
+        ties = (equal - equal_cards.get(card1, 0.0) -
+                equal_cards.get(card2, 0.0) + same)
+        hero.shares[index] += wins + ties / 2.0
+        hero.matchups[index] += (total - card_totals[card1] -
+                                 card_totals[card2] + same)
+
+
+def _score(player, board, board_mask):
+    """The live combos on a hand_evaluator.BoardAnalysis and strengths."""
+    live = [i for i, mask in enumerate(player.masks) if not mask & board_mask]
+    return live, [board.evaluate(player.card_ids[i]) for i in live]
+
+
+def _run_scalar(players, boards):
+    for board_ids in boards:
+        board_mask = 0
+        for card_id in board_ids:
+            board_mask |= 1 << card_id
+        board = hand_evaluator.BoardAnalysis(board_ids)
+        scores = [_score(player, board, board_mask) for player in players]
+        for hero, villain, hero_scores, villain_scores in (
+                (players[0], players[1], scores[0], scores[1]),
+                (players[1], players[0], scores[1], scores[0])):
+            _sweep(hero, hero_scores[0], hero_scores[1], villain,
+                   villain_scores[0], villain_scores[1])
+
+
+class _BatchPlayer(object):
+    """NumPy arrays of a _Player's combos."""
+    def __init__(self, player):
+        self.player = player
+        self.hole_cards = numpy.array(player.card_ids, dtype=numpy.int64)
+        self.weights = numpy.array(player.weights, dtype=numpy.float64)
+        self.shares = numpy.zeros(len(player.weights))
+        self.matchups = numpy.zeros(len(player.weights))
+
+    def score(self, boards):
+        """(strengths, live) arrays of shape (num_boards, num_combos)."""
+        strengths, _ = batch_evaluator.evaluate_batch(self.hole_cards, boards)
+        live = ~(self.hole_cards[numpy.newaxis, :, :, numpy.newaxis] ==
+                 boards[:, numpy.newaxis, numpy.newaxis, :]).any(axis=(2, 3))
+        return strengths, live
+
+    def same_weights(self, villain):
+        """The villain's weight of each of this player's combos."""
+        return numpy.array(
+            [villain.player.weight_by_combo.get(c, 0.0)
+             for c in self.player.combo_ids], dtype=numpy.float64)
+
+
+def _prefix_sums(keys, weights):
+    """Sorted keys and the running weight totals before each position."""
+    order = numpy.argsort(keys, kind='mergesort')
+    cumulative = numpy.concatenate(([0.0], numpy.cumsum(weights[order])))
+    return keys[order], cumulative
+
+
+def _sweep_batch(hero, hero_scores, villain, villain_scores, same):
+    """Adds a batch of boards' shares and matchups to the hero's combos."""
+    hero_strengths, hero_live = hero_scores
+    villain_strengths, villain_live = villain_scores
+    num_boards = hero_strengths.shape[0]
+    boards = numpy.arange(num_boards, dtype=numpy.int64)[:, numpy.newaxis]
+    villain_weights = numpy.where(
+        villain_live, villain.weights[numpy.newaxis, :], 0.0)
+
+    keys, cumulative = _prefix_sums(
+        (boards * _STRENGTH_RANGE + villain_strengths).ravel(),
+        villain_weights.ravel())
+    queries = boards * _STRENGTH_RANGE + hero_strengths
+    start = cumulative[numpy.searchsorted(keys, boards * _STRENGTH_RANGE)]
+    lower = cumulative[numpy.searchsorted(keys, queries)]
+    upper = cumulative[numpy.searchsorted(keys, queries, side='right')]
+    wins = lower - start
+    ties = upper - lower + same
+    matchups = villain_weights.sum(axis=1)[:, numpy.newaxis] + same
+
+    # The same sums restricted to villain combos holding a given card.
+    card_boards = boards[:, :, numpy.newaxis] * card.NUM_CARDS
+    keys, cumulative = _prefix_sums(
+        ((card_boards + villain.hole_cards[numpy.newaxis]) * _STRENGTH_RANGE +
+         villain_strengths[:, :, numpy.newaxis]).ravel(),
+        numpy.repeat(villain_weights.ravel(), 2))
+    for slot in xrange(2):
+        base = (boards * card.NUM_CARDS + hero.hole_cards[:, slot]) * (
+            _STRENGTH_RANGE)
+        start = cumulative[numpy.searchsorted(keys, base)]
+        end = cumulative[numpy.searchsorted(keys, base + _STRENGTH_RANGE)]
+        lower = cumulative[numpy.searchsorted(keys, base + hero_strengths)]
+        upper = cumulative[numpy.searchsorted(
+            keys, base + hero_strengths, side='right')]
+        wins -= lower - start
+        ties -= upper - lower
+        matchups -= end - start
+
+    hero.shares += numpy.where(hero_live, wins + ties / 2.0, 0.0).sum(axis=0)
+    hero.matchups += numpy.where(hero_live, matchups, 0.0).sum(axis=0)
+
+
+def _run_batched(players, board_chunks):
+    batch_players = [_BatchPlayer(player) for player in players]
+    same = [batch_players[0].same_weights(batch_players[1]),
+            batch_players[1].same_weights(batch_players[0])]
+    for boards in board_chunks:
+        boards = numpy.array(boards, dtype=numpy.int64)
+        scores = [p.score(boards) for p in batch_players]
+        for hero, villain in ((0, 1), (1, 0)):
+            _sweep_batch(batch_players[hero], scores[hero],
+                         batch_players[villain], scores[villain], same[hero])
+    for batch_player in batch_players:
+        batch_player.player.shares = batch_player.shares.tolist()
+        batch_player.player.matchups = batch_player.matchups.tolist()
+
+
+def range_equity(holdem_ranges, board_cards=None, dead_cards=None,
+                 max_boards=DEFAULT_MAX_BOARDS, seed=None,
+                 chunk_size=DEFAULT_CHUNK_SIZE):
+    """Computes the equity of two ranges and of each of their combos.
+
+    Args:
+        holdem_ranges: list of two HoldemHandRange.
+        board_cards: list of Card or None, cards already on the board.
+        dead_cards: list of Card or None, cards out of play.
+        max_boards: int, enumerate every board if there are at most this many,
+            otherwise sample this many.
+        seed: hashable or None, seed for sampling boards.
+        chunk_size: int, boards scored at a time with NumPy.
+
+    Returns:
+        RangeEquityResult.
+
+    Raises:
+        Error if there are not two ranges or they cannot face each other.
+    """
+    if len(holdem_ranges) != 2:
+        raise Error('Range equity needs exactly two ranges, got %d' %
+                    len(holdem_ranges))
+    board_ids = [c.card_id for c in board_cards or ()]
+    dead_ids = [c.card_id for c in dead_cards or ()]
+    excluded_mask = 0
+    for card_id in board_ids + dead_ids:
+        excluded_mask |= 1 << card_id
+    players = [_Player(her, excluded_mask) for her in holdem_ranges]
+
+    num_live = card.NUM_CARDS - len(board_ids) - len(dead_ids)
+    num_boards = exhaustive_enumerator.count_runouts(num_live, len(board_ids))
+    exhaustive = num_boards <= max_boards
+    board_chunks = _iter_board_chunks(
+        board_ids, dead_ids, max_boards, chunk_size, random.Random(seed))
+    if batch_evaluator.AVAILABLE:
+        _run_batched(players, board_chunks)
+    else:
+        _run_scalar(players, itertools.chain.from_iterable(board_chunks))
+    return RangeEquityResult(holdem_ranges, players,
+                             num_boards if exhaustive else max_boards,
+                             exhaustive)
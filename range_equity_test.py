@@ -0,0 +1,90 @@
+"""Tests for range_equity.py"""
+import unittest
+
+import batch_evaluator
+import monte_carlo_runner
+import poker_hand
+import range_equity
+
+
+def _exhaustive_equities(hands, board):
+    mcr = monte_carlo_runner.MonteCarloRunner(
+        poker_hand.parse_hands_into_holdem_hands(hands),
+        board_cards=poker_hand.parse_string_into_cards(board),
+        strategy=monte_carlo_runner.EXHAUSTIVE_STRATEGY)
+    mcr._run_exhaustive()
+    return [mcr.win_stats[idx] / mcr.iterations for idx in xrange(2)]
+
+
+class RangeEquityTest(unittest.TestCase):
+    def assertMatchesRunner(self, hands, board):
+        result = range_equity.range_equity(
+            poker_hand.parse_hands_into_holdem_hands(hands),
+            board_cards=poker_hand.parse_string_into_cards(board))
+        self.assertTrue(result.exhaustive)
+        for expected, equity in zip(_exhaustive_equities(hands, board),
+                                    result.equities):
+            self.assertAlmostEqual(expected, equity)
+        return result
+
+    def test_overlapping_ranges(self):
+        self.assertMatchesRunner('kk;aks', '2c7d9h')
+
+    def test_shared_combos_and_ties(self):
+        self.assertMatchesRunner('tt+,aqs+;22-55,kqs,aks', '2c7d9hjs')
+
+    def test_without_numpy_matches(self):
+        available = batch_evaluator.AVAILABLE
+        batch_evaluator.AVAILABLE = False
+        try:
+            self.assertMatchesRunner('aa,kk;ak', 'kd7d2c')
+        finally:
+            batch_evaluator.AVAILABLE = available
+
+    def test_combo_equities(self):
+        result = self.assertMatchesRunner('asah,kk;kk', 'ks7d2c3h')
+
+        combo_equities = dict(
+            ('%r' % he_hand, equity)
+            for he_hand, _, equity in result.combo_equities[0])
+        # Every pair of kings left has a set, so aces need one of the two
+        # remaining aces on the river.
+        self.assertAlmostEqual(2.0 / 44, combo_equities['AsAh'])
+        # With three kings left, any two pairs of kings share a card.
+        kings = [equity for name, equity in combo_equities.iteritems()
+                 if name.startswith('K')]
+        self.assertEqual([None] * 3, kings)
+
+    def test_to_dict_and_csv_rows(self):
+        result = range_equity.range_equity(
+            poker_hand.parse_hands_into_holdem_hands('aks;qq'),
+            board_cards=poker_hand.parse_string_into_cards('kd7d2c'))
+
+        record = result.to_dict()
+        self.assertEqual(['AKs', 'QQ'],
+                         [player['range'] for player in record['players']])
+        # AdKd is blocked by the board.
+        self.assertEqual(3, len(record['players'][0]['combos']))
+        self.assertAlmostEqual(result.equities[1],
+                               record['players'][1]['equity'])
+        rows = result.csv_rows()
+        self.assertEqual(3 + 6, len(rows))
+        self.assertItemsEqual(result.CSV_FIELDS, rows[0].keys())
+
+    def test_sampled_boards(self):
+        result = range_equity.range_equity(
+            poker_hand.parse_hands_into_holdem_hands('aa;kk'),
+            max_boards=300, seed=5)
+        self.assertFalse(result.exhaustive)
+        self.assertEqual(300, result.num_boards)
+        self.assertAlmostEqual(1.0, sum(result.equities))
+        self.assertLess(abs(result.equities[0] - 0.82), 0.05)
+
+    def test_needs_two_ranges(self):
+        self.assertRaises(
+            range_equity.Error, range_equity.range_equity,
+            poker_hand.parse_hands_into_holdem_hands('aa;kk;qq'))
+
+
+if __name__ == '__main__':
+    unittest.main()
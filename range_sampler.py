@@ -0,0 +1,458 @@
+"""Sampling of card-disjoint hand assignments for several hand ranges.
+
+Drawing a hand from each range independently can hand the same card to two
+players, and even with collisions thrown away each surviving assignment is
+not equally likely.  JointRangeSampler draws each card-disjoint assignment of
+one hand per range with probability proportional to the product of the hand
+weights, which is what dealing the ranges for real would do.
+"""
+import bisect
+import itertools
+import random
+
+import card
+
+# How the free ranges are sampled; see JointRangeSampler.
+INDEPENDENT_MODE = 'independent'
+PAIR_MODE = 'pair'
+TRIPLE_MODE = 'triple'
+ENUMERATED_MODE = 'enumerated'
+REJECTION_MODE = 'rejection'
+
+# Scenarios with at most this many raw hand combinations between the ranges
+# that can collide have their valid assignments listed up front.
+MAX_ENUMERATED_ASSIGNMENTS = 100000
+# Rejection sampling gives up after this many collisions in a row.
+MAX_REJECTIONS = 100000
+
+
+class Error(Exception):
+    pass
+
+
+class NoValidAssignmentError(Error):
+    """Raised if the ranges cannot be dealt without sharing a card."""
+
+
+def _cumulative(weights):
+    """Running totals of weights, for sampling with bisect."""
+    totals = []
+    total = 0.0
+    for weight in weights:
+        total += weight
+        totals.append(total)
+    return totals
+
+
+def _weighted_index(cumulative, rng):
+    """Index drawn with probability proportional to its weight."""
+    index = bisect.bisect_right(cumulative, rng.random() * cumulative[-1])
+    return min(index, len(cumulative) - 1)
+
+
+def _sorted_contains(values, value):
+    """Whether a sorted list holds value."""
+    index = bisect.bisect_left(values, value)
+    return index < len(values) and values[index] == value
+
+
+def _hands_by_card(hands):
+    """Card id to the indices of the hands holding it."""
+    by_card = [[] for _ in xrange(card.NUM_CARDS)]
+    for index, h in enumerate(hands):
+        for card_id in h.card_ids:
+            by_card[card_id].append(index)
+    return by_card
+
+
+def _card_weight_sums(hands, weights):
+    """Sums of hand weights per card and per pair of cards.
+
+    The weight of the hands that avoid a set of cards is then the total,
+    less each card's sum, plus back each pair's, which was taken twice.
+
+    Returns:
+        tuple of (float total, list of float per card id, 52 by 52 list of
+            float per pair of card ids).
+    """
+    card_weights = [0.0] * card.NUM_CARDS
+    pair_weights = [[0.0] * card.NUM_CARDS for _ in xrange(card.NUM_CARDS)]
+    for h, w in zip(hands, weights):
+        high, low = h.card_ids
+        card_weights[high] += w
+        card_weights[low] += w
+        pair_weights[high][low] += w
+        pair_weights[low][high] += w
+    return sum(weights), card_weights, pair_weights
+
+
+class JointRangeSampler(object):
+    """Draws card-disjoint hands for every range with the right probabilities.
+
+    Ranges that hold a single hand are fixed and simply removed from the
+    others.  If the remaining ranges cannot share a card they are drawn
+    independently.  Otherwise small scenarios draw from a list of every
+    valid assignment.  Two or three ranges are drawn one after another, each
+    hand with its weight times the weight of the later ranges' hands that fit
+    with it, computed from per-card weight sums.  Only four or more colliding
+    ranges with too many combinations to list redraw whole assignments on a
+    collision: counting their fitting assignments is a weighted matching
+    count with no such shortcut.  Redrawing stays exact, and large ranges
+    seldom collide.
+    """
+    def __init__(self, holdem_ranges, excluded_mask=0):
+        """Initializer.
+
+        Args:
+            holdem_ranges: list of HoldemHandRange.
+            excluded_mask: int, mask of cards that no hand may use, such as
+                the board and dead cards.
+
+        Raises:
+            NoValidAssignmentError if no assignment is possible.
+        """
+        self.num_ranges = len(holdem_ranges)
+        fixed_mask = excluded_mask
+        candidates = []
+        for her in holdem_ranges:
+            pairs = [(h, w) for h, w in zip(her.possible_hands,
+                                            her.hand_weights)
+                     if w > 0 and not h.mask & excluded_mask]
+            candidates.append(pairs)
+            if len(pairs) == 1:
+                fixed_mask |= pairs[0][0].mask
+
+        self._fixed = {}
+        self._hands = []
+        self._weights = []
+        self._cumulative = []
+        self._free = []
+        for index, pairs in enumerate(candidates):
+            if len(pairs) == 1:
+                self._fixed[index] = pairs[0][0]
+                continue
+            pairs = [(h, w) for h, w in pairs if not h.mask & fixed_mask]
+            if not pairs:
+                raise NoValidAssignmentError(
+                    'No hand of range %s is available' % holdem_ranges[index])
+            self._free.append(index)
+            self._hands.append([h for h, _ in pairs])
+            self._weights.append([w for _, w in pairs])
+            self._cumulative.append(_cumulative(self._weights[-1]))
+        self._check_fixed_hands()
+        # The hands each range can actually be dealt and their weights, in
+        # range order.
+        self.hands_by_range = [None] * self.num_ranges
+        self.weights_by_range = [None] * self.num_ranges
+        for index, hand in self._fixed.iteritems():
+            self.hands_by_range[index] = [hand]
+            self.weights_by_range[index] = [1.0]
+        for index, hands, weights in zip(
+                self._free, self._hands, self._weights):
+            self.hands_by_range[index] = hands
+            self.weights_by_range[index] = weights
+
+        self.mode = self._choose_mode()
+        if self.mode == PAIR_MODE:
+            self._prepare_pair()
+        elif self.mode == TRIPLE_MODE:
+            self._prepare_triple()
+        elif self.mode == ENUMERATED_MODE:
+            self._prepare_enumerated()
+
+    def _check_fixed_hands(self):
+        used_mask = 0
+        for hand in self._fixed.itervalues():
+            if hand.mask & used_mask:
+                raise NoValidAssignmentError(
+                    'Hand %s shares a card with another hand' % hand)
+            used_mask |= hand.mask
+
+    def _choose_mode(self):
+        """Picks the cheapest exact way to sample the free ranges."""
+        range_masks = []
+        for hands in self._hands:
+            range_mask = 0
+            for h in hands:
+                range_mask |= h.mask
+            range_masks.append(range_mask)
+        if all(not lhs & rhs
+               for lhs, rhs in itertools.combinations(range_masks, 2)):
+            return INDEPENDENT_MODE
+        if len(self._hands) == 2:
+            return PAIR_MODE
+        raw_combinations = 1
+        for hands in self._hands:
+            raw_combinations *= len(hands)
+        if raw_combinations <= MAX_ENUMERATED_ASSIGNMENTS:
+            return ENUMERATED_MODE
+        if len(self._hands) == 3:
+            return TRIPLE_MODE
+        return REJECTION_MODE
+
+    def _prepare_pair(self):
+        """Computes the exact marginal of the first of two colliding ranges.
+
+        The total weight of second range hands compatible with a first range
+        hand is everything minus the hands sharing either of its cards, plus
+        back the identical hand that was subtracted twice.
+        """
+        first_hands, second_hands = self._hands
+        first_weights, second_weights = self._weights
+        card_weights = [0.0] * 52
+        mask_weights = {}
+        for h, w in zip(second_hands, second_weights):
+            for card_id in h.card_ids:
+                card_weights[card_id] += w
+            mask_weights[h.mask] = mask_weights.get(h.mask, 0.0) + w
+        second_total = sum(second_weights)
+
+        marginal = []
+        for h, w in zip(first_hands, first_weights):
+            compatible = (second_total - card_weights[h.card_ids[0]] -
+                          card_weights[h.card_ids[1]] +
+                          mask_weights.get(h.mask, 0.0))
+            marginal.append(w * max(compatible, 0.0))
+        if not any(marginal):
+            raise NoValidAssignmentError(
+                'The ranges cannot be dealt without sharing a card')
+        self._first_cumulative = _cumulative(marginal)
+        # First hand index to (hands, cumulative weights) of the second range.
+        self._compatible = {}
+
+    def _compatible_second_hands(self, first_index):
+        """The second range's hands that fit with a first range hand."""
+        if first_index not in self._compatible:
+            first_mask = self._hands[0][first_index].mask
+            pairs = [(h, w) for h, w in zip(self._hands[1], self._weights[1])
+                     if not h.mask & first_mask]
+            self._compatible[first_index] = (
+                [h for h, _ in pairs], _cumulative([w for _, w in pairs]))
+        return self._compatible[first_index]
+
+    def _prepare_triple(self):
+        """Computes the exact marginal of the first of three ranges.
+
+        For first hand ab and second hand xy, the weight of the third hands
+        avoiding all four cards follows from the third range's per-card and
+        per-pair sums.  Spelled out, the second hand's weight times it is
+        base(xy) - weight(xy) * touch(ab) + paired(a, xy) + paired(b, xy):
+        base is its weight times the third weight avoiding xy, touch(ab) the
+        third weight holding a or b, and paired(u, xy) its weight times the
+        third weight made of u and x or y.  Each term is a fixed array over
+        the second range, so one set of cumulative sums serves every first
+        hand, less the few second hands that hold a or b.
+        """
+        first_hands = self._hands[0]
+        second_hands, third_hands = self._hands[1:]
+        second_weights, third_weights = self._weights[1:]
+        third_total, third_cards, third_pairs = _card_weight_sums(
+            third_hands, third_weights)
+        # Card id to the indices of the second range's hands holding it.
+        self._second_by_card = _hands_by_card(second_hands)
+        # Card id to the cumulative weight, by index, of the third range's
+        # hands holding it.
+        self._third_card_cumulative = []
+        for indices in _hands_by_card(third_hands):
+            holding = [0.0] * len(third_hands)
+            for index in indices:
+                holding[index] = third_weights[index]
+            self._third_card_cumulative.append(_cumulative(holding))
+        # Both card id orders of each third hand to its (index, weight).
+        self._third_by_pair = {}
+        for index, h in enumerate(third_hands):
+            high, low = h.card_ids
+            entry = (index, third_weights[index])
+            self._third_by_pair.setdefault((high, low), []).append(entry)
+            self._third_by_pair.setdefault((low, high), []).append(entry)
+
+        first_cards = set()
+        for h in first_hands:
+            first_cards.update(h.card_ids)
+        base = []
+        paired = dict((u, []) for u in first_cards)
+        for h, w in zip(second_hands, second_weights):
+            x, y = h.card_ids
+            base.append(w * (third_total - third_cards[x] - third_cards[y] +
+                             third_pairs[x][y]))
+            for u, values in paired.iteritems():
+                values.append(w * (third_pairs[u][x] + third_pairs[u][y]))
+        self._second_base_cumulative = _cumulative(base)
+        self._second_weight_cumulative = self._cumulative[1]
+        self._second_paired_cumulative = dict(
+            (u, _cumulative(values)) for u, values in paired.iteritems())
+
+        # First hand index to (sorted indices of the second hands it blocks,
+        # cumulative of their terms, total of the second hands it allows).
+        self._second_blocked = []
+        marginal = []
+        for h, w in zip(first_hands, self._weights[0]):
+            a, b = h.card_ids
+            touch = third_cards[a] + third_cards[b] - third_pairs[a][b]
+            blocked = sorted(set(self._second_by_card[a] +
+                                 self._second_by_card[b]))
+            terms = []
+            for index in blocked:
+                terms.append(
+                    base[index] - second_weights[index] * touch +
+                    paired[a][index] + paired[b][index])
+            blocked_cumulative = _cumulative(terms)
+            total = (self._second_term(-1, touch, a, b) -
+                     (blocked_cumulative[-1] if blocked else 0.0))
+            self._second_blocked.append(
+                (blocked, blocked_cumulative, touch, total))
+            marginal.append(w * max(total, 0.0))
+        if not any(marginal):
+            raise NoValidAssignmentError(
+                'The ranges cannot be dealt without sharing a card')
+        self._first_cumulative = _cumulative(marginal)
+
+    def _second_term(self, index, touch, a, b):
+        """Second hands' weight up to index for first hand ab, unblocked."""
+        return (self._second_base_cumulative[index] -
+                self._second_weight_cumulative[index] * touch +
+                self._second_paired_cumulative[a][index] +
+                self._second_paired_cumulative[b][index])
+
+    def _sample_second(self, first_index, rng):
+        """Draws a second hand given the first, by bisecting the sums."""
+        a, b = self._hands[0][first_index].card_ids
+        blocked, blocked_cumulative, touch, total = (
+            self._second_blocked[first_index])
+        point = rng.random() * total
+        low, high = 0, len(self._hands[1]) - 1
+        while low < high:
+            middle = (low + high) // 2
+            num_blocked = bisect.bisect_right(blocked, middle)
+            allowed = self._second_term(middle, touch, a, b)
+            if num_blocked:
+                allowed -= blocked_cumulative[num_blocked - 1]
+            if allowed > point:
+                high = middle
+            else:
+                low = middle + 1
+        # Rounding can leave the point on a blocked hand's edge.
+        while _sorted_contains(blocked, low):
+            low = (low - 1) % len(self._hands[1])
+        return self._hands[1][low]
+
+    def _sample_triple(self, rng):
+        """Draws the first hand, then the second and third given it."""
+        first_index = _weighted_index(self._first_cumulative, rng)
+        first = self._hands[0][first_index]
+        second = self._sample_second(first_index, rng)
+        return [first, second, self._sample_third(
+            first.card_ids + second.card_ids, rng)]
+
+    def _sample_third(self, used_ids, rng):
+        """Draws a third range hand avoiding the four cards in used_ids.
+
+        The weight of the hands blocked up to an index is, per used card,
+        that of the hands holding it, less that of the hands holding two,
+        which were counted twice.  So the unblocked cumulative weight can be
+        bisected without listing the blocked hands.
+        """
+        hands = self._hands[2]
+        a, b, c, d = [self._third_card_cumulative[card_id]
+                      for card_id in used_ids]
+        cumulative = self._cumulative[2]
+        # (index, weight) of the hands made of two used cards.
+        doubled = []
+        for pair in itertools.combinations(used_ids, 2):
+            doubled.extend(self._third_by_pair.get(pair, ()))
+
+        def allowed_weight(end):
+            """Weight of the unblocked hands with index at most end."""
+            weight = cumulative[end] - a[end] - b[end] - c[end] - d[end]
+            for index, pair_weight in doubled:
+                if index <= end:
+                    weight += pair_weight
+            return weight
+
+        last = len(hands) - 1
+        point = rng.random() * allowed_weight(last)
+        low, high = 0, last
+        while low < high:
+            middle = (low + high) // 2
+            if allowed_weight(middle) > point:
+                high = middle
+            else:
+                low = middle + 1
+        # Rounding can leave the point on a blocked hand's edge.
+        used_mask = 0
+        for card_id in used_ids:
+            used_mask |= 1 << card_id
+        while hands[low].mask & used_mask:
+            low = (low - 1) % len(hands)
+        return hands[low]
+
+    def _prepare_enumerated(self):
+        assignments = []
+        weights = []
+        indices = [xrange(len(hands)) for hands in self._hands]
+        for choice in itertools.product(*indices):
+            used_mask = 0
+            weight = 1.0
+            for hands, hand_weights, index in zip(
+                    self._hands, self._weights, choice):
+                mask = hands[index].mask
+                if used_mask & mask:
+                    break
+                used_mask |= mask
+                weight *= hand_weights[index]
+            else:
+                assignments.append(
+                    [hands[index] for hands, index in zip(self._hands, choice)])
+                weights.append(weight)
+        if not assignments:
+            raise NoValidAssignmentError(
+                'The ranges cannot be dealt without sharing a card')
+        self._assignments = assignments
+        self._assignment_cumulative = _cumulative(weights)
+
+    def _sample_free(self, rng):
+        """Draws hands for the ranges that are not fixed, in order."""
+        if self.mode == INDEPENDENT_MODE:
+            return [hands[_weighted_index(cumulative, rng)]
+                    for hands, cumulative in zip(self._hands,
+                                                 self._cumulative)]
+        if self.mode == PAIR_MODE:
+            first_index = _weighted_index(self._first_cumulative, rng)
+            hands, cumulative = self._compatible_second_hands(first_index)
+            return [self._hands[0][first_index],
+                    hands[_weighted_index(cumulative, rng)]]
+        if self.mode == TRIPLE_MODE:
+            return self._sample_triple(rng)
+        if self.mode == ENUMERATED_MODE:
+            return self._assignments[
+                _weighted_index(self._assignment_cumulative, rng)]
+
+        for _ in xrange(MAX_REJECTIONS):
+            used_mask = 0
+            drawn = []
+            for hands, cumulative in zip(self._hands, self._cumulative):
+                hand = hands[_weighted_index(cumulative, rng)]
+                if hand.mask & used_mask:
+                    break
+                used_mask |= hand.mask
+                drawn.append(hand)
+            else:
+                return drawn
+        raise NoValidAssignmentError(
+            'No card-disjoint assignment found in %d draws' % MAX_REJECTIONS)
+
+    def sample(self, rng=random):
+        """Draws one hand for each range.
+
+        Args:
+            rng: random.Random, source of randomness.
+
+        Returns:
+            list of HoldemHand, one per range, sharing no cards.
+        """
+        hands = [None] * self.num_ranges
+        for index, hand in self._fixed.iteritems():
+            hands[index] = hand
+        for index, hand in zip(self._free, self._sample_free(rng)):
+            hands[index] = hand
+        return hands
@@ -0,0 +1,159 @@
+"""Tests for range_sampler.py"""
+import collections
+import random
+import unittest
+
+import exhaustive_enumerator
+import poker_hand
+import range_sampler
+
+
+def _sample_counts(sampler, num_samples):
+    rng = random.Random(17)
+    counts = collections.defaultdict(int)
+    for _ in xrange(num_samples):
+        hands = sampler.sample(rng)
+        used_mask = 0
+        for h in hands:
+            assert not h.mask & used_mask, 'Sampled hands share a card'
+            used_mask |= h.mask
+        counts[tuple(h.mask for h in hands)] += 1
+    return counts
+
+
+class JointRangeSamplerTest(unittest.TestCase):
+    def assertUniform(self, counts, num_assignments, num_samples):
+        self.assertEqual(num_assignments, len(counts))
+        probability = 1.0 / num_assignments
+        expected = num_samples * probability
+        stddev = (num_samples * probability * (1 - probability)) ** 0.5
+        for count in counts.itervalues():
+            self.assertLess(abs(count - expected), 5 * stddev)
+
+    def test_independent_ranges(self):
+        sampler = range_sampler.JointRangeSampler(
+            poker_hand.parse_hands_into_holdem_hands('aa,kk'))
+        self.assertEqual(range_sampler.INDEPENDENT_MODE, sampler.mode)
+        self.assertUniform(_sample_counts(sampler, 6000), 36, 6000)
+
+    def test_overlapping_pair(self):
+        sampler = range_sampler.JointRangeSampler(
+            poker_hand.parse_hands_into_holdem_hands('kk,aks'))
+        self.assertEqual(range_sampler.PAIR_MODE, sampler.mode)
+
+        # Each suited AK blocks half of the pocket kings.
+        self.assertUniform(_sample_counts(sampler, 6000), 4 * 3, 6000)
+
+    def test_fixed_hand_removed_from_ranges(self):
+        sampler = range_sampler.JointRangeSampler(
+            poker_hand.parse_hands_into_holdem_hands('asks,aa'))
+        self.assertEqual(range_sampler.INDEPENDENT_MODE, sampler.mode)
+        self.assertEqual(3, len(sampler.hands_by_range[1]))
+        _sample_counts(sampler, 100)
+
+    def test_excluded_mask(self):
+        ranges = poker_hand.parse_hands_into_holdem_hands('aa,kk')
+        ace = ranges[0].possible_hands[0].cards[0]
+        sampler = range_sampler.JointRangeSampler(
+            ranges, excluded_mask=ace.mask)
+        self.assertEqual(3, len(sampler.hands_by_range[0]))
+
+    def test_enumerated_multiway(self):
+        sampler = range_sampler.JointRangeSampler(
+            poker_hand.parse_hands_into_holdem_hands('aa,aa,kk'))
+        self.assertEqual(range_sampler.ENUMERATED_MODE, sampler.mode)
+
+        # The second pair of aces is forced by the first.
+        self.assertUniform(_sample_counts(sampler, 10000), 6 * 6, 10000)
+
+    def _unenumerated_sampler(self, ranges):
+        max_enumerated = range_sampler.MAX_ENUMERATED_ASSIGNMENTS
+        range_sampler.MAX_ENUMERATED_ASSIGNMENTS = 0
+        try:
+            return range_sampler.JointRangeSampler(ranges)
+        finally:
+            range_sampler.MAX_ENUMERATED_ASSIGNMENTS = max_enumerated
+
+    def test_triple_matches_enumeration(self):
+        ranges = poker_hand.parse_hands_into_holdem_hands('aa,aks,kk')
+        sampler = self._unenumerated_sampler(ranges)
+        self.assertEqual(range_sampler.TRIPLE_MODE, sampler.mode)
+
+        num_assignments = sum(
+            1 for _ in exhaustive_enumerator.iter_assignments(ranges))
+        self.assertUniform(
+            _sample_counts(sampler, 10000), num_assignments, 10000)
+
+    def test_weighted_triple_matches_enumeration(self):
+        ranges = poker_hand.parse_hands_into_holdem_hands(
+            'kk,aks:0.25;aks,ak:0.5;kk,ak')
+        sampler = self._unenumerated_sampler(ranges)
+        self.assertEqual(range_sampler.TRIPLE_MODE, sampler.mode)
+        enumerated = range_sampler.JointRangeSampler(ranges)
+        self.assertEqual(range_sampler.ENUMERATED_MODE, enumerated.mode)
+
+        # The first range's marginal matches the enumerated assignments'.
+        marginal = collections.defaultdict(float)
+        previous = 0.0
+        for hands, total in zip(enumerated._assignments,
+                                enumerated._assignment_cumulative):
+            marginal[hands[0].mask] += total - previous
+            previous = total
+        previous = 0.0
+        for h, total in zip(sampler._hands[0], sampler._first_cumulative):
+            self.assertAlmostEqual(
+                marginal[h.mask] / enumerated._assignment_cumulative[-1],
+                (total - previous) / sampler._first_cumulative[-1])
+            previous = total
+
+        # And so does every assignment's frequency.
+        num_samples = 20000
+        counts = _sample_counts(sampler, num_samples)
+        previous = 0.0
+        for hands, total in zip(enumerated._assignments,
+                                enumerated._assignment_cumulative):
+            probability = (
+                (total - previous) / enumerated._assignment_cumulative[-1])
+            previous = total
+            stddev = (num_samples * probability * (1 - probability)) ** 0.5
+            self.assertLess(
+                abs(counts[tuple(h.mask for h in hands)] -
+                    num_samples * probability), 5 * stddev + 1)
+
+    def test_rejection_matches_enumeration(self):
+        ranges = poker_hand.parse_hands_into_holdem_hands('aa,aks,kk,ak')
+        sampler = self._unenumerated_sampler(ranges)
+        self.assertEqual(range_sampler.REJECTION_MODE, sampler.mode)
+
+        num_assignments = sum(
+            1 for _ in exhaustive_enumerator.iter_assignments(ranges))
+        self.assertUniform(
+            _sample_counts(sampler, 20000), num_assignments, 20000)
+
+    def test_weighted_pair(self):
+        ranges = poker_hand.parse_hands_into_holdem_hands('kk,aks:0.25;aks')
+        sampler = range_sampler.JointRangeSampler(ranges)
+        self.assertEqual(range_sampler.PAIR_MODE, sampler.mode)
+
+        num_samples = 10000
+        counts = _sample_counts(sampler, num_samples)
+        # Every AKs for the second player blocks 3 pocket kings and 1 AKs of
+        # weight 0.25, leaving 3 + 0.75 of the 6 + 1 weight for the first.
+        kings_share = 3.0 / 3.75
+        king_masks = set(
+            h.mask for h in poker_hand.parse_hands_into_holdem_hands(
+                'kk')[0].possible_hands)
+        num_kings = sum(count for masks, count in counts.iteritems()
+                        if masks[0] in king_masks)
+        self.assertAlmostEqual(
+            kings_share, float(num_kings) / num_samples, 1)
+
+    def test_no_valid_assignment(self):
+        self.assertRaises(
+            range_sampler.NoValidAssignmentError,
+            range_sampler.JointRangeSampler,
+            poker_hand.parse_hands_into_holdem_hands('aa,aa,aa'))
+
+
+if __name__ == '__main__':
+    unittest.main()
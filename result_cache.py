@@ -0,0 +1,39 @@
+"""In-process caching of simulation results."""
+import collections
+
+DEFAULT_MAX_ENTRIES = 1024
+
+
+class LRUCache(object):
+    """A bounded mapping that evicts the least recently used entry."""
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        if max_entries < 1:
+            raise ValueError('max_entries must be positive: %s' % max_entries)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        """Returns the value for key and marks it as recently used."""
+        try:
+            value = self._entries.pop(key)
+        except KeyError:
+            self.misses += 1
+            return default
+        self._entries[key] = value
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Stores the value, evicting the least recently used if full."""
+        self._entries.pop(key, None)
+        self._entries[key] = value
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
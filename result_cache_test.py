@@ -0,0 +1,43 @@
+"""Tests for result_cache.py"""
+# pylint: disable=missing-docstring
+import unittest
+
+import result_cache
+
+
+class LRUCacheTest(unittest.TestCase):
+
+    def test_get_and_put(self):
+        cache = result_cache.LRUCache(max_entries=2)
+        cache.put('a', 1)
+        self.assertEqual(1, cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(1, cache.misses)
+
+    def test_evicts_least_recently_used(self):
+        cache = result_cache.LRUCache(max_entries=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+
+        self.assertEqual(2, len(cache))
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertIn('c', cache)
+
+    def test_put_replaces(self):
+        cache = result_cache.LRUCache(max_entries=2)
+        cache.put('a', 1)
+        cache.put('a', 2)
+        self.assertEqual(1, len(cache))
+        self.assertEqual(2, cache.get('a'))
+
+    def test_invalid_size(self):
+        with self.assertRaises(ValueError):
+            result_cache.LRUCache(max_entries=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,227 @@
+"""Exact equity of every next card of a flop or turn spot.
+
+For specific hands on a flop or turn, every remaining card is dealt next in
+one pass.  On the turn each river card is a complete runout.  On the flop
+every pair of turn and river cards is enumerated once, shown down, and
+credited to both of its cards, so each card's equity averages the rivers that
+can follow it.  Boards are extended a card at a time with the shared board
+analysis, so a flop's 990 runouts take milliseconds.
+
+Each card gets a row with the players' equities once it is dealt, their
+change from the spot's equity, who leads and with what hand, and the table is
+sorted by how much the card changes the equities.
+"""
+import time
+
+import card
+import hand_evaluator
+import monte_carlo_runner
+import poker_hand
+
+
+class Error(Exception):
+    pass
+
+
+class RunoutRow(object):
+    """What dealing one card next does to the spot.
+
+    Attributes:
+        card: Card, the turn card on a flop or the river card on a turn.
+        equities: list of float, each player's equity once it is dealt.
+        deltas: list of float, each equity less the spot's equity.
+        leaders: list of int, the players with the highest equity.
+        category: str, the hand rank the first leader has with the card.
+    """
+    def __init__(self, next_card, equities, deltas, leaders, category):
+        self.card = next_card
+        self.equities = equities
+        self.deltas = deltas
+        self.leaders = leaders
+        self.category = category
+
+    @property
+    def impact(self):
+        """float, the largest change of any player's equity."""
+        return max(abs(delta) for delta in self.deltas)
+
+    def to_dict(self):
+        return {'card': self.card.short_form(), 'equities': self.equities,
+                'deltas': self.deltas, 'leaders': self.leaders,
+                'category': self.category, 'impact': self.impact}
+
+
+class RunoutTable(object):
+    """The spot's equities and a row per next card, by decreasing impact.
+
+    Attributes:
+        holdem_ranges: list of HoldemHandRange, each a single hand.
+        board_cards: list of Card, the flop or turn.
+        dead_cards: list of Card.
+        equities: list of float, each player's exact equity in the spot.
+        rows: list of RunoutRow, sorted by decreasing impact.
+        num_runouts: int, the runouts enumerated.
+        elapsed_time: float, seconds spent enumerating.
+    """
+    CSV_FIELDS = ['card', 'player', 'hand', 'equity', 'delta', 'leads',
+                  'category', 'impact', 'spot_equity']
+
+    def __init__(self, holdem_ranges, board_cards, dead_cards, equities,
+                 rows, num_runouts, elapsed_time):
+        self.holdem_ranges = holdem_ranges
+        self.board_cards = board_cards
+        self.dead_cards = dead_cards
+        self.equities = equities
+        self.rows = rows
+        self.num_runouts = num_runouts
+        self.elapsed_time = elapsed_time
+
+    def to_dict(self):
+        """dict, the result as plain JSON compatible values."""
+        return {
+            'players': [{'hand': '%r' % he_range, 'equity': equity}
+                        for he_range, equity in zip(
+                            self.holdem_ranges, self.equities)],
+            'board': ''.join(c.short_form() for c in self.board_cards),
+            'dead': ''.join(c.short_form() for c in self.dead_cards),
+            'runouts': self.num_runouts,
+            'seconds': self.elapsed_time,
+            'rows': [row.to_dict() for row in self.rows],
+        }
+
+    def csv_rows(self):
+        """list of dict, a row per card and player, keyed by CSV_FIELDS."""
+        rows = []
+        for row in self.rows:
+            for index, (he_range, equity, delta, spot_equity) in enumerate(
+                    zip(self.holdem_ranges, row.equities, row.deltas,
+                        self.equities)):
+                rows.append({
+                    'card': row.card.short_form(), 'player': index,
+                    'hand': '%r' % he_range, 'equity': equity,
+                    'delta': delta, 'leads': index in row.leaders,
+                    'category': row.category, 'impact': row.impact,
+                    'spot_equity': spot_equity})
+        return rows
+
+    def print_report(self):
+        """Prints the spot's equities and the table of next cards."""
+        street = 'turn' if len(self.board_cards) == 3 else 'river'
+        print 'Enumerated all %d runouts exactly in %0.3f seconds\n' % (
+            self.num_runouts, self.elapsed_time)
+        print 'Overall Equity'
+        for index, (he_range, equity) in enumerate(
+                zip(self.holdem_ranges, self.equities)):
+            print 'P%s)  %-15s %0.3f' % (index, '%r' % he_range, equity)
+        print '\nEquity by %s card, most decisive first' % street
+        print '%-6s%s  %-8s%s' % (
+            'Card', ''.join('%17s' % ('P%d' % index)
+                            for index in xrange(len(self.holdem_ranges))),
+            'Leads', 'Hand')
+        for row in self.rows:
+            print '%-6s%s  %-8s%s' % (
+                row.card.short_form(),
+                ''.join('%17s' % ('%0.3f (%+0.3f)' % (equity, delta))
+                        for equity, delta in zip(row.equities, row.deltas)),
+                ','.join('P%d' % index for index in row.leaders),
+                row.category)
+
+
+def runout_table(holdem_ranges, board_cards, dead_cards=None):
+    """Enumerates every next card of a flop or turn spot exactly.
+
+    Args:
+        holdem_ranges: list of HoldemHandRange, at least two, each a single
+            hand.
+        board_cards: list of Card, three or four cards.
+        dead_cards: list of Card or None, cards out of play.
+
+    Returns:
+        RunoutTable.
+
+    Raises:
+        Error if the spot is not a flop or turn with specific hands.
+    """
+    # Build the seven card tables first, so that the time is the
+    # enumeration's.
+    hand_evaluator.non_flush_product_table()
+    start_time = time.time()
+    dead_cards = dead_cards or []
+    if len(board_cards) not in (3, 4):
+        raise Error('Runout tables need a flop or a turn, got %d board cards'
+                    % len(board_cards))
+    if len(holdem_ranges) < 2:
+        raise Error('Runout tables need at least two hands')
+    if any(len(her.possible_hands) != 1 for her in holdem_ranges):
+        raise Error('Runout tables need specific hands, not ranges')
+    hole_ids = [her.possible_hands[0].card_ids for her in holdem_ranges]
+    used_ids = [c.card_id for c in board_cards + dead_cards]
+    for ids in hole_ids:
+        used_ids.extend(ids)
+    if len(set(used_ids)) != len(used_ids):
+        raise Error('Cards specified multiple times')
+    used_ids = set(used_ids)
+    live_ids = [i for i in xrange(card.NUM_CARDS) if i not in used_ids]
+
+    num_players = len(holdem_ranges)
+    unit = monte_carlo_runner.share_unit(num_players)
+    chop_shares = [0] + [unit // ways for ways in xrange(1, num_players + 1)]
+
+    def showdown(board, shares):
+        """Adds the pot shares of a complete board to shares."""
+        strengths = [board.evaluate(ids) for ids in hole_ids]
+        best_strength = max(strengths)
+        share = chop_shares[strengths.count(best_strength)]
+        for idx, strength in enumerate(strengths):
+            if strength == best_strength:
+                shares[idx] += share
+
+    board = hand_evaluator.BoardAnalysis(
+        [c.card_id for c in board_cards])
+    card_shares = dict((card_id, [0] * num_players) for card_id in live_ids)
+    card_strengths = {}
+    if len(board_cards) == 4:
+        runouts_per_card = 1
+        for card_id in live_ids:
+            river = board.extended((card_id,))
+            card_strengths[card_id] = [river.evaluate(ids)
+                                       for ids in hole_ids]
+            showdown(river, card_shares[card_id])
+    else:
+        runouts_per_card = len(live_ids) - 1
+        for index, turn_id in enumerate(live_ids):
+            turn = board.extended((turn_id,))
+            card_strengths[turn_id] = [turn.evaluate(ids) for ids in hole_ids]
+            turn_shares = card_shares[turn_id]
+            for river_id in live_ids[index + 1:]:
+                runout_shares = [0] * num_players
+                showdown(turn.extended((river_id,)), runout_shares)
+                river_shares = card_shares[river_id]
+                for idx, share in enumerate(runout_shares):
+                    turn_shares[idx] += share
+                    river_shares[idx] += share
+
+    # Every runout is credited to each of its new cards once.
+    num_new_cards = 5 - len(board_cards)
+    num_runouts = len(live_ids) * runouts_per_card // num_new_cards
+    totals = [sum(card_shares[card_id][idx] for card_id in live_ids)
+              for idx in xrange(num_players)]
+    equities = [float(total) / (unit * num_runouts * num_new_cards)
+                for total in totals]
+
+    rows = []
+    for card_id in live_ids:
+        shares = card_shares[card_id]
+        card_equities = [float(share) / (unit * runouts_per_card)
+                         for share in shares]
+        leaders = [idx for idx, share in enumerate(shares)
+                   if share == max(shares)]
+        category = poker_hand.HAND_RANK_NAMES[hand_evaluator.category_of(
+            card_strengths[card_id][leaders[0]])]
+        rows.append(RunoutRow(
+            card.get_card_by_id(card_id), card_equities,
+            [equity - spot for equity, spot in zip(card_equities, equities)],
+            leaders, category))
+    rows.sort(key=lambda row: (-row.impact, row.card.card_id))
+    return RunoutTable(holdem_ranges, board_cards, dead_cards, equities,
+                       rows, num_runouts, time.time() - start_time)
@@ -0,0 +1,100 @@
+"""Tests for runout_table.py"""
+# pylint: disable=missing-docstring
+import unittest
+
+import monte_carlo_runner
+import poker_hand
+import runout_table
+
+
+def _exhaustive_equities(hands, board):
+    mcr = monte_carlo_runner.MonteCarloRunner(
+        poker_hand.parse_hands_into_holdem_hands(hands),
+        board_cards=poker_hand.parse_string_into_cards(board),
+        strategy=monte_carlo_runner.EXHAUSTIVE_STRATEGY)
+    mcr._run_exhaustive()
+    return [mcr.win_stats[idx] / mcr.iterations
+            for idx in xrange(len(mcr.holdem_ranges))]
+
+
+def _runout_table(hands, board, dead=''):
+    return runout_table.runout_table(
+        poker_hand.parse_hands_into_holdem_hands(hands),
+        poker_hand.parse_string_into_cards(board),
+        dead_cards=poker_hand.parse_string_into_cards(dead))
+
+
+class RunoutTableTest(unittest.TestCase):
+    def test_turn(self):
+        result = _runout_table('AsKs,QdQh', 'kd7d2c3h')
+        self.assertEqual(44, result.num_runouts)
+        self.assertEqual(44, len(result.rows))
+        for expected, equity in zip(
+                _exhaustive_equities('AsKs,QdQh', 'kd7d2c3h'),
+                result.equities):
+            self.assertAlmostEqual(expected, equity)
+        # Only the two remaining queens change the winner.
+        self.assertEqual(['Qc', 'Qs'],
+                         [row.card.short_form() for row in result.rows[:2]])
+        for row in result.rows[:2]:
+            self.assertEqual([0.0, 1.0], row.equities)
+            self.assertEqual([1], row.leaders)
+            self.assertEqual('Three-of-a-kind', row.category)
+            self.assertAlmostEqual(result.equities[0], row.impact)
+        for row in result.rows[2:]:
+            self.assertEqual([1.0, 0.0], row.equities)
+        impacts = [row.impact for row in result.rows]
+        self.assertEqual(sorted(impacts, reverse=True), impacts)
+
+    def test_flop_matches_runner(self):
+        hands = 'AsKs,QdQh,Jc9c'
+        result = _runout_table(hands, 'kd7d2c')
+        self.assertEqual(43 * 42 // 2, result.num_runouts)
+        for expected, equity in zip(_exhaustive_equities(hands, 'kd7d2c'),
+                                    result.equities):
+            self.assertAlmostEqual(expected, equity)
+        # A turn card's equity is that of the turn spot it makes.
+        row = result.rows[-1]
+        turn = 'kd7d2c' + row.card.short_form()
+        for expected, equity in zip(_exhaustive_equities(hands, turn),
+                                    row.equities):
+            self.assertAlmostEqual(expected, equity)
+
+    def test_ties(self):
+        result = _runout_table('AsKs,AdKh', 'qcjc2h3d')
+        self.assertEqual([0.5, 0.5], result.equities)
+        self.assertEqual([0, 1], result.rows[-1].leaders)
+
+    def test_dead_cards(self):
+        result = _runout_table('AsKs,QdQh', 'kd7d2c3h', dead='qc')
+        self.assertEqual(43, result.num_runouts)
+        self.assertEqual('Qs', result.rows[0].card.short_form())
+
+    def test_to_dict_and_csv_rows(self):
+        result = _runout_table('AsKs,QdQh', 'kd7d2c3h')
+        record = result.to_dict()
+        self.assertEqual(['AsKs', 'QdQh'],
+                         [player['hand'] for player in record['players']])
+        self.assertEqual(44, len(record['rows']))
+        self.assertEqual('Qc', record['rows'][0]['card'])
+        rows = result.csv_rows()
+        self.assertEqual(44 * 2, len(rows))
+        self.assertItemsEqual(result.CSV_FIELDS, rows[0].keys())
+        self.assertEqual([True, False],
+                         [row['leads'] for row in rows[-2:]])
+
+    def test_invalid_spots(self):
+        self.assertRaises(runout_table.Error, _runout_table,
+                          'AsKs,QdQh', 'kd7d')
+        self.assertRaises(runout_table.Error, _runout_table,
+                          'AsKs,QdQh', 'kd7d2c3h4h')
+        self.assertRaises(runout_table.Error, _runout_table,
+                          'AsKs', 'kd7d2c')
+        self.assertRaises(runout_table.Error, _runout_table,
+                          'AK,QdQh', 'kd7d2c')
+        self.assertRaises(runout_table.Error, _runout_table,
+                          'AsKs,QdQh', 'kd7d2c', dead='qd')
+
+
+if __name__ == '__main__':
+    unittest.main()
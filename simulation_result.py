@@ -0,0 +1,186 @@
+"""Structured results of a simulation and their machine readable forms.
+
+MonteCarloRunner.run returns a SimulationResult, and range_equity returns a
+range_equity.RangeEquityResult.  Both can be written as a JSON document or as
+CSV rows with write_result, so that other tools never have to parse the text
+reports.
+"""
+import csv
+import json
+
+import poker_hand
+
+TEXT_FORMAT = 'text'
+JSON_FORMAT = 'json'
+CSV_FORMAT = 'csv'
+FORMATS = (TEXT_FORMAT, JSON_FORMAT, CSV_FORMAT)
+# Names of the results counted for each hand category.
+RESULT_NAMES = ('win', 'tie', 'loss')
+
+
+class Error(Exception):
+    pass
+
+
+def _category_field(rank, result_name):
+    """CSV column of a category and result count, e.g. "full_house_win"."""
+    slug = rank.lower().replace('-', '_').replace(' ', '_')
+    return '%s_%s' % (slug, result_name)
+
+
+class PlayerResult(object):
+    """One player's results.
+
+    Attributes:
+        hand: str, the player's hand or range.
+        equity: float, the fraction of the pots won.
+        stderr: float, the standard error of the equity; 0 if exact.
+        win: float, the fraction of iterations won outright.
+        tie: float, the fraction of iterations tied for the pot.
+        counts: dict or None, mapping hand rank names to dicts of counts by
+            result name in RESULT_NAMES.  None if unknown.
+    """
+    def __init__(self, hand, equity, stderr=0.0, win=None, tie=None,
+                 counts=None):
+        self.hand = hand
+        self.equity = equity
+        self.stderr = stderr
+        self.win = win
+        self.tie = tie
+        self.counts = counts
+
+    def to_dict(self):
+        return {'hand': self.hand, 'equity': self.equity,
+                'stderr': self.stderr, 'win': self.win, 'tie': self.tie,
+                'counts': self.counts}
+
+
+class StreetResult(object):
+    """Players' results as if the hands had been shown down on a street.
+
+    Attributes:
+        street: str, the street, e.g. "flop".
+        players: list of PlayerResult, with the hands made by the street.
+    """
+    def __init__(self, street, players):
+        self.street = street
+        self.players = players
+
+    def to_dict(self):
+        return {'street': self.street,
+                'players': [player.to_dict() for player in self.players]}
+
+
+class SimulationResult(object):
+    """Everything a run computed, without the runner behind it.
+
+    Attributes:
+        players: list of PlayerResult, in the order the hands were given.
+        board: str, the board cards given.
+        dead: str, the dead cards given.
+        iterations: int or None, the iterations run, or outcomes enumerated
+            for exhaustive runs.  None for table lookups.
+        strategy: str, how the results were computed.
+        elapsed_time: float, seconds spent computing.
+        seed: int or None, the seed that reproduces a sampled run.  None
+            when some of the samples came from a cache, since those were
+            drawn with other seeds.
+        cached: bool, whether the results came from a cache or table.
+        profile: dict or None, the instrumentation.Profiler report of the
+            run, if it was profiled.
+        streets: list of StreetResult or None, the results on each street
+            from the flop to the river, for street by street runs.
+    """
+    CSV_FIELDS = (
+        ['player', 'hand', 'equity', 'stderr', 'win', 'tie', 'board', 'dead',
+         'iterations', 'strategy', 'seconds', 'seed', 'cached'] +
+        [_category_field(rank, name) for rank in poker_hand.HAND_RANK_NAMES
+         for name in RESULT_NAMES] +
+        ['street'])
+
+    def __init__(self, players, board='', dead='', iterations=None,
+                 strategy=None, elapsed_time=0.0, seed=None, cached=False,
+                 profile=None, streets=None):
+        self.players = players
+        self.board = board
+        self.dead = dead
+        self.iterations = iterations
+        self.strategy = strategy
+        self.elapsed_time = elapsed_time
+        self.seed = seed
+        self.cached = cached
+        self.profile = profile
+        self.streets = streets
+
+    @property
+    def equities(self):
+        return [player.equity for player in self.players]
+
+    def to_dict(self):
+        """dict, the result as plain JSON compatible values."""
+        result = {
+            'players': [player.to_dict() for player in self.players],
+            'board': self.board,
+            'dead': self.dead,
+            'iterations': self.iterations,
+            'strategy': self.strategy,
+            'seconds': self.elapsed_time,
+            'seed': self.seed,
+            'cached': self.cached,
+        }
+        if self.profile is not None:
+            result['profile'] = self.profile
+        if self.streets is not None:
+            result['streets'] = [street.to_dict() for street in self.streets]
+        return result
+
+    def csv_rows(self):
+        """list of dict, one CSV row per player, keyed by CSV_FIELDS.
+
+        Street by street results follow with a row per street and player.
+        """
+        rows = self._player_rows(self.players)
+        for street in self.streets or ():
+            for row in self._player_rows(street.players):
+                row['street'] = street.street
+                rows.append(row)
+        return rows
+
+    def _player_rows(self, players):
+        rows = []
+        for index, player in enumerate(players):
+            row = {'player': index, 'hand': player.hand,
+                   'equity': player.equity, 'stderr': player.stderr,
+                   'win': player.win, 'tie': player.tie, 'board': self.board,
+                   'dead': self.dead, 'iterations': self.iterations,
+                   'strategy': self.strategy, 'seconds': self.elapsed_time,
+                   'seed': self.seed, 'cached': self.cached}
+            if player.counts is not None:
+                for rank in poker_hand.HAND_RANK_NAMES:
+                    for name in RESULT_NAMES:
+                        row[_category_field(rank, name)] = (
+                            player.counts[rank][name])
+            rows.append(row)
+        return rows
+
+
+def write_result(result, output_format, output):
+    """Writes a result as JSON or CSV.
+
+    Args:
+        result: SimulationResult or range_equity.RangeEquityResult.
+        output_format: str, JSON_FORMAT or CSV_FORMAT.
+        output: file, where to write.
+
+    Raises:
+        Error if the format is not machine readable.
+    """
+    if output_format == JSON_FORMAT:
+        output.write(json.dumps(result.to_dict(), sort_keys=True) + '\n')
+    elif output_format == CSV_FORMAT:
+        writer = csv.DictWriter(
+            output, fieldnames=result.CSV_FIELDS, lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(result.csv_rows())
+    else:
+        raise Error('Invalid output format: %s' % output_format)
@@ -0,0 +1,110 @@
+"""Tests for simulation_result.py"""
+# pylint: disable=missing-docstring
+import csv
+import json
+import StringIO
+import unittest
+
+import monte_carlo_runner
+import poker_hand
+import simulation_result
+
+
+def _run_exhaustive():
+    mcr = monte_carlo_runner.MonteCarloRunner(
+        poker_hand.parse_hands_into_holdem_hands('asks,qdqh'),
+        board_cards=poker_hand.parse_string_into_cards('2c7c9dth'),
+        strategy=monte_carlo_runner.EXHAUSTIVE_STRATEGY)
+    return mcr.run()
+
+
+class SimulationResultTest(unittest.TestCase):
+
+    def test_runner_result(self):
+        result = _run_exhaustive()
+
+        self.assertEqual(44, result.iterations)
+        self.assertEqual('2c7c9dTh', result.board)
+        self.assertEqual(['AsKs', 'QdQh'],
+                         [player.hand for player in result.players])
+        self.assertAlmostEqual(6.0 / 44, result.equities[0])
+        self.assertAlmostEqual(6.0 / 44, result.players[0].win)
+        self.assertEqual(0.0, result.players[0].tie)
+        self.assertEqual(0.0, result.players[0].stderr)
+        self.assertEqual(
+            44, sum(sum(by_result.itervalues())
+                    for by_result in result.players[1].counts.itervalues()))
+
+    def test_runner_records_seed(self):
+        mcr = monte_carlo_runner.MonteCarloRunner(
+            poker_hand.parse_hands_into_holdem_hands('asks,qdqh'),
+            iterations=100)
+        result = mcr.run()
+        repeat = monte_carlo_runner.MonteCarloRunner(
+            poker_hand.parse_hands_into_holdem_hands('asks,qdqh'),
+            iterations=100, seed=result.seed).run()
+        self.assertEqual(result.equities, repeat.equities)
+
+    def test_json(self):
+        output = StringIO.StringIO()
+        simulation_result.write_result(
+            _run_exhaustive(), simulation_result.JSON_FORMAT, output)
+
+        record = json.loads(output.getvalue())
+        self.assertEqual(44, record['iterations'])
+        self.assertEqual('exhaustive', record['strategy'])
+        # AsKs only wins by pairing an ace or king on the river.
+        self.assertEqual(
+            6, record['players'][0]['counts'][poker_hand.ONE_PAIR]['win'])
+
+    def test_csv(self):
+        output = StringIO.StringIO()
+        simulation_result.write_result(
+            _run_exhaustive(), simulation_result.CSV_FORMAT, output)
+
+        rows = list(csv.DictReader(StringIO.StringIO(output.getvalue())))
+        self.assertEqual(2, len(rows))
+        self.assertEqual('QdQh', rows[1]['hand'])
+        self.assertEqual('44', rows[1]['iterations'])
+        self.assertItemsEqual(
+            simulation_result.SimulationResult.CSV_FIELDS, rows[0].keys())
+
+    def test_csv_without_counts(self):
+        result = simulation_result.SimulationResult(
+            [simulation_result.PlayerResult('AA', 0.8),
+             simulation_result.PlayerResult('KK', 0.2)],
+            strategy='preflop_table')
+        output = StringIO.StringIO()
+        simulation_result.write_result(
+            result, simulation_result.CSV_FORMAT, output)
+
+        rows = list(csv.DictReader(StringIO.StringIO(output.getvalue())))
+        self.assertEqual('0.8', rows[0]['equity'])
+        self.assertEqual('', rows[0]['flush_win'])
+
+    def test_streets(self):
+        result = monte_carlo_runner.MonteCarloRunner(
+            poker_hand.parse_hands_into_holdem_hands('asks,qdqh'),
+            board_cards=poker_hand.parse_string_into_cards('kd7d2c'),
+            iterations=20, seed=1, streets=True).run()
+        record = result.to_dict()
+        self.assertEqual(['flop', 'turn', 'river'],
+                         [street['street'] for street in record['streets']])
+        self.assertEqual(1.0, record['streets'][0]['players'][0]['equity'])
+
+        output = StringIO.StringIO()
+        simulation_result.write_result(
+            result, simulation_result.CSV_FORMAT, output)
+        rows = list(csv.DictReader(StringIO.StringIO(output.getvalue())))
+        self.assertEqual(['', '', 'flop', 'flop', 'turn', 'turn', 'river',
+                          'river'], [row['street'] for row in rows])
+
+    def test_invalid_format(self):
+        with self.assertRaises(simulation_result.Error):
+            simulation_result.write_result(
+                _run_exhaustive(), simulation_result.TEXT_FORMAT,
+                StringIO.StringIO())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+"""Suit permutations and the symmetries they induce between scenarios.
+
+Two scenarios that differ only by a relabelling of suits have identical
+equities, so work can be shared between them.  Permutations are tuples mapping
+each suit index (see card.SUITS) to its image.
+"""
+import itertools
+
+import card
+
+SUIT_PERMUTATIONS = tuple(itertools.permutations(xrange(len(card.SUITS))))
+IDENTITY = SUIT_PERMUTATIONS[0]
+
+# For every permutation, the image of each card id.
+_PERMUTED_CARD_IDS = dict(
+    (perm, tuple((i & ~3) | perm[i & 3] for i in xrange(card.NUM_CARDS)))
+    for perm in SUIT_PERMUTATIONS)
+
+
+def permuted_card_ids(permutation):
+    """Returns a tuple mapping each card id to its image under permutation."""
+    return _PERMUTED_CARD_IDS[permutation]
+
+
+def permute_cards(card_ids, permutation):
+    """Applies a suit permutation to card ids.
+
+    Args:
+        card_ids: iterable of int card ids.
+        permutation: tuple, one of SUIT_PERMUTATIONS.
+
+    Returns:
+        tuple of int, the sorted images of the cards.
+    """
+    images = _PERMUTED_CARD_IDS[permutation]
+    return tuple(sorted(images[c] for c in card_ids))
+
+
+def stabilizer(card_id_groups, permutations=SUIT_PERMUTATIONS):
+    """Finds the permutations that map every group of cards onto itself.
+
+    Args:
+        card_id_groups: iterable of iterables of int card ids, e.g. each
+            player's hole cards, the board and the dead cards.
+        permutations: iterable of permutations to consider.
+
+    Returns:
+        list of permutations, always including IDENTITY when it is considered.
+    """
+    groups = [tuple(sorted(g)) for g in card_id_groups]
+    return [perm for perm in permutations
+            if all(permute_cards(g, perm) == g for g in groups)]
+
+
+class CanonicalScenario(object):
+    """A scenario in canonical form, with the mapping back to the original.
+
+    Attributes:
+        key: hashable, identical for all scenarios that are the same up to a
+            suit permutation and a reordering of the players.
+        permutation: tuple, the suit permutation taking the original scenario
+            to the canonical one.
+        player_order: list of int, the original index of the player in each
+            canonical position.
+    """
+    def __init__(self, key, permutation, player_order):
+        self.key = key
+        self.permutation = permutation
+        self.player_order = player_order
+
+    def to_canonical_order(self, per_player_values):
+        """Reorders per-player values from original to canonical order."""
+        return [per_player_values[idx] for idx in self.player_order]
+
+    def from_canonical_order(self, per_player_values):
+        """Reorders per-player values from canonical to original order."""
+        result = [None] * len(self.player_order)
+        for canonical_idx, original_idx in enumerate(self.player_order):
+            result[original_idx] = per_player_values[canonical_idx]
+        return result
+
+
+def canonicalize_scenario(holdem_ranges, board_cards, dead_cards):
+    """Maps a scenario to its canonical form.
+
+    Args:
+        holdem_ranges: list of HoldemHandRange, as returned by
+            poker_hand.parse_hands_into_holdem_hands.
+        board_cards: list of Card.
+        dead_cards: list of Card.
+
+    Returns:
+        CanonicalScenario.
+    """
+    range_ids = [zip([h.card_ids for h in her.possible_hands],
+                     her.hand_weights)
+                 for her in holdem_ranges]
+    board_ids = [c.card_id for c in board_cards]
+    dead_ids = [c.card_id for c in dead_cards]
+
+    best = None
+    for perm in SUIT_PERMUTATIONS:
+        images = _PERMUTED_CARD_IDS[perm]
+        player_keys = [
+            tuple(sorted((tuple(sorted(images[c] for c in ids)), weight)
+                         for ids, weight in hands))
+            for hands in range_ids]
+        player_order = sorted(xrange(len(player_keys)),
+                              key=player_keys.__getitem__)
+        key = (tuple(player_keys[idx] for idx in player_order),
+               permute_cards(board_ids, perm),
+               permute_cards(dead_ids, perm))
+        if best is None or key < best.key:
+            best = CanonicalScenario(key, perm, player_order)
+    return best
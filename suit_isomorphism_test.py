@@ -0,0 +1,81 @@
+"""Tests for suit_isomorphism.py"""
+# pylint: disable=missing-docstring
+import unittest
+
+import poker_hand
+import suit_isomorphism
+
+
+def _ids(card_input):
+    return [c.card_id for c in poker_hand.parse_string_into_cards(card_input)]
+
+
+class SuitIsomorphismTest(unittest.TestCase):
+
+    def test_permutation_count(self):
+        self.assertEqual(24, len(suit_isomorphism.SUIT_PERMUTATIONS))
+        self.assertEqual((0, 1, 2, 3), suit_isomorphism.IDENTITY)
+
+    def test_permute_cards(self):
+        # Swap clubs and spades.
+        perm = (3, 1, 2, 0)
+        self.assertEqual(tuple(sorted(_ids('as3d'))),
+                         suit_isomorphism.permute_cards(_ids('ac3d'), perm))
+
+    def test_stabilizer_of_nothing_is_everything(self):
+        self.assertEqual(24, len(suit_isomorphism.stabilizer([])))
+
+    def test_stabilizer_of_pair_hands(self):
+        # AsAh vs KsKh: spades/hearts may swap, as may clubs/diamonds.
+        stab = suit_isomorphism.stabilizer([_ids('asah'), _ids('kskh')])
+        self.assertEqual(4, len(stab))
+        self.assertIn(suit_isomorphism.IDENTITY, stab)
+
+    def test_stabilizer_of_rainbow_flop(self):
+        stab = suit_isomorphism.stabilizer([_ids('2c3d4h')])
+        self.assertEqual([suit_isomorphism.IDENTITY], stab)
+
+
+class CanonicalizeScenarioTest(unittest.TestCase):
+
+    def _canonicalize(self, hands, board='', dead=''):
+        return suit_isomorphism.canonicalize_scenario(
+            poker_hand.parse_hands_into_holdem_hands(hands),
+            poker_hand.parse_string_into_cards(board),
+            poker_hand.parse_string_into_cards(dead))
+
+    def test_suit_permuted_scenarios_match(self):
+        lhs = self._canonicalize('asks,qdqh', board='2c7c9d')
+        rhs = self._canonicalize('ahkh,qsqc', board='2d7d9s')
+        self.assertEqual(lhs.key, rhs.key)
+
+    def test_player_order_is_recorded(self):
+        lhs = self._canonicalize('asks,qdqh', board='2c7c9d')
+        rhs = self._canonicalize('qsqc,ahkh', board='2d7d9s')
+        self.assertEqual(lhs.key, rhs.key)
+        self.assertEqual(
+            ['AK', 'QQ'], lhs.from_canonical_order(
+                lhs.to_canonical_order(['AK', 'QQ'])))
+        # The same canonical values map back to swapped players.
+        canonical_values = lhs.to_canonical_order(['AK', 'QQ'])
+        self.assertEqual(['QQ', 'AK'],
+                         rhs.from_canonical_order(canonical_values))
+
+    def test_different_scenarios_differ(self):
+        lhs = self._canonicalize('asks,qdqh', board='2c7c9d')
+        rhs = self._canonicalize('asks,qdqh', board='2c7c9s')
+        self.assertNotEqual(lhs.key, rhs.key)
+
+    def test_dead_cards_are_part_of_the_key(self):
+        lhs = self._canonicalize('asks,qdqh', dead='2c')
+        rhs = self._canonicalize('asks,qdqh', dead='2s')
+        self.assertNotEqual(lhs.key, rhs.key)
+
+    def test_ranges(self):
+        lhs = self._canonicalize('aks,qq')
+        rhs = self._canonicalize('qq,aks')
+        self.assertEqual(lhs.key, rhs.key)
+
+
+if __name__ == '__main__':
+    unittest.main()